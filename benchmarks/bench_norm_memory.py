@@ -0,0 +1,93 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Extra memory allocated by the normalizations: the former implementation (split, round and concat),
+:meth:`emg_analyzer.emg.EmgData.norm` / :meth:`emg_analyzer.emg.EmgData.norm_by_track` with a copy
+and in place. The memory is traced with tracemalloc, the size of the data is not counted.
+The recording is parsed from an *.emt* file (without cache), as in the scripts:
+the frame holds the values in a single block, a frame built by pieces would be consolidated (copied) first.
+
+    python benchmarks/bench_norm_memory.py --frames 1000000 --tracks 16
+"""
+
+import os
+import tempfile
+
+import pandas as pd
+
+from common import make_emt, peak_memory, mib, parser
+
+from emg_analyzer.emg import Emg
+
+
+def norm_split(data):
+    """
+    The implementation of EmgData.norm before the in place normalization.
+    """
+    time, values = data.iloc[:, 0:1], data.iloc[:, 1:]
+    v_min = values.min().min()
+    values -= v_min
+    v_max = values.max().max()
+    values /= v_max
+    values = values.round(decimals=3)
+    return pd.concat([time, values], axis=1)
+
+
+def norm_by_track_split(data):
+    """
+    The implementation of EmgData.norm_by_track before the in place normalization.
+    """
+    time, values = data.iloc[:, 0:1], data.iloc[:, 1:]
+    for col in values.columns:
+        track = values[col]
+        v_min = track.min()
+        v_max = track.max()
+        track -= v_min
+        track /= (v_max - v_min)
+    values = values.round(decimals=3)
+    return pd.concat([time, values], axis=1)
+
+
+def main():
+    args = parser(__doc__, frames=1000000, tracks=[16]).parse_args()
+    for tracks in args.tracks:
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            emt_path = make_emt(os.path.join(tmp_dir_name, 'bench.emt'), args.frames, tracks)
+            measure(emt_path, args.frames, tracks)
+
+
+def measure(emt_path, frames, tracks):
+    """
+    Print the extra memory of each normalization of the recording *emt_path*.
+    """
+    # the size of the values of the tracks, the normalized values
+    size = Emg.open(emt_path, lazy=False, cache=False).data._track_values().nbytes
+    print("normalize {} frames x {} tracks ({:.0f} MiB), extra memory:".format(frames, tracks, mib(size)))
+    for name, split in (('norm', norm_split), ('norm_by_track', norm_by_track_split)):
+        measures = []
+        for variant in ('before', 'copy', 'inplace'):
+            # a new recording for each variant, as the normalizations modify the data
+            data = Emg.open(emt_path, lazy=False, cache=False).data
+            if variant == 'before':
+                def run():
+                    split(data.data)
+            elif name == 'norm':
+                def run():
+                    data.norm(inplace=variant == 'inplace')
+            else:
+                def run():
+                    data.norm_by_track(data.tracks, inplace=variant == 'inplace')
+            peak = peak_memory(run)
+            measures.append("{} {:5.0f} MiB ({:.1f}x)".format(variant, mib(peak), peak / size))
+        print("  {:14s} {}".format(name, '  '.join(measures)))
+
+
+if __name__ == '__main__':
+    main()
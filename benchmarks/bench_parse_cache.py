@@ -0,0 +1,53 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Duration of the parsing of an *.emt* file: the text parsing, the first parsing which stores
+the cache entry, and the next ones loaded from the cache (see :mod:`emg_analyzer.cache`)
+in memory or memory-mapped.
+
+    python benchmarks/bench_parse_cache.py --frames 1000000 --tracks 16
+"""
+
+import os
+import tempfile
+
+from common import make_emt, best_of, mib, parser
+
+from emg_analyzer.cache import EmtCache
+from emg_analyzer.emg import Emg
+
+
+def main():
+    args = parser(__doc__, frames=1000000, tracks=[16], repeat=3).parse_args()
+    for tracks in args.tracks:
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            emt_path = make_emt(os.path.join(tmp_dir_name, 'bench.emt'), args.frames, tracks)
+            emt_cache = EmtCache(cache_dir=os.path.join(tmp_dir_name, 'cache'), max_size=None)
+
+            def parse(cache, mmap=False):
+                return lambda: Emg.open(emt_path, lazy=False, cache=cache, mmap=mmap)
+
+            text = best_of(parse(False), args.repeat)
+
+            def store():
+                emt_cache.clear()
+                Emg.open(emt_path, lazy=False, cache=emt_cache)
+
+            first = best_of(store, args.repeat)
+            loaded = best_of(parse(emt_cache), args.repeat)
+            mapped = best_of(parse(emt_cache, mmap=True), args.repeat)
+            print("parse {} frames x {} tracks ({:.0f} MiB of text), fastest of {} runs".format(
+                args.frames, tracks, mib(os.path.getsize(emt_path)), args.repeat))
+            print("  text {:6.2f} s  first (store) {:6.2f} s  cached {:6.3f} s ({:.0f}x)  "
+                  "mapped {:6.3f} s ({:.0f}x)".format(text, first, loaded, text / loaded, mapped, text / mapped))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Render time of the figure of one long track with and without decimation
+(see :func:`emg_analyzer.plot.decimate`). The default is a 2 kHz, 30 minutes track.
+
+    python benchmarks/bench_plot.py --frames 3600000
+"""
+
+import os
+import tempfile
+
+from common import make_emg, best_of, parser
+
+from matplotlib.figure import Figure
+
+from emg_analyzer.plot import render_track, decimate
+
+
+def main():
+    args = parser(__doc__, frames=3600000, tracks=[1], repeat=3).parse_args()
+    emg = make_emg(args.frames, 1, freq=2000)
+    x = emg.data['Time'].to_numpy()
+    y = emg.data['M00'].to_numpy()
+    with tempfile.TemporaryDirectory() as tmp_dir_name:
+        fig_path = os.path.join(tmp_dir_name, 'track.png')
+
+        def render(decimation):
+            return lambda: render_track(fig_path, x, y, 'bench', 'M00', 'V', decimation=decimation)
+
+        full = best_of(render(False), args.repeat)
+        decimated = best_of(render(True), args.repeat)
+    # the width in pixels of the figures of render_track
+    fig = Figure()
+    width, height = fig.get_size_inches()
+    fig.set_size_inches([width * 2, height])
+    kept = len(decimate(x, y, int(fig.get_figwidth() * fig.dpi))[0])
+    print("render one track of {} frames, fastest of {} runs".format(args.frames, args.repeat))
+    print("  all points {:6.2f} s  decimated {:6.2f} s  ({:.1f}x, {} points drawn)".format(
+        full, decimated, full / decimated, kept))
+
+
+if __name__ == '__main__':
+    main()
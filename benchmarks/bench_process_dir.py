@@ -0,0 +1,70 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Duration of the normalization of a directory (see :func:`emg_analyzer.utils.process_dir`)
+with one process and with several processes. The files have different lengths,
+from *frames* / *files* to *frames* frames, they are processed largest first.
+The cache is disabled, each file is parsed from the text.
+
+    python benchmarks/bench_process_dir.py --files 16 --frames 200000 --jobs 1 2 4
+"""
+
+import os
+import shutil
+import tempfile
+
+from common import make_emt, best_of, parser
+
+from emg_analyzer import cache
+from emg_analyzer.utils import process_dir
+
+
+def main():
+    bench_parser = parser(__doc__, frames=200000, tracks=[16], repeat=1)
+    bench_parser.add_argument('--files',
+                              type=int,
+                              default=16,
+                              help="The number of files of the directory (default 16).")
+    bench_parser.add_argument('--jobs',
+                              type=int,
+                              nargs='+',
+                              default=[1, 2, 4],
+                              help="The numbers of processes to compare, the speedups are relative to the "
+                                   "first one (default 1 2 4).")
+    args = bench_parser.parse_args()
+    cache.configure(enabled=False)
+    tracks = args.tracks[0]
+    with tempfile.TemporaryDirectory() as tmp_dir_name:
+        in_dir = os.path.join(tmp_dir_name, 'cohort')
+        os.makedirs(in_dir)
+        for i in range(args.files):
+            frames = args.frames * (i + 1) // args.files
+            make_emt(os.path.join(in_dir, 'patient_{:03d}.emt'.format(i)), frames, tracks, seed=i)
+        out_dir = os.path.join(tmp_dir_name, 'out')
+
+        def run(jobs):
+            def normalize():
+                shutil.rmtree(out_dir, ignore_errors=True)
+                os.makedirs(out_dir)
+                process_dir(in_dir, 'norm_by_track', tuple(), {}, dest=out_dir, suffix='norm', jobs=jobs,
+                            inplace=True)
+            return normalize
+
+        print("norm_by_track of {} files of up to {} frames x {} tracks, fastest of {} runs".format(
+            args.files, args.frames, tracks, args.repeat))
+        serial = None
+        for jobs in args.jobs:
+            duration = best_of(run(jobs), args.repeat)
+            serial = duration if serial is None else serial
+            print("  {:3d} job(s) {:7.2f} s  ({:.1f}x)".format(jobs, duration, serial / duration))
+
+
+if __name__ == '__main__':
+    main()
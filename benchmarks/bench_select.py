@@ -0,0 +1,60 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Duration of :meth:`emg_analyzer.emg.EmgData.select` against the former per-track implementation
+(one filtered Series per track realigned by two pd.concat).
+
+    python benchmarks/bench_select.py --frames 200000 --tracks 16 32
+"""
+
+import pandas as pd
+
+from common import make_emg, rest_matrix, best_of, parser
+
+
+def select_by_track(data, rest_matrix, coef=1.5):
+    """
+    The implementation of EmgData.select before the single mask.
+
+    :param data: The frames, the first column is Time.
+    :type data: :class:`pandas.DataFrame` object
+    :return: the selected values and the threshold of each track.
+    :rtype: tuple (:class:`pandas.DataFrame` object, dict)
+    """
+    filtered_cols = []
+    thresholds = {}
+    for col in data.columns[1:]:
+        c = data[col]
+        threshold = rest_matrix[col]['mean'] + (rest_matrix[col]['std'] * coef)
+        thresholds[col] = threshold
+        filtered_cols.append(c[c > threshold])
+    new_cols = pd.concat(filtered_cols, axis=1)
+    return pd.concat([data['Time'], new_cols], axis=1), thresholds
+
+
+def main():
+    args = parser(__doc__, frames=200000, tracks=[16, 32]).parse_args()
+    print("select on {} frames, fastest of {} runs".format(args.frames, args.repeat))
+    for tracks in args.tracks:
+        emg = make_emg(args.frames, tracks)
+        rest = rest_matrix(tracks)
+        # both implementations give the same selection
+        expected, _ = select_by_track(emg.data.data, rest)
+        selected, _ = emg.data.select(rest)
+        pd.testing.assert_frame_equal(selected.data, expected.reindex(selected.data.index), check_names=False)
+
+        old = best_of(lambda: select_by_track(emg.data.data, rest), args.repeat)
+        new = best_of(lambda: emg.data.select(rest), args.repeat)
+        print("  {:3d} tracks: by track {:7.1f} ms  single mask {:7.1f} ms  ({:.1f}x)".format(
+            tracks, old * 1000, new * 1000, old / new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Startup time of `<script> --help` for every console script declared in setup.py,
+against the import of pandas alone. Each run is a new interpreter.
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+from common import best_of
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_help_code = """
+import io
+import contextlib
+from {module} import main
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+        main(['--help'])
+    except SystemExit:
+        pass
+"""
+
+
+def main():
+    bench_parser = argparse.ArgumentParser(description=__doc__)
+    bench_parser.add_argument('--repeat',
+                              type=int,
+                              default=5,
+                              help="The number of runs, the fastest one is reported (default 5).")
+    args = bench_parser.parse_args()
+    with open(os.path.join(ROOT_DIR, 'setup.py')) as setup_file:
+        entry_points = re.findall(r"'(\w+)=([\w.]+):main'", setup_file.read())
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+
+    def run(code):
+        return lambda: subprocess.run([sys.executable, '-c', code], env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+    pandas_import = best_of(run('import pandas'), args.repeat)
+    print("startup in a new interpreter, fastest of {} runs".format(args.repeat))
+    print("  {:24s} {:6.3f} s".format('import pandas', pandas_import))
+    for name, module in entry_points:
+        duration = best_of(run(_help_code.format(module=module)), args.repeat)
+        print("  {:24s} {:6.3f} s  ({:.1f}x faster)".format(name + ' --help', duration, pandas_import / duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Helpers shared by the benchmarks: synthetic recordings, timing and memory measurement.
+
+The recordings are generated with a fixed seed, so two runs of a benchmark work on the same data.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# run from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from emg_analyzer.emg import Emg, EmgHeader, EmgData
+
+
+def make_emg(frames, tracks, freq=1000, seed=0):
+    """
+    :param int frames: The number of frames.
+    :param int tracks: The number of tracks.
+    :param int freq: The frequency of the recording in Hz.
+    :param int seed: The seed of the random values.
+    :return: a recording of rectified noise, the values have 3 decimals as in the *.emt* files.
+    :rtype: :class:`emg_analyzer.emg.Emg` object
+    """
+    rng = np.random.RandomState(seed)
+    names = ['M{:02d}'.format(i) for i in range(tracks)]
+    values = np.round(np.abs(rng.normal(0, 1, (frames, tracks))), 3)
+    data = pd.DataFrame(values, columns=names, index=pd.RangeIndex(frames, name='Frame'))
+    data.insert(0, 'Time', np.round(np.arange(frames) / freq, 3))
+
+    header = EmgHeader()
+    header.type = 'Emg tracks'
+    header.unit = 'V'
+    header.tracks_nb = tracks
+    header.freq = '{} Hz'.format(freq)
+    header.frames = frames
+    header.start_time = 0.0
+    header.tracks_names = names
+    emg = Emg()
+    emg.name = 'bench'
+    emg.header = header
+    emg.data = EmgData()
+    emg.data.data = data
+    return emg
+
+
+def make_emt(path, frames, tracks, freq=1000, seed=0):
+    """
+    Write a synthetic recording (see :func:`make_emg`) in *.emt* format.
+
+    :param str path: The path of the file to write.
+    :return: the path of the file.
+    :rtype: str
+    """
+    with open(path, 'w') as emt_file:
+        make_emg(frames, tracks, freq=freq, seed=seed).to_emt(file=emt_file)
+    return path
+
+
+def rest_matrix(tracks, mean=0.8, std=0.6):
+    """
+    :return: the statistics of a rest condition for the tracks of :func:`make_emg`.
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    names = ['M{:02d}'.format(i) for i in range(tracks)]
+    return pd.DataFrame({name: [mean, std] for name in names}, index=['mean', 'std'])
+
+
+def best_of(func, repeat=5):
+    """
+    :param func: The function to time, called without argument.
+    :type func: callable
+    :param int repeat: The number of runs.
+    :return: the duration of the fastest run in seconds.
+    :rtype: float
+    """
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+def peak_memory(func):
+    """
+    :param func: The function to measure, called without argument.
+    :type func: callable
+    :return: the peak of the memory allocated by *func* (numpy arrays included) in bytes.
+    :rtype: int
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def mib(size):
+    """
+    :param int size: A size in bytes.
+    :return: the size in MiB.
+    :rtype: float
+    """
+    return size / 2 ** 20
+
+
+def parser(description, frames, tracks, repeat=5):
+    """
+    :param str description: The description of the benchmark.
+    :param int frames: The default number of frames.
+    :param tracks: The default number(s) of tracks.
+    :type tracks: list of int
+    :param int repeat: The default number of runs.
+    :return: a parser with the options shared by the benchmarks.
+    :rtype: :class:`argparse.ArgumentParser` object
+    """
+    new_parser = argparse.ArgumentParser(description=description)
+    new_parser.add_argument('--frames',
+                            type=int,
+                            default=frames,
+                            help="The number of frames of the recording (default {}).".format(frames))
+    new_parser.add_argument('--tracks',
+                            type=int,
+                            nargs='+',
+                            default=tracks,
+                            help="The number(s) of tracks of the recording (default {}).".format(
+                                ' '.join(str(t) for t in tracks)))
+    new_parser.add_argument('--repeat',
+                            type=int,
+                            default=repeat,
+                            help="The number of runs, the fastest one is reported (default {}).".format(repeat))
+    return new_parser
@@ -15,13 +15,47 @@ class VersionAction(argparse._VersionAction):
         """Override the :meth:`argparse._VersionAction.__call__` to use
            a RawTextHelpFormatter only for version action whatever the class_formatter
            specified for the :class:`argparse.ArgumentParser` object.
+           The version can be a callable returning the message, so it is computed
+           only if the option is used.
         """
         version = self.version
         if version is None:
             version = parser.version
+        if callable(version):
+            version = version()
         formatter = argparse.RawTextHelpFormatter(parser.prog)
         formatter.add_text(version)
         parser._print_message(formatter.format_help(), argparse._sys.stdout)
         parser.exit()
 
 
+
+
+def add_cache_arguments(parser):
+    """
+    Add the options to control the cache of parsed *.emt* files
+    (see :mod:`emg_analyzer.cache`) to *parser*.
+
+    :param parser: the parser to add options to.
+    :type parser: :class:`argparse.ArgumentParser` object
+    """
+    group = parser.add_argument_group('cache')
+    group.add_argument('--cache-dir',
+                       help="The directory where to store the binary version of the parsed '.emt' files "
+                            "(default ~/.cache/emg_analyzer).")
+    group.add_argument('--no-cache',
+                       action='store_true',
+                       default=False,
+                       help="Always parse the '.emt' files, do not use nor fill the cache.")
+
+
+def configure_cache(args):
+    """
+    Configure the default cache according to the options added by :func:`add_cache_arguments`.
+
+    :param args: the parsed arguments.
+    :type args: :class:`argparse.Namespace` object
+    """
+    from emg_analyzer import cache
+    cache.configure(cache_dir=args.cache_dir,
+                    enabled=False if args.no_cache else None)
@@ -9,7 +9,7 @@ import colorlog
 
 _log = colorlog.getLogger('emg_analyzer.block')
 
-from emg_analyzer.emg import Emg
+from emg_analyzer.emg import Emg, EmgData
 
 
 class Block:
@@ -22,6 +22,7 @@ class Block:
         self.nb = nb
         self.start = start
         self.stop = stop
+        self.handler = None
 
     def __eq__(self, other):
         return self.ref == other.ref and \
@@ -35,46 +36,146 @@ nb = {}
 start = {}
 stop = {}""".format(self.ref, self.nb, self.start, self.stop)
 
-    def get_data(self):
+    def get_data(self, tracks=None):
         """
 
+        :param tracks: The names of the tracks to extract, None to extract all tracks.
+        :type tracks: list of string
         :return: The data extracted from the reference from the frame *start* to *stop* (included)
                  The time column has been discarded.
         :rtype: :class:`pandas.DataFrame` object.
         """
-        # parse emt
-        # extract only lines corresponding to block
-        emg = Emg()
-        with open(self.ref) as emt:
-            emg.parse(emt)
-        emg_data = emg.data
-        data = emg_data.get_frames(self.start, self.stop)
+        if self.handler is not None:
+            # the reference is loaded once for all blocks of the handler
+            return self.handler.get_data(self, tracks=tracks)
+        # read only lines corresponding to block
+        emg = Emg.open_frames(self.ref, self.start, self.stop, tracks=tracks)
+        data = emg.data.data
         data = data.drop(['Time'], axis=1)
         return data
-    
+
+
+class RefCache:
+    """
+    Share the loaded references between several :class:`BlockHandler`
+    (for instance when several block definition files point at the same recording).
+    A reference is released when no more handler use it.
+    """
+
+    def __init__(self):
+        self._emgs = {}
+        self._users = {}
+
+    def acquire(self, ref):
+        """
+        :param str ref: the path of the emt file.
+        :return: the emg corresponding to *ref*, it is loaded if it is not already.
+        :rtype: :class:`emg_analyzer.emg.Emg` object
+        """
+        if ref not in self._emgs:
+            _log.debug("load reference '{}'".format(ref))
+            self._emgs[ref] = Emg.open(ref, lazy=False, mmap=True)
+            self._users[ref] = 0
+        self._users[ref] += 1
+        return self._emgs[ref]
+
+    def release(self, ref):
+        """
+        Release a reference acquired by :meth:`acquire`.
+
+        :param str ref: the path of the emt file.
+        """
+        self._users[ref] -= 1
+        if not self._users[ref]:
+            _log.debug("release reference '{}'".format(ref))
+            del self._emgs[ref]
+            del self._users[ref]
+
+    def __contains__(self, ref):
+        return ref in self._emgs
+
 
 class BlockHandler:
     """
-    A BlockHandler handle a serie of block which shared the same reference
+    A BlockHandler handle a serie of block which shared the same reference.
+    The reference is loaded once, the first time the data of a block are needed,
+    and kept until the handler is released.
     """
 
-    def __init__(self, ref):
+    def __init__(self, ref, ref_cache=None):
+        """
+        :param str ref: the path of the emt file.
+        :param ref_cache: the cache to share the reference with other handlers.
+        :type ref_cache: :class:`RefCache` object
+        """
         self.ref = ref
         self.blocks = []
+        self.ref_cache = ref_cache
+        self._emg = None
 
     def add_block(self, block):
+        block.handler = self
         self.blocks.append(block)
 
+    def load(self):
+        """
+        Load the reference if it is not already loaded.
+
+        :return: the emg of the reference.
+        :rtype: :class:`emg_analyzer.emg.Emg` object
+        """
+        if self._emg is None:
+            if self.ref_cache is not None:
+                self._emg = self.ref_cache.acquire(self.ref)
+            else:
+                _log.debug("load reference '{}'".format(self.ref))
+                self._emg = Emg.open(self.ref, lazy=False, mmap=True)
+        return self._emg
+
+    def get_data(self, block, tracks=None):
+        """
+        :param block: a block of this handler
+        :type block: :class:`Block` object
+        :param tracks: The names of the tracks to extract, None to extract all tracks.
+        :type tracks: list of string
+        :return: The data of the reference from the frame *start* to *stop* (included) of *block*.
+                 The time column has been discarded.
+        :rtype: :class:`pandas.DataFrame` object.
+        :raise KeyError: if a track in *tracks* is not in the reference (as :meth:`Block.get_data`).
+        """
+        emg = self.load()
+        data = emg.data.get_frames(block.start, block.stop)
+        if tracks is None:
+            return data.drop(['Time'], axis=1)
+        return data[EmgData._select_tracks(emg.data.tracks, tracks)]
+
+    def release(self):
+        """
+        Release the reference, the memory is freed if no other handler use it.
+        """
+        if self._emg is not None:
+            if self.ref_cache is not None:
+                self.ref_cache.release(self.ref)
+            self._emg = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
     def __iter__(self):
         generator = (block for block in sorted(self.blocks, key=lambda blk: blk.nb))
         return generator
 
 
-def parse_block_def(block_file, sep):
+def parse_block_def(block_file, sep, ref_cache=None):
     """
     parse a block defition file and return a list of :class:`BlockHandler` objects.
     :param block_file: The definition block file to parse
     :type block_file: file object
+    :param ref_cache: the cache to share the references between the handlers.
+    :type ref_cache: :class:`RefCache` object
     :return: list of :class:`BlockHandler` objects.
     """
     block_handlers = []
@@ -96,7 +197,7 @@ def parse_block_def(block_file, sep):
                 msg = 'File not found: {}'.format(ref)
                 _log.critical(msg)
                 raise IOError(msg)
-            current_block_handler = BlockHandler(ref)
+            current_block_handler = BlockHandler(ref, ref_cache=ref_cache)
         else:
             try:
                 block_nb, start, stop, *_ = line.split(sep)
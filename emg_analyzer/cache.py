@@ -0,0 +1,318 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Binary sidecar cache for parsed *.emt* files.
+
+Parsing the text of an *.emt* file is by far the most expensive step of all scripts.
+The first time a file is parsed, its content is stored in a cache directory as
+numpy arrays (*.npy*) and a small json file holding the metadata (the header fields, ...).
+The next parsings load the arrays instead of tokenizing the text.
+
+An entry is identified by the real path of the *.emt* file,
+and is valid only while the size and the modification time of this file do not change
+(see :func:`file_signature`). The signature is taken before the file is read,
+so an entry never holds the values of a file modified during its parsing.
+The cache size is capped, the least recently used entries are evicted first.
+
+The default cache can be configured with the following environment variables:
+
+    * **EMG_ANALYZER_CACHE**: set it to '0', 'no' or 'off' to disable the cache.
+    * **EMG_ANALYZER_CACHE_DIR**: the directory where to store the entries
+      (default *~/.cache/emg_analyzer*).
+    * **EMG_ANALYZER_CACHE_SIZE**: the maximum size of the cache in bytes (default 1 GiB).
+
+or with :func:`configure`.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+
+import numpy as np
+import colorlog
+
+_log = colorlog.getLogger('emg_analyzer.cache')
+
+CACHE_VERSION = 2
+
+
+def file_signature(path):
+    """
+    :param str path: the path of the *.emt* file.
+    :return: what must not change for the entry of this file to be valid.
+    :rtype: dict
+    """
+    st = os.stat(path)
+    return {'path': os.path.realpath(path),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns}
+
+
+class EmtCache:
+    """
+    Handle a directory of binary entries corresponding to parsed *.emt* files.
+    """
+
+    def __init__(self, cache_dir=None, max_size=2 ** 30, enabled=True):
+        """
+        :param str cache_dir: The directory where to store the entries.
+                              The directory is created when the first entry is stored.
+        :param int max_size: The maximum size in bytes of the cache, None means no limit.
+        :param bool enabled: False to deactivate the cache.
+        """
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'emg_analyzer')
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.enabled = enabled
+
+
+    def _key(self, path, kind):
+        """
+        :param str path: the path of the *.emt* file.
+        :param str kind: the kind of entry (several kinds of entries can be associated to a file).
+        :return: the prefix of the entry files in cache dir.
+        :rtype: str
+        """
+        real_path = os.path.realpath(path)
+        digest = hashlib.sha1('{}\0{}'.format(real_path, kind).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest)
+
+
+    def array_path(self, path, name, kind='data'):
+        """
+        :param str path: the path of the *.emt* file.
+        :param str name: the name of the array.
+        :param str kind: the kind of entry.
+        :return: the path of the *.npy* file storing the array *name* of the entry.
+        :rtype: str
+        """
+        return "{}.{}.npy".format(self._key(path, kind), name)
+
+
+    def lookup(self, path, kind='data'):
+        """
+        :param str path: the path of the *.emt* file.
+        :param str kind: the kind of entry.
+        :return: the metadata of the entry corresponding to *path*
+                 or None if there is no valid entry for this file.
+                 The entry is marked as used.
+        :rtype: dict or None
+        """
+        if not self.enabled:
+            return None
+        meta_path = self._key(path, kind) + '.json'
+        try:
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != CACHE_VERSION or meta.get('signature') != file_signature(path):
+            _log.debug("cache entry for '{}' is out of date".format(path))
+            self.invalidate(path, kind=kind)
+            return None
+        if not all(os.path.exists(self.array_path(path, name, kind=kind)) for name in meta['arrays']):
+            self.invalidate(path, kind=kind)
+            return None
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return meta
+
+
+    def load(self, path, name, kind='data', mmap_mode=None):
+        """
+        :param str path: the path of the *.emt* file.
+        :param str name: the name of the array to load.
+        :param str kind: the kind of entry.
+        :param str mmap_mode: if not None, memory-map the array (see :func:`numpy.load`).
+        :return: the array *name* of the entry corresponding to *path*
+        :rtype: :class:`numpy.ndarray` object
+        """
+        return np.load(self.array_path(path, name, kind=kind), mmap_mode=mmap_mode)
+
+
+    def store(self, path, meta, arrays, kind='data', signature=None):
+        """
+        Store a new entry for *path*, replace the previous one if any.
+
+        :param str path: the path of the *.emt* file.
+        :param dict meta: the metadata to store (must be serializable in json).
+        :param dict arrays: the arrays to store {'name': :class:`numpy.ndarray` object}.
+        :param str kind: the kind of entry.
+        :param dict signature: the signature of the file (see :func:`file_signature`)
+                               taken before reading the file the entry comes from.
+                               If the file has changed since, the entry is not stored.
+                               None to take the signature now.
+        """
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if signature is None:
+                signature = file_signature(path)
+            self.invalidate(path, kind=kind)
+            for name, array in arrays.items():
+                self._atomic_write(self.array_path(path, name, kind=kind),
+                                   lambda f, a=array: np.save(f, a),
+                                   mode='wb')
+            meta = dict(meta)
+            meta['version'] = CACHE_VERSION
+            meta['signature'] = signature
+            meta['arrays'] = list(arrays)
+            # the json file is written last, it validates the entry
+            self._atomic_write(self._key(path, kind) + '.json',
+                               lambda f: json.dump(meta, f),
+                               mode='w')
+            if file_signature(path) != signature:
+                # the entry may hold a mix of both versions of the file
+                _log.debug("'{}' has been modified while it was read: not cached".format(path))
+                self.invalidate(path, kind=kind)
+                return
+        except OSError as err:
+            _log.warning("cannot store '{}' in cache: {}".format(path, err))
+            self.invalidate(path, kind=kind)
+            return
+        self.evict()
+
+
+    def _atomic_write(self, dest, write, mode):
+        """
+        write a file in cache_dir then move it to *dest*,
+        so a concurrent reader never see a partial file.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp')
+        try:
+            with os.fdopen(fd, mode) as tmp_file:
+                write(tmp_file)
+            os.replace(tmp_path, dest)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+    def invalidate(self, path, kind='data'):
+        """
+        Remove the entry corresponding to *path*.
+
+        :param str path: the path of the *.emt* file.
+        :param str kind: the kind of entry.
+        """
+        key = os.path.basename(self._key(path, kind))
+        for entry_path, _ in self._entry_files(key):
+            try:
+                os.unlink(entry_path)
+            except OSError:
+                pass
+
+
+    def _entry_files(self, key=None):
+        """
+        :param str key: the key of the entry, if None return the files of all entries.
+        :return: the files belonging to the entry *key*
+        :rtype: list of tuple (path, :class:`os.stat_result`)
+        """
+        files = []
+        try:
+            with os.scandir(self.cache_dir) as dir_it:
+                for entry in dir_it:
+                    if entry.name.startswith('.tmp') or not entry.is_file():
+                        continue
+                    if key is None or entry.name.split('.')[0] == key:
+                        files.append((entry.path, entry.stat()))
+        except FileNotFoundError:
+            pass
+        return files
+
+
+    @property
+    def size(self):
+        """
+        :return: The size in bytes used by the cache.
+        :rtype: int
+        """
+        return sum(st.st_size for _, st in self._entry_files())
+
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache size is lower than *max_size*.
+        """
+        if self.max_size is None:
+            return
+        entries = {}
+        for path, st in self._entry_files():
+            key = os.path.basename(path).split('.')[0]
+            size, last_use = entries.get(key, (0, 0))
+            if path.endswith('.json'):
+                last_use = st.st_mtime_ns
+            entries[key] = (size + st.st_size, last_use)
+        total = sum(size for size, _ in entries.values())
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_size:
+                break
+            _log.debug("evict cache entry '{}'".format(key))
+            for path, _ in self._entry_files(key):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            total -= size
+
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        for path, _ in self._entry_files():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+_default_cache = None
+
+
+def get_cache():
+    """
+    :return: the cache used by default by :meth:`emg_analyzer.emg.Emg.parse`.
+             It is initialized from the environment variables.
+    :rtype: :class:`EmtCache` object
+    """
+    global _default_cache
+    if _default_cache is None:
+        enabled = os.environ.get('EMG_ANALYZER_CACHE', '1').lower() not in ('0', 'no', 'off', 'false')
+        cache_dir = os.environ.get('EMG_ANALYZER_CACHE_DIR') or None
+        max_size = os.environ.get('EMG_ANALYZER_CACHE_SIZE')
+        max_size = int(max_size) if max_size else 2 ** 30
+        _default_cache = EmtCache(cache_dir=cache_dir, max_size=max_size, enabled=enabled)
+    return _default_cache
+
+
+def configure(cache_dir=None, max_size=None, enabled=None):
+    """
+    Configure the default cache. The parameters set to None are not modified.
+    The configuration is also exported in the environment,
+    so it is inherited by the sub processes.
+
+    :param str cache_dir: The directory where to store the entries.
+    :param int max_size: The maximum size in bytes of the cache.
+    :param bool enabled: False to deactivate the cache.
+    """
+    emt_cache = get_cache()
+    if cache_dir is not None:
+        emt_cache.cache_dir = cache_dir
+        os.environ['EMG_ANALYZER_CACHE_DIR'] = cache_dir
+    if max_size is not None:
+        emt_cache.max_size = max_size
+        os.environ['EMG_ANALYZER_CACHE_SIZE'] = str(max_size)
+    if enabled is not None:
+        emt_cache.enabled = enabled
+        os.environ['EMG_ANALYZER_CACHE'] = '1' if enabled else '0'
@@ -11,10 +11,15 @@ import os
 from io import StringIO
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import colorlog
 _log = colorlog.getLogger('emg_analyzer')
 
+from emg_analyzer import cache as _cache
+from emg_analyzer.stats import Statistics
+
+#: The default number of frames by chunk when a file is read chunk by chunk.
+CHUNKSIZE = 100000
+
 
 class Emg:
     """
@@ -31,6 +36,113 @@ class Emg:
         self.data = None
 
 
+    @classmethod
+    def open(cls, path, lazy=True, cache=None, mmap=False, tracks=None, dtype=None):
+        """
+        Open an *.emt* file.
+
+        :param str path: the path of the *.emt* file.
+        :param bool lazy: if True parse only the header, the data are loaded
+                          the first time the attribute *data* is accessed.
+        :param cache: The cache to use, None to use the default cache, False to not use any cache.
+        :type cache: :class:`emg_analyzer.cache.EmtCache` object
+        :param bool mmap: if True the data are memory-mapped (see :meth:`parse`).
+        :param tracks: The names of the tracks to load, None to load all tracks (see :meth:`parse`).
+        :type tracks: list of string
+        :param dtype: The type of the tracks values (see :meth:`parse`).
+        :type dtype: :class:`numpy.dtype` object or string
+        :return: a new Emg
+        :rtype: :class:`Emg` object
+        """
+        new_emg = cls()
+        with open(path) as emt_file:
+            if not lazy:
+                new_emg.parse(emt_file, cache=cache, mmap=mmap, tracks=tracks, dtype=dtype)
+                return new_emg
+            new_emg.name = os.path.splitext(os.path.basename(path))[0]
+            emt_cache = cls._get_cache(emt_file, cache)
+            meta = emt_cache.lookup(path, kind=cls._data_kind(dtype)) if emt_cache is not None else None
+            if meta is not None:
+                new_emg.header = EmgHeader.from_dict(meta['header'])
+            else:
+                new_emg.header = EmgHeader()
+                new_emg.header.parse(emt_file)
+        if tracks is not None:
+            new_emg.header.select_tracks(tracks)
+        new_emg._lazy_parse = {'path': path, 'cache': cache, 'mmap': mmap, 'tracks': tracks, 'dtype': dtype}
+        return new_emg
+
+
+    @classmethod
+    def open_frames(cls, path, start, stop, cache=None, tracks=None, dtype=None):
+        """
+        Open a range of frames of an *.emt* file.
+        The file is not parsed entirely: the binary version of the file is used if it's in the cache,
+        otherwise only the lines of the range are read, thanks to the frame index
+        (see :mod:`emg_analyzer.frame_index`).
+
+        :param str path: the path of the *.emt* file.
+        :param int start: the first frame to read.
+        :param int stop: the last frame to read (included).
+        :param cache: The cache to use, None to use the default cache, False to not use any cache.
+        :type cache: :class:`emg_analyzer.cache.EmtCache` object
+        :param tracks: The names of the tracks to load, None to load all tracks (see :meth:`parse`).
+        :type tracks: list of string
+        :param dtype: The type of the tracks values (see :meth:`parse`).
+        :type dtype: :class:`numpy.dtype` object or string
+        :return: a new Emg with the frames from *start* to *stop*.
+        :rtype: :class:`Emg` object
+        """
+        new_emg = cls.open(path, lazy=True, cache=cache, mmap=True, dtype=dtype)
+        with open(path) as emt_file:
+            emt_cache = cls._get_cache(emt_file, cache)
+        if emt_cache is not None and emt_cache.lookup(path, kind=cls._data_kind(dtype)) is not None:
+            data = new_emg.data.get_frames(start, stop)
+            if tracks is not None:
+                data = data[['Time'] + EmgData._select_tracks(new_emg.header.tracks_names, tracks)]
+            # do not keep a reference to the mapped file
+            new_emg.data = EmgData._new_data(data.copy())
+        else:
+            from emg_analyzer.frame_index import FrameIndex
+            lines = FrameIndex.load(path, cache=cache).read(path, start, stop)
+            data = EmgData()
+            data.parse(StringIO(lines), new_emg.header.tracks_names, usetracks=tracks, dtype=dtype)
+            new_emg.data = EmgData._new_data(data.data.loc[start:stop])
+        if tracks is not None:
+            new_emg.header.select_tracks(tracks)
+        new_emg.header.frames = new_emg.data.frames
+        if new_emg.data.frames:
+            new_emg.header.start_time = new_emg.data.start_time
+        return new_emg
+
+
+    @property
+    def data(self):
+        """
+        :return: the data of this emg, loaded on the first access if the emg has been opened lazily.
+        :rtype: :class:`EmgData` object
+        """
+        if self._data is None and self._lazy_parse is not None:
+            _log.debug("load data from '{}'".format(self._lazy_parse['path']))
+            loaded = Emg.open(self._lazy_parse['path'],
+                              lazy=False,
+                              cache=self._lazy_parse['cache'],
+                              mmap=self._lazy_parse['mmap'],
+                              tracks=self._lazy_parse['tracks'],
+                              dtype=self._lazy_parse['dtype'])
+            if loaded.header.frames != self.header.frames:
+                raise RuntimeError("'{}' has been modified since it was opened".format(self._lazy_parse['path']))
+            self._data = loaded.data
+            self._lazy_parse = None
+        return self._data
+
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        self._lazy_parse = None
+
+
     def __eq__(self, other):
         """
 
@@ -41,25 +153,178 @@ class Emg:
 
 
 
-    def parse(self, emt_file):
+    def parse(self, emt_file, cache=None, mmap=False, tracks=None, dtype=None):
         """
         Parse emt_file to fill this object.
+        If the file has already been parsed, the binary version stored in the cache is loaded instead.
 
         :param emt_file: the file to parse
         :type emt_file: file object
+        :param cache: The cache to use, None to use the default cache, False to not use any cache.
+        :type cache: :class:`emg_analyzer.cache.EmtCache` object
+        :param bool mmap: if True the data are memory-mapped from the binary version
+                          of the file stored in the cache instead of being loaded in memory.
+        :param tracks: The names of the tracks to load, None to load all tracks.
+                       The other columns are neither parsed nor allocated.
+                       The tracks are kept in the order of the file.
+        :type tracks: list of string
+        :param dtype: The type of the tracks values, None for float64 (the Time column is always float64).
+                      Using float32 halves the memory footprint of the data.
+                      The values of the *.emt* files have 3 decimals, a float32 holds them exactly
+                      enough to be written back unchanged as long as their absolute value is lower than 2**14 (16384).
+                      The results of the normalizations are the same as in float64 within 0.001
+                      (the rounding of the last decimal can differ).
+        :type dtype: :class:`numpy.dtype` object or string
+        :raise KeyError: if a track in *tracks* is not in the file.
         """
         self.name = os.path.splitext(os.path.basename(emt_file.name))[0]
+        emt_cache = self._get_cache(emt_file, cache)
+        kind = self._data_kind(dtype)
+        if emt_cache is not None:
+            # before reading the file, so a modification during the parsing is detected
+            signature = _cache.file_signature(emt_file.name)
+            meta = emt_cache.lookup(emt_file.name, kind=kind)
+            if meta is not None:
+                _log.debug("load '{}' from cache".format(emt_file.name))
+                self._load_cache(emt_cache, emt_file.name, meta, mmap, tracks=tracks, kind=kind)
+                return
+        elif mmap:
+            _log.debug("'{}' cannot be memory-mapped without cache: load it in memory".format(emt_file.name))
         self.header = EmgHeader()
         self.header.parse(emt_file)
         self.data = EmgData()
-        self.data.parse(emt_file, self.header.tracks_names)
+        self.data.parse(emt_file, self.header.tracks_names, usetracks=tracks, dtype=dtype)
         if self.header.frames != self.data.frames:
             raise RuntimeError("The number of Frames in header '{}' "
                                "does not match data frames '{}'.".format(self.header.frames,
                                                                          self.data.frames))
+        if tracks is not None:
+            # the cache hold only whole files
+            self.header.select_tracks(tracks)
+        elif emt_cache is not None:
+            data_meta, arrays = self.data.to_arrays()
+            emt_cache.store(emt_file.name,
+                            {'header': self.header.to_dict(), 'data': data_meta},
+                            arrays,
+                            kind=kind,
+                            signature=signature)
+            if mmap:
+                meta = emt_cache.lookup(emt_file.name, kind=kind)
+                if meta is not None:
+                    # release the parsed data and use the mapped ones
+                    self._load_cache(emt_cache, emt_file.name, meta, mmap, kind=kind)
+
+
+    def _load_cache(self, emt_cache, path, meta, mmap, tracks=None, kind='data'):
+        """
+        Fill this object with the entry of *path* in the cache.
+
+        :param emt_cache: The cache where the entry is stored.
+        :type emt_cache: :class:`emg_analyzer.cache.EmtCache` object
+        :param str path: The path of the *.emt* file.
+        :param dict meta: The metadata of the entry.
+        :param bool mmap: True to memory-map the data instead of loading them.
+        :param tracks: The names of the tracks to load, None to load all tracks.
+        :type tracks: list of string
+        :param str kind: The kind of the entry (see :meth:`_data_kind`).
+        """
+        self.header = EmgHeader.from_dict(meta['header'])
+        if tracks is None:
+            # copy on write, the data can be modified in memory but not on disk
+            mmap_mode = 'c' if mmap else None
+            arrays = {name: emt_cache.load(path, name, kind=kind, mmap_mode=mmap_mode) for name in meta['arrays']}
+            self.data = EmgData.from_arrays(meta['data'], arrays, lazy=mmap)
+        else:
+            # read only the columns of the selected tracks
+            mapped = EmgData.from_arrays(meta['data'],
+                                         {name: emt_cache.load(path, name, kind=kind, mmap_mode='r')
+                                          for name in meta['arrays']},
+                                         lazy=True)
+            self.data = EmgData._new_data(mapped._mapped_frame(slice(None), tracks=tracks).copy())
+            self.header.select_tracks(tracks)
 
 
-    def norm_by_track(self, dyn_cal=None):
+    def iter_chunks(self, emt_file, chunksize=CHUNKSIZE, cache=None, tracks=None, dtype=None):
+        """
+        Parse the header of emt_file to fill this object (except data),
+        then return an iterator on the data, chunk by chunk.
+        So the memory used does not depend on the file size.
+
+        :param emt_file: the file to parse
+        :type emt_file: file object
+        :param int chunksize: the number of frames by chunk.
+        :param cache: The cache to use, None to use the default cache, False to not use any cache.
+                      If the file is in the cache, the chunks are read from the mapped binary version.
+        :type cache: :class:`emg_analyzer.cache.EmtCache` object
+        :param tracks: The names of the tracks to load, None to load all tracks (see :meth:`parse`).
+        :type tracks: list of string
+        :param dtype: The type of the tracks values (see :meth:`parse`).
+        :type dtype: :class:`numpy.dtype` object or string
+        :return: an iterator on the chunks of data
+        :rtype: iterator on :class:`EmgData` objects
+        """
+        self.name = os.path.splitext(os.path.basename(emt_file.name))[0]
+        emt_cache = self._get_cache(emt_file, cache)
+        kind = self._data_kind(dtype)
+        meta = emt_cache.lookup(emt_file.name, kind=kind) if emt_cache is not None else None
+        if meta is not None:
+            self._load_cache(emt_cache, emt_file.name, meta, mmap=True, kind=kind)
+            mapped, self.data = self.data, None
+            if tracks is not None:
+                self.header.select_tracks(tracks)
+            return mapped.iter_frames(chunksize, tracks=tracks)
+        self.header = EmgHeader()
+        self.header.parse(emt_file)
+        chunks = EmgData.iter_chunks(emt_file, self.header.tracks_names,
+                                     chunksize=chunksize,
+                                     frames=self.header.frames,
+                                     usetracks=tracks,
+                                     dtype=dtype)
+        if tracks is not None:
+            self.header.select_tracks(tracks)
+        return chunks
+
+
+    @staticmethod
+    def _data_kind(dtype):
+        """
+        :param dtype: The type of the tracks values, None for float64.
+        :type dtype: :class:`numpy.dtype` object or string
+        :return: the kind of the cache entries holding the data parsed with *dtype*.
+        :rtype: str
+        """
+        if dtype is None or np.dtype(dtype) == np.float64:
+            return 'data'
+        return 'data-{}'.format(np.dtype(dtype).name)
+
+
+    @staticmethod
+    def _get_cache(emt_file, cache):
+        """
+        :param emt_file: the file to parse
+        :type emt_file: file object
+        :param cache: The cache to use, None to use the default cache, False to not use any cache.
+        :return: The cache to use to parse *emt_file*,
+                 None if the file cannot be cached (it's not a regular file not read from the beginning).
+        :rtype: :class:`emg_analyzer.cache.EmtCache` object or None
+        """
+        if cache is False:
+            return None
+        emt_cache = _cache.get_cache() if cache is None else cache
+        if not emt_cache.enabled:
+            return None
+        path = getattr(emt_file, 'name', None)
+        if not isinstance(path, str) or not os.path.isfile(path):
+            return None
+        try:
+            if emt_file.tell() != 0:
+                return None
+        except (OSError, ValueError):
+            return None
+        return emt_cache
+
+
+    def norm_by_track(self, dyn_cal=None, inplace=False):
         """
         Normalize each Voltage records.
         Each record is normalize independently following the formula below.
@@ -69,7 +334,16 @@ class Emg:
             zi = xi - min(x) / max(x) - min(x)
 
         where x=(x1,...,xn) and zi is now your with normalized data.
+
+        :param dyn_cal: The min and max for each muscle to normalize (see :meth:`EmgData.norm_by_track`).
+        :type dyn_cal: :class:`pandas.DataFrame` object
+        :param bool inplace: if True normalize this Emg without copying the data.
+        :return: a new Emg, or this Emg if *inplace* is True.
+        :rtype: :class:`Emg` object
         """
+        if inplace:
+            self.data.norm_by_track(self.header.tracks_names, dyn_cal=dyn_cal, inplace=True)
+            return self
         new_emg = Emg()
         new_header = self.header.copy()
         new_data = self.data.norm_by_track(self.header.tracks_names, dyn_cal=dyn_cal)
@@ -78,7 +352,7 @@ class Emg:
         return new_emg
 
 
-    def norm(self):
+    def norm(self, inplace=False):
         """
         Compute a new Emg where tracks are normalized (all together) following the formula below
         .. math::
@@ -87,9 +361,13 @@ class Emg:
 
         where x=(x1,...,xn) and zi is now your matrix with normalized data.
 
-        :return: a new Emg
+        :param bool inplace: if True normalize this Emg without copying the data.
+        :return: a new Emg, or this Emg if *inplace* is True.
         :rtype: :class:`Emg` object
         """
+        if inplace:
+            self.data.norm(inplace=True)
+            return self
         new_emg = Emg()
         new_header = self.header.copy()
         new_data = self.data.norm()
@@ -98,6 +376,22 @@ class Emg:
         return new_emg
 
 
+    def moving(self, feature, window, chunksize=CHUNKSIZE):
+        """
+        Compute a feature of the tracks on a sliding window (see :meth:`EmgData.moving`).
+
+        :param str feature: The feature to compute: 'mean', 'rms' or 'envelope' (see :mod:`emg_analyzer.window`).
+        :param int window: The number of frames of the window.
+        :param int chunksize: the number of frames processed at once.
+        :return: a new Emg with the feature at each frame.
+        :rtype: :class:`Emg` object
+        """
+        new_emg = Emg()
+        new_emg.header = self.header.copy()
+        new_emg.data = self.data.moving(feature, window, chunksize=chunksize)
+        return new_emg
+
+
     def group_by_track(self, emg_list):
         merge = {}
         emg_list.insert(0, self)
@@ -123,8 +417,8 @@ class Emg:
 
     def describe(self):
         """
-
-        :return:
+        :return: basic statistics which describe each track (see :meth:`EmgData.describe`).
+        :rtype: :class:`pandas.dataFrame` object
         """
         return self.data.describe()
 
@@ -146,62 +440,91 @@ class Emg:
         return new_emg, thresholds
 
 
-    def to_emt(self, file=None):
+    def activation_summary(self, rest_matrix, coef=1.5, chunksize=CHUNKSIZE):
+        """
+        Count the values which would be selected by :meth:`select`, without building the selected data.
+
+        :param rest_matrix: The statistics of the tracks in rest condition (see :meth:`select`).
+        :type rest_matrix: :class:`pandas.DataFrame` object
+        :param float coef: the multiplying coefficient to apply to the standard deviation.
+        :param int chunksize: the number of frames compared at once.
+        :return: the threshold, the count of selected frames and the activation ratio of each track
+                 (see :func:`activation_summary`).
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        return self.data.activation_summary(rest_matrix, coef=coef, chunksize=chunksize)
+
+
+    def activation_sweep(self, rest_matrix, coefs, chunksize=CHUNKSIZE):
+        """
+        Count the values which would be selected by :meth:`select` for several coefficients in one pass.
+
+        :param rest_matrix: The statistics of the tracks in rest condition (see :meth:`select`).
+        :type rest_matrix: :class:`pandas.DataFrame` object
+        :param coefs: the multiplying coefficients to apply to the standard deviation.
+        :type coefs: list of float
+        :param int chunksize: the number of frames sorted at once.
+        :return: the summary of the activities for each coefficient (see :func:`activation_sweep`).
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        return self.data.activation_sweep(rest_matrix, coefs, chunksize=chunksize)
+
+
+    def detect_segments(self, rest_matrix, coef=1.5, off_coef=None, min_duration=1, max_gap=0,
+                        chunksize=CHUNKSIZE):
+        """
+        Detect the onset and offset of the segments of activity of each track (see :meth:`EmgData.detect_segments`).
+
+        :param rest_matrix: The statistics of the tracks in rest condition (see :meth:`select`).
+        :type rest_matrix: :class:`pandas.DataFrame` object
+        :param float coef: the multiplying coefficient of the standard deviation to start a segment.
+        :param float off_coef: the multiplying coefficient of the standard deviation to go on with a segment,
+                               None to use *coef*.
+        :param int min_duration: the minimum number of frames of a segment.
+        :param int max_gap: the maximum number of inactive frames between two segments to merge them.
+        :param int chunksize: the number of frames processed at once.
+        :return: the segments of each track.
+        :rtype: :class:`emg_analyzer.selection.Selection` object
+        """
+        return self.data.detect_segments(rest_matrix, coef=coef, off_coef=off_coef, min_duration=min_duration,
+                                         max_gap=max_gap, chunksize=chunksize)
+
+
+    def to_emt(self, file=None, engine='fast', jobs=1):
         """
         Write the emg in .emt file format
 
         :param file: Optional buffer to write to.
                      If None is provided the result is returned as a string.
         :type file: StringIO-like or file-like object.
+        :param str engine: The engine used to format the data 'fast' or 'pandas' (see :meth:`EmgData.to_tsv`).
+        :param int jobs: The number of processes used to format the data with the 'fast' engine.
         :returns: The emg formatted to *'.emt'* format
         :rtype: file-like object or string
         """
         buffer = file if file is not None else StringIO()
         self.header.to_tsv(file=buffer)
-        self.data.to_tsv(file=buffer)
+        self.data.to_tsv(file=buffer, engine=engine, jobs=jobs)
         if file is None:
             buffer = buffer.getvalue()
         return buffer
 
 
-    def to_plot(self, out_dir=None, y_scale_auto=False):
+    def to_plot(self, out_dir=None, y_scale_auto=False, jobs=1, decimation=True):
         """
-
-        :param out_dir:
-        :return:
+        Draw each track in a png file named *{name}_{track}.png* (see :mod:`emg_analyzer.plot`).
+
+        :param str out_dir: the directory where to write the figures, None for the current directory.
+        :param bool y_scale_auto: if False all figures have the same y scale, the min and max of all tracks.
+        :param int jobs: the number of processes used to render the figures.
+        :param bool decimation: True to draw only the min and max of the frames of each pixel column
+                                (see :func:`emg_analyzer.plot.decimate`).
+        :return: the paths of the figures
+        :rtype: list of str
         """
-        figs_path = []
-        ymin = self.data.min
-        ymax = self.data.max
-        for track in self.data.tracks:
-            fig_name = "{}_{}.{}".format(self.name, track, 'png')
-            transtab = str.maketrans('/ :', '___')
-            fig_name = fig_name.translate(transtab)
-            _log.info("Compute figure: " + fig_name)
-            with plt.style.context('dark_background'):
-                plt.close('all')
-                fig, ax = plt.subplots()
-                width, heigth = fig.get_size_inches()
-                fig.set_size_inches([width * 2, heigth])
-                x = self.data['Time']
-                y = self.data[track]
-                ax.plot(x, y,
-                        color='red',
-                        linewidth=1,
-                        label=self.name)
-                ax.set(xlabel='time (s)',
-                       ylabel='voltage ({})'.format(self.header.unit),
-                       title=track)
-                if not y_scale_auto:
-                    ax.set_ylim([ymin, ymax])
-
-                ax.grid(color='darkgrey', linestyle='--', linewidth=1)
-                plt.legend()
-                fig_path = os.path.join(out_dir, fig_name)
-                fig.savefig(fig_path)
-                figs_path.append(fig_path)
-            del fig
-        return figs_path
+        from emg_analyzer import plot
+        return plot.plot_tracks(self, out_dir=out_dir or '', y_scale_auto=y_scale_auto, jobs=jobs,
+                                decimation=decimation)
 
 
 class EmgHeader:
@@ -242,6 +565,41 @@ Start time:   \t{start_time:.3f}
         return True
 
 
+    def to_dict(self):
+        """
+        :return: the fields of this header.
+        :rtype: dict
+        """
+        fields = dict(self.__dict__)
+        fields['tracks_names'] = list(self.tracks_names)
+        return fields
+
+
+    @classmethod
+    def from_dict(cls, fields):
+        """
+        :param dict fields: the fields of the header as returned by :meth:`to_dict`.
+        :return: a new header
+        :rtype: a :class:`EmgHeader` object.
+        """
+        new_header = cls()
+        for attr, value in fields.items():
+            setattr(new_header, attr, value)
+        return new_header
+
+
+    def select_tracks(self, tracks):
+        """
+        Keep only some tracks in this header.
+
+        :param tracks: the names of the tracks to keep.
+        :type tracks: list of string
+        :raise KeyError: if a track is not in this header.
+        """
+        self.tracks_names = EmgData._select_tracks(self.tracks_names, tracks)
+        self.tracks_nb = len(self.tracks_names)
+
+
     def copy(self):
         """
         :return: a deep copy of the header
@@ -314,16 +672,98 @@ Start time:   \t{start_time:.3f}
         return buffer
 
 
+def _format_rows(index, columns):
+    """
+    Format a block of rows in the *.emt* format (the same format as :meth:`EmgData.to_tsv` with pandas).
+    The whole block is formatted by one string operation instead of cell by cell.
+
+    :param index: the frames of the rows
+    :type index: :class:`numpy.ndarray` object
+    :param columns: the values of each column
+    :type columns: list of :class:`numpy.ndarray` object
+    :return: the lines corresponding to the rows
+    :rtype: str
+    """
+    row_fmt = '%d' + '\t%.3f' * len(columns) + '\n'
+    cells = tuple(cell for row in zip(index.tolist(), *[col.tolist() for col in columns]) for cell in row)
+    # only the floats can be 'nan', the frames are integers
+    return (row_fmt * len(index) % cells).replace('nan', 'NaN')
+
+
 class EmgData:
     """
-    Class to handle the data of an *.emt* file
+    Class to handle the data of an *.emt* file.
+
+    The data are held by a :class:`pandas.DataFrame` object, or by memory-mapped numpy arrays
+    (see :meth:`from_arrays`). In this latter case the DataFrame is built only
+    when the attribute *data* is accessed, and the track accesses (:meth:`__getitem__`,
+    :meth:`get_frames`, :attr:`min`, :attr:`max`, :meth:`describe`) read directly the arrays,
+    so only the pages which are needed are loaded in memory.
     """
 
+    #: The number of rows formatted at once by :meth:`to_tsv`.
+    _write_rows = 10000
+
     def __init__(self):
         """
         Initialization of EmgData object.
         """
-        self.data = None
+        self._data = None
+        self._index = None
+        self._index_name = None
+        self._time = None
+        self._time_name = None
+        self._values = None
+        self._columns = None
+
+
+    @property
+    def data(self):
+        """
+        :return: the data
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        if self._data is None and self._values is not None:
+            # a view on the mapped arrays, the pages are loaded on demand
+            self._data = self._mapped_frame(slice(None))
+        return self._data
+
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        self._index = self._index_name = self._time = self._time_name = self._values = self._columns = None
+
+
+    def _mapped_frame(self, rows, tracks=None):
+        """
+        :param rows: the rows to get.
+        :type rows: slice
+        :param tracks: the tracks to get, None for all tracks.
+        :type tracks: List of string
+        :return: a DataFrame on the mapped arrays (without copy)
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        index = pd.Index(self._index[rows], name=self._index_name)
+        if tracks is None:
+            columns = self._columns
+            values = self._values[rows]
+        else:
+            columns = self._select_tracks(self._columns, tracks)
+            values = self._values[rows, [self._columns.index(t) for t in columns]]
+        data = pd.DataFrame(values, index=index, columns=columns, copy=False)
+        if self._time is not None:
+            data.insert(0, self._time_name, self._time[rows])
+        return data
+
+
+    @property
+    def _mapped(self):
+        """
+        :return: True if the data must be read directly in the mapped arrays
+        :rtype: bool
+        """
+        return self._data is None and self._values is not None
 
     def __eq__(self, other):
         if other.data.shape != self.data.shape:
@@ -334,7 +774,7 @@ class EmgData:
             return False
 
 
-    def parse(self, emt_file, tracks):
+    def parse(self, emt_file, tracks, usetracks=None, dtype=None):
         """
         Parse emt_file to fill this object.
 
@@ -342,6 +782,12 @@ class EmgData:
         :type emt_file: file object
         :param tracks: The list of the tracks to parse.
         :type tracks: List of string
+        :param usetracks: The names of the tracks to load, None to load all *tracks*.
+                          The columns of the other tracks are neither parsed nor allocated.
+        :type usetracks: List of string
+        :param dtype: The type of the tracks values, None for float64 (the Time column is always float64).
+        :type dtype: :class:`numpy.dtype` object or string
+        :raise KeyError: if a track in *usetracks* is not in *tracks*.
         """
         columns = ['Frame', 'Time'] + tracks
         self.data = pd.read_table(emt_file,
@@ -350,21 +796,194 @@ class EmgData:
                                   header=None,
                                   skip_blank_lines=True,
                                   index_col=0,
-                                  usecols=list(range(len(columns)))
+                                  usecols=self._usecols(tracks, usetracks),
+                                  dtype=self._dtypes(tracks, usetracks, dtype)
                                   )
 
+
+    @staticmethod
+    def _select_tracks(tracks, usetracks):
+        """
+        :param tracks: The names of all tracks.
+        :type tracks: List of string
+        :param usetracks: The names of the tracks to select.
+        :type usetracks: List of string
+        :return: the selected tracks in the order of *tracks*.
+        :rtype: List of string
+        :raise KeyError: if a track in *usetracks* is not in *tracks*.
+        """
+        unknown = [t for t in usetracks if t not in tracks]
+        if unknown:
+            raise KeyError("track(s) '{}' not found in {}".format("', '".join(unknown), tracks))
+        return [t for t in tracks if t in usetracks]
+
+
+    @classmethod
+    def _usecols(cls, tracks, usetracks):
+        """
+        :param tracks: The names of all tracks.
+        :type tracks: List of string
+        :param usetracks: The names of the tracks to select, None to select all tracks.
+        :type usetracks: List of string
+        :return: the positions of the columns to parse (Frame and Time included).
+        :rtype: List of int
+        """
+        if usetracks is None:
+            return list(range(len(tracks) + 2))
+        selected = cls._select_tracks(tracks, usetracks)
+        return [0, 1] + [i + 2 for i, t in enumerate(tracks) if t in selected]
+
+
+    @classmethod
+    def _dtypes(cls, tracks, usetracks, dtype):
+        """
+        :param tracks: The names of all tracks.
+        :type tracks: List of string
+        :param usetracks: The names of the tracks to select, None to select all tracks.
+        :type usetracks: List of string
+        :param dtype: The type of the tracks values, None for the default type.
+        :type dtype: :class:`numpy.dtype` object or string
+        :return: the type of each track column to parse (see :func:`pandas.read_table`).
+        :rtype: dict or None
+        """
+        if dtype is None:
+            return None
+        selected = tracks if usetracks is None else cls._select_tracks(tracks, usetracks)
+        return {t: dtype for t in selected}
+
+
+    @classmethod
+    def iter_chunks(cls, emt_file, tracks, chunksize=CHUNKSIZE, frames=None, usetracks=None, dtype=None):
+        """
+        Parse emt_file chunk by chunk.
+
+        :param emt_file: the file to parse, the header must have been already read.
+        :type emt_file: file object
+        :param tracks: The list of the tracks to parse.
+        :type tracks: List of string
+        :param int chunksize: the number of frames by chunk.
+        :param int frames: the number of frames announced in the header.
+                           If provided, the number of frames read is checked as the chunks arrive.
+        :param usetracks: The names of the tracks to load, None to load all *tracks*.
+        :type usetracks: List of string
+        :param dtype: The type of the tracks values, None for float64.
+        :type dtype: :class:`numpy.dtype` object or string
+        :return: an iterator on the chunks of data
+        :rtype: iterator on :class:`EmgData` objects
+        :raise RuntimeError: if the number of frames read does not match *frames*.
+        """
+        columns = ['Frame', 'Time'] + tracks
+        reader = pd.read_table(emt_file,
+                               sep='\t',
+                               names=columns,
+                               header=None,
+                               skip_blank_lines=True,
+                               index_col=0,
+                               usecols=cls._usecols(tracks, usetracks),
+                               dtype=cls._dtypes(tracks, usetracks, dtype),
+                               chunksize=chunksize
+                               )
+        read = 0
+        try:
+            for chunk in reader:
+                read += len(chunk)
+                if frames is not None and read > frames:
+                    raise RuntimeError("The number of Frames in header '{}' "
+                                       "does not match data frames (at least '{}').".format(frames, read))
+                yield cls._new_data(chunk)
+        finally:
+            reader.close()
+        if frames is not None and read != frames:
+            raise RuntimeError("The number of Frames in header '{}' "
+                               "does not match data frames '{}'.".format(frames, read))
+
+
+    def iter_frames(self, chunksize=CHUNKSIZE, tracks=None):
+        """
+        :param int chunksize: the number of frames by chunk.
+        :param tracks: The names of the tracks to keep, None to keep all tracks.
+        :type tracks: List of string
+        :return: an iterator on the data of this object, chunk by chunk.
+        :rtype: iterator on :class:`EmgData` objects
+        """
+        if self._mapped:
+            for first in range(0, len(self._index), chunksize):
+                yield self._new_data(self._mapped_frame(slice(first, first + chunksize), tracks=tracks))
+        else:
+            data = self.data
+            if tracks is not None:
+                data = data[data.columns[:1].tolist() + self._select_tracks(list(data.columns[1:]), tracks)]
+            for first in range(0, len(data), chunksize):
+                yield self._new_data(data.iloc[first:first + chunksize])
+
+
+    def to_arrays(self):
+        """
+        :return: The description of the columns and the numpy arrays holding the data:
+                 *index* the frames, *time* the Time column (if any) and *values* the tracks.
+                 The values are stored in Fortran order so each track is contiguous.
+        :rtype: tuple (dict, {'name': :class:`numpy.ndarray` object})
+        """
+        if self._mapped:
+            meta = {'columns': list(self._columns),
+                    'time': self._time_name,
+                    'index_name': self._index_name}
+            arrays = {'index': self._index,
+                      'values': self._values}
+            if self._time is not None:
+                arrays['time'] = self._time
+        else:
+            columns = list(self.data.columns)
+            time_name = columns[0] if columns[0].upper() == 'TIME' else None
+            if time_name is not None:
+                columns = columns[1:]
+            meta = {'columns': columns,
+                    'time': time_name,
+                    'index_name': self.data.index.name}
+            arrays = {'index': self.data.index.to_numpy(),
+                      'values': np.asfortranarray(self.data[columns].to_numpy())}
+            if time_name is not None:
+                arrays['time'] = self.data[time_name].to_numpy()
+        return meta, arrays
+
+
+    @classmethod
+    def from_arrays(cls, meta, arrays, lazy=False):
+        """
+        :param dict meta: The description of the columns as returned by :meth:`to_arrays`.
+        :param dict arrays: The arrays as returned by :meth:`to_arrays`.
+        :param bool lazy: if True, keep the arrays as is and build the DataFrame on the first access.
+                          Should be used with memory-mapped arrays (:class:`numpy.memmap`).
+        :return: new EmgData
+        :rtype: :class:`EmgData` object
+        """
+        new_data = cls()
+        new_data._index = arrays['index']
+        new_data._index_name = meta['index_name']
+        new_data._time = arrays.get('time')
+        new_data._time_name = meta['time']
+        new_data._values = arrays['values']
+        new_data._columns = list(meta['columns'])
+        if not lazy:
+            new_data._data = new_data._mapped_frame(slice(None))
+        return new_data
+
+
     @property
     def tracks(self):
         """
         :return: The list of the tracks in this EMG.
         :rtype: List of string
         """
-        if self.data.columns[0].upper() == "TIME":
-            return list(self.data.columns)[1:]
+        if self._mapped:
+            return list(self._columns)
+        columns = self.data.columns
+        if columns[0].upper() == "TIME":
+            return list(columns)[1:]
         else:
             # this is probably the results of a concatanation
             # time was removed because it has no sense
-            return list(self.data.columns)
+            return list(columns)
 
     @property
     def frames(self):
@@ -373,23 +992,40 @@ class EmgData:
         :return: The number of frames
         :rtype: int
         """
+        if self._mapped:
+            return len(self._index)
         return len(self.data)
 
 
     @property
     def max(self):
+        if self._mapped:
+            return np.nanmax(self._mapped_tracks())
         time, data = self._split_data()
         return data.max().max()
 
 
     @property
     def min(self):
+        if self._mapped:
+            return np.nanmin(self._mapped_tracks())
         time, data = self._split_data()
         return data.min().min()
 
     @property
     def start_time(self):
-        return self.data['Time'][0]
+        return self['Time'].iloc[0]
+
+
+    def _mapped_tracks(self):
+        """
+        :return: the mapped values of the tracks (without the Time column)
+        :rtype: :class:`numpy.ndarray` object
+        """
+        if self._time is not None:
+            return self._values
+        else:
+            raise RuntimeError("The first column is not Time: abort splitting")
 
 
     def _split_data(self):
@@ -425,6 +1061,16 @@ class EmgData:
         :return: return all frames corresponding to the track track_name
         :rtype: :class:`pandas.Serie` object
         """
+        if self._mapped:
+            if track_name == self._time_name:
+                values = self._time
+            else:
+                try:
+                    values = self._values[:, self._columns.index(track_name)]
+                except ValueError:
+                    raise KeyError(track_name) from None
+            index = pd.Index(self._index, name=self._index_name)
+            return pd.Series(values, index=index, name=track_name, copy=False)
         return self.data[track_name]
 
 
@@ -435,10 +1081,55 @@ class EmgData:
         :param int stop:
         :return: the frames between start ans stop included
         """
+        if self._mapped:
+            # the frames are sorted, so only the pages of the block are read
+            first = np.searchsorted(self._index, start, side='left')
+            last = np.searchsorted(self._index, stop, side='right')
+            return self._mapped_frame(slice(first, last))
         return self.data.loc[start:stop]
 
 
-    def norm_by_track(self, tracks_names, dyn_cal=None):
+    def _update_tracks(self, update):
+        """
+        Apply *update* on the values of each track (all columns but Time), in place.
+        The values are modified directly in the arrays holding the DataFrame;
+        the values of a track which cannot be modified in place (a read-only mapped array for instance)
+        are copied and put back in the DataFrame.
+
+        :param update: called with the name of each track and its values, must modify the values in place.
+        :type update: callable
+        """
+        time, data = self._split_data()
+        for col in data.columns:
+            values = self.data[col].to_numpy()
+            copied = not values.flags.writeable
+            if copied:
+                values = values.copy()
+            update(col, values)
+            if copied or not np.may_share_memory(self.data[col].to_numpy(), values):
+                self.data[col] = values
+
+
+    def _normed(self, inplace, update):
+        """
+        :param bool inplace: if True, normalize this data, otherwise a copy of this data.
+        :param update: the normalization to apply on each track (see :meth:`_update_tracks`).
+                       The values are rounded to 3 decimals afterwards, as in the *.emt* files.
+        :type update: callable
+        :return: the normalized data.
+        :rtype: :class:`EmgData` object
+        """
+        normed = self if inplace else self._new_data(self.data.copy())
+
+        def update_round(col, values):
+            update(col, values)
+            np.round(values, decimals=3, out=values)
+
+        normed._update_tracks(update_round)
+        return normed
+
+
+    def norm_by_track(self, tracks_names, dyn_cal=None, inplace=False):
         """
         Compute a new EmgData where each track is normalized
         independently following the formula below
@@ -458,28 +1149,37 @@ class EmgData:
                     max 10.1        12.3  ...
 
         :type dyn_cal: :class:`pandas.DataFrame` object
-        :return: a new EmgData
+        :param bool inplace: if True normalize this data without copy.
+        :return: a new EmgData, or this EmgData if *inplace* is True.
         :rtype: :class:`EmgData` object
+        :raise KeyError: if a track in *tracks_names* is not in this data or not in *dyn_cal*.
+                         The data are not modified.
         """
-        time, data = self._split_data()
-        for col in tracks_names:
-            track = data[col]
+        # check all tracks before modifying any value
+        tracks_names = set(self._select_tracks(self.tracks, tracks_names))
+        if dyn_cal is not None:
+            missing = [t for t in self.tracks if t in tracks_names and t not in dyn_cal.columns]
+            if missing:
+                raise KeyError("track(s) '{}' not found in dyn_cal".format("', '".join(missing)))
+
+        def update(col, track):
+            if col not in tracks_names:
+                return
             if dyn_cal is not None:
                 v_min = dyn_cal[col]['min']
                 v_max = dyn_cal[col]['max']
             else:
-                v_min = track.min()
-                v_max = track.max()
+                v_min = np.nanmin(track)
+                v_max = np.nanmax(track)
             _log.debug("vmin = " + str(v_min))
             _log.debug("vmax = " + str(v_max))
-            track -= v_min  # do it in place on data frame
-            track /= (v_max - v_min)
-        data = data.round(decimals=3)
-        data = pd.concat([time, data], axis=1)
-        return self._new_data(data)
+            np.subtract(track, v_min, out=track)
+            np.divide(track, v_max - v_min, out=track)
+
+        return self._normed(inplace, update)
 
 
-    def norm(self, v_min=None, v_max=None):
+    def norm(self, v_min=None, v_max=None, inplace=False):
         """
         Compute a new EmgData where tracks are normalized following the formula below
         .. math::
@@ -490,55 +1190,258 @@ class EmgData:
 
         :param float v_min: The min value to use to normalize, if None use the min of the matrix.
         :param float v_max: The max value to use to normalize, if None use the max of the matrix.
-        :return: a new EmgData
+        :param bool inplace: if True normalize this data without copy.
+        :return: a new EmgData, or this EmgData if *inplace* is True.
         :rtype: :class:`EmgData` object
         """
-        time, data = self._split_data()
         if v_min is None:
-            v_min = data.min().min()
+            v_min = self.min
         _log.debug("v_min = " + str(v_min))
-        data -= v_min
         if v_max is None:
-            v_max = data.max().max()
+            # the max of the shifted values, as the shift is monotonic it's the shifted max
+            v_max = self.max - v_min
         _log.debug("v_max = " + str(v_max))
-        data /= v_max
-        data = data.round(decimals=3)
-        data = pd.concat([time, data], axis=1)
-        return self._new_data(data)
+
+        def update(col, track):
+            np.subtract(track, v_min, out=track)
+            np.divide(track, v_max, out=track)
+
+        return self._normed(inplace, update)
+
+
+    def _track_values(self):
+        """
+        :return: the values of the tracks (without the Time column), without copy if possible.
+        :rtype: 2D :class:`numpy.ndarray` object
+        """
+        if self._mapped:
+            return self._values
+        if self.data.columns[0].upper() == 'TIME':
+            return self.data.iloc[:, 1:].to_numpy()
+        return self.data.to_numpy()
 
 
     def describe(self):
         """
-        :return: basic statistics which describe each columns except time.
+        :return: basic statistics which describe each columns except time
+                 (the same as :meth:`pandas.DataFrame.describe`, see :class:`emg_analyzer.stats.Statistics`).
         :rtype: :class:`pandas.dataFrame` object
         """
-        return self.data.iloc[:, 1:].describe()
+        return Statistics.from_data(self).describe()
 
 
     def select(self, rest_matrix, coef=1.5):
         """
+        Select the values greater than the rest values.
+        The threshold of each track is *mean + std * coef* of the track in the *rest_matrix*.
+        All the frames are kept, the values lower or equal to the threshold are replaced by NaN.
+
+        :param rest_matrix: The statistics of the tracks in rest condition (as computed by :meth:`describe`).
+        :type rest_matrix: :class:`pandas.DataFrame` object
+        :param float coef: the multiplying coefficient to apply to the standard deviation.
+        :return: a new EmgData with the selected values and the threshold of each track.
+        :rtype: tuple (:class:`EmgData` object, dict {'track': float})
+        """
+        tracks = self.tracks
+        thresholds = self._thresholds(rest_matrix, tracks, coef)
+        values = self._track_values()
+        # one comparison broadcast on all tracks, NaN are never selected
+        selected = np.where(values > thresholds, values, np.nan)
+        return self._new_tracks(selected), dict(zip(tracks, thresholds.tolist()))
 
-        :param float threshold:
-        :return:
+
+    def _new_tracks(self, values):
         """
-        # split cols
-        cols = self.data.columns
-        filtered_cols = []
-        thresholds = {}
-        for col in cols[1:]:
-            # The first col should be Time
-            c = self.data[col]
-            threshold = rest_matrix[col]['mean'] + (rest_matrix[col]['std'] * coef)
-            thresholds[col] = threshold
-            s = c[c > threshold]
-            filtered_cols.append(s)
-        new_cols = pd.concat(filtered_cols, axis=1)
-        sel_time = self.data['Time']
-        new_df = pd.concat([sel_time, new_cols], axis=1)
-        return self._new_data(new_df), thresholds
-
-
-    def to_tsv(self, file=None, header=False):
+        :param values: The new values of the tracks, one column by track.
+        :type values: 2D :class:`numpy.ndarray` object
+        :return: a new EmgData with the frames and the times of this data and *values* for the tracks.
+        :rtype: :class:`EmgData` object
+        """
+        time = self['Time']
+        new_df = pd.DataFrame(values, index=time.index, columns=self.tracks, copy=False)
+        new_df.insert(0, 'Time', time.to_numpy())
+        return self._new_data(new_df)
+
+
+    @staticmethod
+    def _thresholds(rest_matrix, tracks, coef):
+        """
+        :param rest_matrix: The statistics of the tracks in rest condition (see :meth:`select`).
+        :type rest_matrix: :class:`pandas.DataFrame` object
+        :param tracks: The names of the tracks.
+        :type tracks: list of string
+        :param float coef: the multiplying coefficient to apply to the standard deviation.
+        :return: the threshold of each track: *mean + std * coef*.
+        :rtype: :class:`numpy.ndarray` object
+        """
+        return (rest_matrix.loc['mean', tracks].to_numpy(dtype=np.float64) +
+                rest_matrix.loc['std', tracks].to_numpy(dtype=np.float64) * coef)
+
+
+    def _activation_count(self, thresholds, chunksize=CHUNKSIZE):
+        """
+        :param thresholds: The threshold of each track.
+        :type thresholds: :class:`numpy.ndarray` object
+        :param int chunksize: the number of frames compared at once, to bound the temporary memory.
+        :return: the number of values greater than the threshold for each track.
+        :rtype: :class:`numpy.ndarray` object
+        """
+        values = self._track_values()
+        count = np.zeros(len(thresholds), dtype=np.int64)
+        for first in range(0, len(values), chunksize):
+            # NaN are never greater than the threshold
+            count += np.count_nonzero(values[first:first + chunksize] > thresholds, axis=0)
+        return count
+
+
+    def activation_summary(self, rest_matrix, coef=1.5, chunksize=CHUNKSIZE):
+        """
+        Count the values which would be selected by :meth:`select`, without building the selected data.
+
+        :param rest_matrix: The statistics of the tracks in rest condition (see :meth:`select`).
+        :type rest_matrix: :class:`pandas.DataFrame` object
+        :param float coef: the multiplying coefficient to apply to the standard deviation.
+        :param int chunksize: the number of frames compared at once.
+        :return: the threshold, the count of selected frames and the activation ratio of each track
+                 (see :func:`activation_summary`).
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        tracks = self.tracks
+        thresholds = self._thresholds(rest_matrix, tracks, coef)
+        return activation_summary(tracks, thresholds, self._activation_count(thresholds, chunksize=chunksize),
+                                  self.frames)
+
+
+    def _activation_counts(self, thresholds, chunksize=CHUNKSIZE):
+        """
+        :param thresholds: Several thresholds for each track, one row by set of thresholds.
+        :type thresholds: 2D :class:`numpy.ndarray` object
+        :param int chunksize: the number of frames sorted at once.
+        :return: the number of values greater than each threshold, with the shape of *thresholds*.
+        :rtype: 2D :class:`numpy.ndarray` object
+        """
+        values = self._track_values()
+        counts = np.zeros(thresholds.shape, dtype=np.int64)
+        for first in range(0, len(values), chunksize):
+            # once sorted, the values greater than a threshold are after its insertion point
+            chunk = np.sort(values[first:first + chunksize], axis=0)
+            # the NaN are sorted at the end
+            valid = np.count_nonzero(~np.isnan(chunk), axis=0)
+            for i in range(chunk.shape[1]):
+                counts[:, i] += valid[i] - np.searchsorted(chunk[:valid[i], i], thresholds[:, i], side='right')
+        return counts
+
+
+    def activation_sweep(self, rest_matrix, coefs, chunksize=CHUNKSIZE):
+        """
+        Count the values which would be selected by :meth:`select` for several coefficients in one pass.
+        Each chunk of frames is sorted once, then the values greater than the thresholds of all coefficients
+        are counted by binary search.
+
+        :param rest_matrix: The statistics of the tracks in rest condition (see :meth:`select`).
+        :type rest_matrix: :class:`pandas.DataFrame` object
+        :param coefs: the multiplying coefficients to apply to the standard deviation.
+        :type coefs: list of float
+        :param int chunksize: the number of frames sorted at once.
+        :return: the summary of the activities for each coefficient (see :func:`activation_sweep`).
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        tracks = self.tracks
+        thresholds = np.array([self._thresholds(rest_matrix, tracks, coef) for coef in coefs]).reshape(-1, len(tracks))
+        return activation_sweep(tracks, coefs, thresholds, self._activation_counts(thresholds, chunksize=chunksize),
+                                self.frames)
+
+
+    def detect_segments(self, rest_matrix, coef=1.5, off_coef=None, min_duration=1, max_gap=0,
+                        chunksize=CHUNKSIZE):
+        """
+        Detect the onset and offset of the segments of activity of each track,
+        with hysteresis, gap merging and a minimum duration (see :mod:`emg_analyzer.segments`).
+        The thresholds are *mean + std * coef* of the track in the *rest_matrix* as in :meth:`select`.
+
+        :param rest_matrix: The statistics of the tracks in rest condition (see :meth:`select`).
+        :type rest_matrix: :class:`pandas.DataFrame` object
+        :param float coef: the multiplying coefficient of the standard deviation to start a segment.
+        :param float off_coef: the multiplying coefficient of the standard deviation to go on with a segment,
+                               None to use *coef*.
+        :param int min_duration: the minimum number of frames of a segment.
+        :param int max_gap: the maximum number of inactive frames between two segments to merge them.
+        :param int chunksize: the number of frames processed at once, to bound the temporary memory.
+        :return: the segments of each track.
+        :rtype: :class:`emg_analyzer.selection.Selection` object
+        :raise ValueError: if *off_coef* is greater than *coef* or *min_duration* or *max_gap* are not valid.
+        """
+        detector = self._segment_detector(rest_matrix, self.tracks, coef=coef, off_coef=off_coef,
+                                          min_duration=min_duration, max_gap=max_gap)
+        return self._detect(detector, chunksize=chunksize).finish()
+
+
+    @classmethod
+    def _segment_detector(cls, rest_matrix, tracks, coef=1.5, off_coef=None, min_duration=1, max_gap=0):
+        """
+        :return: a detector of the segments of activity of *tracks* (see :meth:`detect_segments`).
+        :rtype: :class:`emg_analyzer.segments.SegmentDetector` object
+        """
+        from emg_analyzer.segments import SegmentDetector
+        off_thresholds = None if off_coef is None else cls._thresholds(rest_matrix, tracks, off_coef)
+        return SegmentDetector(tracks, cls._thresholds(rest_matrix, tracks, coef),
+                               off_thresholds=off_thresholds,
+                               min_duration=min_duration,
+                               max_gap=max_gap)
+
+
+    def _detect(self, detector, chunksize=CHUNKSIZE):
+        """
+        :param detector: The detector to update with the frames of this data.
+        :type detector: :class:`emg_analyzer.segments.SegmentDetector` object
+        :param int chunksize: the number of frames processed at once.
+        :return: the detector
+        :rtype: :class:`emg_analyzer.segments.SegmentDetector` object
+        """
+        values = self._track_values()
+        time = self['Time']
+        frames = time.index.to_numpy()
+        times = time.to_numpy()
+        for first in range(0, len(values), chunksize):
+            detector.update(frames[first:first + chunksize], times[first:first + chunksize],
+                            values[first:first + chunksize])
+        return detector
+
+
+    def moving(self, feature, window, chunksize=CHUNKSIZE):
+        """
+        Compute a feature of the tracks on a sliding window of frames, in O(frames) whatever the window.
+        The value at a frame is computed on the *window* last frames (see :mod:`emg_analyzer.window`)
+        and rounded to 3 decimals as in the *.emt* files.
+
+        :param str feature: The feature to compute: 'mean', 'rms' or 'envelope'.
+        :param int window: The number of frames of the window.
+        :param int chunksize: the number of frames processed at once, to bound the temporary memory.
+        :return: a new EmgData with the feature at each frame.
+        :rtype: :class:`EmgData` object
+        :raise ValueError: if the feature is unknown or the window is not a positive number of frames.
+        """
+        from emg_analyzer.window import MovingWindow
+        return self._moved(MovingWindow(feature, window), chunksize=chunksize)
+
+
+    def _moved(self, moving, chunksize=CHUNKSIZE):
+        """
+        :param moving: The sliding window, it keeps the last frames of this data for the next chunk.
+        :type moving: :class:`emg_analyzer.window.MovingWindow` object
+        :param int chunksize: the number of frames processed at once.
+        :return: a new EmgData with the feature at each frame.
+        :rtype: :class:`EmgData` object
+        """
+        values = self._track_values()
+        result = np.empty(values.shape)
+        for first in range(0, len(values), chunksize):
+            result[first:first + chunksize] = moving.update(values[first:first + chunksize])
+        np.round(result, decimals=3, out=result)
+        return self._new_tracks(result)
+
+
+    def to_tsv(self, file=None, header=False, engine='fast', jobs=1):
         """
         Write this data in tsv according the *.emt* file format
 
@@ -550,20 +1453,58 @@ class EmgData:
                        If a list of strings is given it is assumed
                        to be aliases for the column names.
         :type header: boolean
+        :param str engine: 'fast' to format whole blocks of rows at once,
+                           or 'pandas' to use :meth:`pandas.DataFrame.to_csv`.
+                           Both produce the same output, the 'fast' engine is used only
+                           for data with an integer index and float columns and without header,
+                           otherwise the 'pandas' engine is used.
+        :param int jobs: The number of processes used to format the blocks of rows with the 'fast' engine.
+                         The blocks are written in order.
         :returns: The header formatted into *'.emt'* format
         :rtype: file-like object or string
         """
+        if engine not in ('fast', 'pandas'):
+            raise ValueError("engine must be 'fast' or 'pandas': got '{}'".format(engine))
         buffer = file if file is not None else StringIO()
-        self.data.to_csv(path_or_buf=buffer,
-                         header=header,
-                         sep='\t',
-                         float_format='%.3f',
-                         na_rep='NaN')
+        data = self.data
+        if engine == 'fast' and header is False and self._fast_writable(data):
+            index = data.index.to_numpy()
+            columns = [data[col].to_numpy() for col in data.columns]
+            starts = range(0, len(index), self._write_rows)
+            blocks = ((index[i:i + self._write_rows], [col[i:i + self._write_rows] for col in columns])
+                      for i in starts)
+            if jobs > 1 and len(starts) > 1:
+                import concurrent.futures
+                with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+                    # map yields the results in the order of the blocks
+                    for text in executor.map(_format_rows, *zip(*blocks)):
+                        buffer.write(text)
+            else:
+                for block_index, block_columns in blocks:
+                    buffer.write(_format_rows(block_index, block_columns))
+        else:
+            data.to_csv(path_or_buf=buffer,
+                        header=header,
+                        sep='\t',
+                        float_format='%.3f',
+                        na_rep='NaN')
         if file is None:
             buffer = buffer.getvalue()
         return buffer
 
 
+    @staticmethod
+    def _fast_writable(data):
+        """
+        :param data: the data to write
+        :type data: :class:`pandas.DataFrame` object
+        :return: True if the data can be written with the 'fast' engine.
+        :rtype: bool
+        """
+        return (pd.api.types.is_integer_dtype(data.index.dtype) and
+                all(pd.api.types.is_float_dtype(dtype) for dtype in data.dtypes))
+
+
     @staticmethod
     def group_track(track, emg_2_group):
         """
@@ -591,11 +1532,11 @@ class EmgData:
         :rtype: :class:`EmgData` object
         """
         one_emg = next(iter(emg_2_group.values()))
-        data = one_emg.data['Time']
+        data = one_emg['Time']
         series = []
         for name, emg in emg_2_group.items():
             # s is a pandas.Serie
-            s = emg.data[track]
+            s = emg[track]
             s.name = name
             series.append(s)
         series.insert(0, data)
@@ -603,6 +1544,114 @@ class EmgData:
         return EmgData._new_data(data)
 
 
+class EMGConcat:
+    """
+    The frames of several recordings put end to end, for instance several trials of the same condition.
+    The tracks are matched by name, a track missing from a recording has no value (NaN) for its frames.
+    """
+
+    def __init__(self, *emgs):
+        """
+        :param emgs: The recordings to concatenate, in order.
+        :type emgs: :class:`Emg` objects
+        """
+        self.emgs = list(emgs)
+
+
+    @property
+    def emg_names(self):
+        """
+        :return: the names of the concatenated recordings.
+        :rtype: list of string
+        """
+        return [emg.name for emg in self.emgs]
+
+
+    @property
+    def data(self):
+        """
+        :return: the frames of all recordings, indexed by Experiment (the name of the recording) and Frame.
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        return pd.concat([emg.data.data for emg in self.emgs],
+                         keys=self.emg_names,
+                         names=['Experiment', 'Frame'],
+                         sort=False)
+
+
+    def to_tsv(self, file=None):
+        """
+        Write the concatenated frames in tsv, with the names of the columns.
+
+        :param file: Optional buffer to write to.
+                     If None is provided the result is returned as a string.
+        :type file: StringIO-like or file-like object.
+        :rtype: file-like object or string
+        """
+        buffer = file if file is not None else StringIO()
+        self.data.to_csv(path_or_buf=buffer,
+                         sep='\t',
+                         float_format='%.3f',
+                         na_rep='NaN')
+        if file is None:
+            buffer = buffer.getvalue()
+        return buffer
+
+
+    def describe(self):
+        """
+        :return: basic statistics which describe each track on the frames of all recordings
+                 (see :meth:`EmgData.describe`), the frames are not concatenated in memory.
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        stats = Statistics()
+        for emg in self.emgs:
+            stats.merge(Statistics.from_data(emg.data))
+        return stats.describe()
+
+
+def activation_summary(tracks, thresholds, count, frames):
+    """
+    :param tracks: The names of the tracks.
+    :type tracks: list of string
+    :param thresholds: The threshold of each track.
+    :type thresholds: list of float
+    :param count: The number of selected frames of each track.
+    :type count: list of int
+    :param int frames: The number of frames.
+    :return: the summary of the activities, one row by track sorted by name,
+             with the columns *threshold*, *count* and *activation_ratio*
+             as in the *_sel.summary* files (without rounding).
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    count = np.asarray(count, dtype=np.int64)
+    summary = pd.DataFrame({'threshold': np.asarray(thresholds, dtype=np.float64),
+                            'count': count,
+                            'activation_ratio': count / frames},
+                           index=pd.Index(tracks, name='muscle'),
+                           columns=['threshold', 'count', 'activation_ratio'])
+    return summary.sort_index()
+
+
+def activation_sweep(tracks, coefs, thresholds, counts, frames):
+    """
+    :param tracks: The names of the tracks.
+    :type tracks: list of string
+    :param coefs: The multiplying coefficients applied to the standard deviation.
+    :type coefs: list of float
+    :param thresholds: The threshold of each track for each coefficient, one row by coefficient.
+    :type thresholds: 2D :class:`numpy.ndarray` object
+    :param counts: The number of selected frames of each track for each coefficient, one row by coefficient.
+    :type counts: 2D :class:`numpy.ndarray` object
+    :param int frames: The number of frames.
+    :return: the summary of the activities (see :func:`activation_summary`) for each coefficient,
+             indexed by coefficient and muscle.
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    return pd.concat([activation_summary(tracks, thresholds[i], counts[i], frames) for i in range(len(coefs))],
+                     keys=list(coefs), names=['coef'])
+
+
 def desc_summary(sel_summary, index_names=('Experiment', 'Muscle')):
     """
 
@@ -0,0 +1,197 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Index of the byte offsets of the frame lines of an *.emt* file.
+
+The offset of one frame line every *step* frames is recorded, so a range of frames
+can be read by seeking directly to the first line needed.
+The index is stored in the cache (see :mod:`emg_analyzer.cache`) when it is enabled,
+and kept in memory for the life of the process whether the cache is enabled or not,
+so the file is scanned once even if several blocks are read.
+It is rebuilt when the *.emt* file changes.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import colorlog
+
+_log = colorlog.getLogger('emg_analyzer.frame_index')
+
+from emg_analyzer import cache as _cache
+
+#: The default number of frames between two indexed lines.
+STEP = 1000
+
+#: The number of indexes kept in memory by :meth:`FrameIndex.load`.
+MEMO_SIZE = 64
+
+
+class FrameIndex:
+    """
+    Handle the byte offsets of the frame lines of an *.emt* file.
+    """
+
+    _read_size = 2 ** 24
+
+    # the indexes loaded by this process {(real path, step): (signature, index)}, the least recently used first
+    _memo = OrderedDict()
+    _memo_lock = threading.Lock()
+
+    def __init__(self, frames, offsets, data_offset, end, step=STEP):
+        """
+        :param frames: the frame numbers of the indexed lines.
+        :type frames: :class:`numpy.ndarray` object
+        :param offsets: the byte offsets of the indexed lines.
+        :type offsets: :class:`numpy.ndarray` object
+        :param int data_offset: the offset of the first frame line.
+        :param int end: the size of the file.
+        :param int step: the number of frames between two indexed lines.
+        """
+        self.frames = frames
+        self.offsets = offsets
+        self.data_offset = data_offset
+        self.end = end
+        self.step = step
+
+
+    @classmethod
+    def build(cls, path, step=STEP):
+        """
+        Scan an *.emt* file to build its index.
+
+        :param str path: the path of the *.emt* file.
+        :param int step: the number of frames between two indexed lines.
+        :return: the index of the file
+        :rtype: :class:`FrameIndex` object
+        """
+        _log.debug("build frame index of '{}'".format(path))
+        with open(path, 'rb') as emt_file:
+            for line in emt_file:
+                if line.startswith(b' Frame\t'):
+                    break
+            else:
+                raise RuntimeError("'{}' is not an emt file: no frame line found".format(path))
+            data_offset = emt_file.tell()
+            # find the start of all lines with numpy, keep one line every step
+            sampled = [np.array([data_offset], dtype=np.int64)]
+            lines_nb = 1
+            pos = data_offset
+            while True:
+                buffer = emt_file.read(cls._read_size)
+                if not buffer:
+                    break
+                starts = np.flatnonzero(np.frombuffer(buffer, dtype=np.uint8) == ord('\n')) + pos + 1
+                first = (-lines_nb) % step
+                sampled.append(starts[first::step])
+                lines_nb += len(starts)
+                pos += len(buffer)
+            end = pos
+            offsets = np.concatenate(sampled)
+            offsets = offsets[offsets < end]
+            # read the frame number of the sampled lines
+            frames = []
+            kept = []
+            for offset in offsets:
+                emt_file.seek(offset)
+                field = emt_file.read(32).split(b'\t', 1)[0]
+                try:
+                    frames.append(int(field))
+                except ValueError:
+                    # blank line
+                    continue
+                kept.append(offset)
+        return cls(np.array(frames, dtype=np.int64), np.array(kept, dtype=np.int64), data_offset, end, step=step)
+
+
+    @classmethod
+    def load(cls, path, cache=None, step=STEP):
+        """
+        :param str path: the path of the *.emt* file.
+        :param cache: The cache to use, None to use the default cache, False to not use any cache.
+        :type cache: :class:`emg_analyzer.cache.EmtCache` object
+        :param int step: the number of frames between two indexed lines, if the index must be built.
+        :return: the index of the file, from the memory or the cache if available,
+                 otherwise built (and stored in the cache).
+        :rtype: :class:`FrameIndex` object
+        """
+        # before reading the file, so a modification during the scan is detected
+        signature = _cache.file_signature(path)
+        key = (signature['path'], step)
+        with cls._memo_lock:
+            memo = cls._memo.get(key)
+            if memo is not None and memo[0] == signature:
+                cls._memo.move_to_end(key)
+                return memo[1]
+        index = cls._load(path, signature, cache, step)
+        with cls._memo_lock:
+            cls._memo[key] = (signature, index)
+            cls._memo.move_to_end(key)
+            while len(cls._memo) > MEMO_SIZE:
+                cls._memo.popitem(last=False)
+        return index
+
+
+    @classmethod
+    def _load(cls, path, signature, cache, step):
+        """
+        :param str path: the path of the *.emt* file.
+        :param dict signature: the signature of the file (see :func:`emg_analyzer.cache.file_signature`).
+        :param cache: The cache to use, None to use the default cache, False to not use any cache.
+        :type cache: :class:`emg_analyzer.cache.EmtCache` object
+        :param int step: the number of frames between two indexed lines, if the index must be built.
+        :return: the index of the file, from the cache if available or built (and stored in the cache).
+        :rtype: :class:`FrameIndex` object
+        """
+        emt_cache = None
+        if cache is not False:
+            emt_cache = _cache.get_cache() if cache is None else cache
+            if not emt_cache.enabled:
+                emt_cache = None
+        if emt_cache is not None:
+            meta = emt_cache.lookup(path, kind='frame_index')
+            if meta is not None:
+                return cls(emt_cache.load(path, 'frames', kind='frame_index'),
+                           emt_cache.load(path, 'offsets', kind='frame_index'),
+                           meta['data_offset'], meta['end'], step=meta['step'])
+        index = cls.build(path, step=step)
+        if emt_cache is not None:
+            emt_cache.store(path,
+                            {'data_offset': index.data_offset, 'end': index.end, 'step': index.step},
+                            {'frames': index.frames, 'offsets': index.offsets},
+                            kind='frame_index',
+                            signature=signature)
+        return index
+
+
+    def byte_range(self, start, stop):
+        """
+        :param int start: the first frame needed.
+        :param int stop: the last frame needed.
+        :return: the offsets of a block of lines containing the frames from *start* to *stop* (included).
+        :rtype: tuple (int, int)
+        """
+        i = np.searchsorted(self.frames, start, side='right') - 1
+        begin = int(self.offsets[i]) if i >= 0 else self.data_offset
+        j = np.searchsorted(self.frames, stop, side='right')
+        end = int(self.offsets[j]) if j < len(self.offsets) else self.end
+        return begin, end
+
+
+    def read(self, path, start, stop):
+        """
+        :param str path: the path of the *.emt* file.
+        :param int start: the first frame needed.
+        :param int stop: the last frame needed.
+        :return: a block of lines containing the frames from *start* to *stop* (included).
+        :rtype: str
+        """
+        begin, end = self.byte_range(start, stop)
+        with open(path, 'rb') as emt_file:
+            emt_file.seek(begin)
+            return emt_file.read(end - begin).decode()
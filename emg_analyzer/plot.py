@@ -0,0 +1,165 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Rendering of the figures of the tracks.
+
+The figures are drawn with the object-oriented API of matplotlib
+(:class:`matplotlib.figure.Figure` and the Agg canvas) instead of :mod:`matplotlib.pyplot`,
+so they do not depend on a global state and can be rendered in parallel by several processes.
+Each process gets only the arrays of the track it draws.
+
+The long tracks are decimated before being drawn (see :func:`decimate`):
+only the min and the max of the frames falling in each pixel column are kept,
+so the number of points drawn depends on the width of the figure, not on the length of the track,
+and the peaks are exactly the same.
+"""
+
+import os
+
+import numpy as np
+import matplotlib.style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import colorlog
+
+_log = colorlog.getLogger('emg_analyzer.plot')
+
+
+def fig_name(emg_name, track):
+    """
+    :param str emg_name: the name of the emg.
+    :param str track: the name of the track.
+    :return: the name of the file of the figure of the track.
+    :rtype: str
+    """
+    name = "{}_{}.{}".format(emg_name, track, 'png')
+    transtab = str.maketrans('/ :', '___')
+    return name.translate(transtab)
+
+
+def decimate(x, y, buckets):
+    """
+    Keep the min and max of *y* in each of *buckets* consecutive groups of frames, in the order of the frames.
+    The line drawn with the points kept covers the same pixels as the line drawn with all the points
+    as long as there are at least *buckets* pixels along the x axis.
+
+    :param x: the x coordinates (the times of the frames).
+    :type x: :class:`numpy.ndarray` object
+    :param y: the y coordinates (the values of the track).
+    :type y: :class:`numpy.ndarray` object
+    :param int buckets: the number of groups of frames, usually the width of the figure in pixels.
+                        The points are not decimated if *buckets* is lower than 1.
+    :return: the x and y coordinates of the points to draw (at most 2 by bucket plus the last frames).
+    :rtype: tuple of 2 :class:`numpy.ndarray` object
+    """
+    if buckets < 1 or len(y) <= 2 * buckets:
+        return x, y
+    size = len(y) // buckets
+    body = len(y) - len(y) % size
+    groups = y[:body].reshape(-1, size)
+    # a NaN is neither a min nor a max, unless all the values of the group are NaN
+    nan = np.isnan(groups)
+    first = np.arange(0, body, size)
+    i_min = first + np.where(nan, np.inf, groups).argmin(axis=1)
+    i_max = first + np.where(nan, -np.inf, groups).argmax(axis=1)
+    kept = np.column_stack([np.minimum(i_min, i_max), np.maximum(i_min, i_max)]).ravel()
+    kept = np.concatenate([kept, np.arange(body, len(y))])
+    return x[kept], y[kept]
+
+
+def render_track(fig_path, x, y, label, title, unit, ylim=None, decimation=True):
+    """
+    Draw a track and save the figure in png.
+
+    :param str fig_path: the path of the file to write.
+    :param x: the times of the frames.
+    :type x: :class:`numpy.ndarray` object
+    :param y: the values of the track.
+    :type y: :class:`numpy.ndarray` object
+    :param str label: the label of the curve (the name of the emg).
+    :param str title: the title of the figure (the name of the track).
+    :param str unit: the unit of the values.
+    :param ylim: the min and max of the y axis, None to let matplotlib choose.
+    :type ylim: tuple of 2 float
+    :param bool decimation: True to draw only the min and max of each pixel column (see :func:`decimate`).
+    :return: the path of the figure
+    :rtype: str
+    """
+    with matplotlib.style.context('dark_background'):
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        width, heigth = fig.get_size_inches()
+        fig.set_size_inches([width * 2, heigth])
+        ax = fig.add_subplot(1, 1, 1)
+        if decimation:
+            x, y = decimate(x, y, int(fig.get_figwidth() * fig.dpi))
+        ax.plot(x, y,
+                color='red',
+                linewidth=1,
+                label=label)
+        ax.set(xlabel='time (s)',
+               ylabel='voltage ({})'.format(unit),
+               title=title)
+        if ylim is not None:
+            ax.set_ylim(ylim)
+        ax.grid(color='darkgrey', linestyle='--', linewidth=1)
+        ax.legend()
+        fig.savefig(fig_path)
+    return fig_path
+
+
+def submit_tracks(emg, out_dir='', y_scale_auto=False, executor=None, decimation=True):
+    """
+    Render the figure of each track of *emg* (see :func:`render_track`).
+
+    :param emg: the emg to draw.
+    :type emg: :class:`emg_analyzer.emg.Emg` object
+    :param str out_dir: the directory where to write the figures.
+    :param bool y_scale_auto: if False all figures have the same y scale, the min and max of the whole emg.
+    :param executor: the executor to render the figures, None to render them in this process.
+    :type executor: :class:`concurrent.futures.Executor` object
+    :param bool decimation: True to draw only the min and max of each pixel column (see :func:`decimate`).
+    :return: the futures of the paths of the figures, in the order of the tracks.
+    :rtype: list of :class:`concurrent.futures.Future` object
+    """
+    import concurrent.futures
+    ylim = None if y_scale_auto else (emg.data.min, emg.data.max)
+    x = emg.data['Time'].to_numpy()
+    futures = []
+    for track in emg.data.tracks:
+        fig_path = os.path.join(out_dir, fig_name(emg.name, track))
+        _log.info("Compute figure: " + os.path.basename(fig_path))
+        task = (fig_path, x, emg.data[track].to_numpy(), emg.name, track, emg.header.unit, ylim, decimation)
+        if executor is None:
+            future = concurrent.futures.Future()
+            future.set_result(render_track(*task))
+        else:
+            future = executor.submit(render_track, *task)
+        futures.append(future)
+    return futures
+
+
+def plot_tracks(emg, out_dir='', y_scale_auto=False, jobs=1, decimation=True):
+    """
+    Render the figure of each track of *emg*.
+
+    :param emg: the emg to draw.
+    :type emg: :class:`emg_analyzer.emg.Emg` object
+    :param str out_dir: the directory where to write the figures.
+    :param bool y_scale_auto: if False all figures have the same y scale, the min and max of the whole emg.
+    :param int jobs: the number of processes to use to render the figures.
+    :param bool decimation: True to draw only the min and max of each pixel column (see :func:`decimate`).
+    :return: the paths of the figures, in the order of the tracks.
+    :rtype: list of str
+    """
+    if jobs > 1:
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            return [f.result() for f in submit_tracks(emg, out_dir=out_dir, y_scale_auto=y_scale_auto,
+                                                      executor=executor, decimation=decimation)]
+    return [f.result() for f in submit_tracks(emg, out_dir=out_dir, y_scale_auto=y_scale_auto,
+                                              decimation=decimation)]
@@ -12,10 +12,6 @@ import os
 import sys
 import colorlog
 
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-
 import emg_analyzer
 from emg_analyzer import argparse_utils
 from emg_analyzer.utils import get_version_message
@@ -41,7 +37,7 @@ def main(args=None):
                         help='directory where to write results, if directory does not exists, it will be created')
     parser.add_argument('--version',
                         action=argparse_utils.VersionAction,
-                        version=get_version_message(),
+                        version=get_version_message,
                         help='Display version and exit.')
     parser.add_argument('--active',
                         required=True,
@@ -86,6 +82,9 @@ def main(args=None):
     else:
         args.out_dir = ''
 
+    import numpy as np
+    import pandas as pd
+    import matplotlib.pyplot as plt
     summaries = [pd.read_table( path, comment="#", index_col=0) for path in args.sum_path]
     act_ratio = [df.activation_ratio for df in summaries]
     ratio = pd.concat(act_ratio, axis=1)
@@ -12,13 +12,8 @@ import os
 import sys
 
 import colorlog
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import scipy.interpolate
 
 import emg_analyzer
-from emg_analyzer.block import parse_block_def
 from emg_analyzer import argparse_utils
 from emg_analyzer.utils import get_version_message
 
@@ -48,10 +43,17 @@ def main(args=None):
                         action='store_true',
                         help='create a average plot between the different trials.'
                              'the original data are interpolate to have the same data number between trials.')
+    parser.add_argument('--no-decimation',
+                        action='store_true',
+                        default=False,
+                        help="Draw all the points of the average plots. By default only the min and max "
+                             "of the points of each pixel column are drawn, the figures look the same "
+                             "but are drawn faster.")
     parser.add_argument('--version',
                         action=argparse_utils.VersionAction,
-                        version=get_version_message(),
+                        version=get_version_message,
                         help='Display version and exit.')
+    argparse_utils.add_cache_arguments(parser)
     parser.add_argument('-v', '--verbosity',
                         action='count',
                         default=0,
@@ -61,22 +63,30 @@ def main(args=None):
     args.verbosity = max(10, 30 - (10 * args.verbosity))
     emg_analyzer.logger_set_level(args.verbosity)
     _log = colorlog.getLogger('emg_analyzer')
+    argparse_utils.configure_cache(args)
 
+    from emg_analyzer.block import parse_block_def, RefCache
     with open(args.block_file) as blk_file:
-        trials = parse_block_def(blk_file, args.separator)
+        # several trials can refer to the same recording, parse it once
+        trials = parse_block_def(blk_file, args.separator, ref_cache=RefCache())
     exp_name = os.path.basename(args.block_file)
     exp_name = os.path.splitext(exp_name)[0]
     out_fig_dir_name = '{}_figs'.format(exp_name)
     os.mkdir(out_fig_dir_name)
-    if args.box_plot:
-        boxplot(trials, exp_name, out_fig_dir_name)
-    elif args.mean_plot:
-        average_plot(trials, exp_name, out_fig_dir_name)
-    else:
-        assert False, "Unknown action"
+    try:
+        if args.box_plot:
+            boxplot(trials, exp_name, out_fig_dir_name)
+        elif args.mean_plot:
+            average_plot(trials, exp_name, out_fig_dir_name, decimation=not args.no_decimation)
+        else:
+            assert False, "Unknown action"
+    finally:
+        for trial in trials:
+            trial.release()
 
 
 def boxplot(trials, try_name, out_dir_name):
+    import pandas as pd
     # a trial is BlockHandler
     for i, blocks in enumerate(zip(*trials), 1):
         # concatenate the blocks vertically
@@ -104,6 +114,7 @@ def boxplot_muscles(data, fig_path, title=''):
     :param str fig_path: the path of the figure
     :param str title: the figure title
     """
+    import matplotlib.pyplot as plt
     plt.close('all')
     fig, ax = plt.subplots()
     ax.boxplot(data.T, notch=0, sym='')
@@ -122,6 +133,7 @@ def boxplot_trials(data, fig_path, title=''):
     :param str fig_path: the path of the figure
     :param str title: the figure title
     """
+    import matplotlib.pyplot as plt
     plt.close('all')
     fig, ax = plt.subplots()
     trials = []
@@ -134,7 +146,10 @@ def boxplot_trials(data, fig_path, title=''):
     fig.savefig(fig_path)
 
 
-def average_plot(trials, exp_name, out_dir_name):
+def average_plot(trials, exp_name, out_dir_name, decimation=True):
+    import numpy as np
+    import pandas as pd
+    import scipy.interpolate
     all_muscles = {}
     block_size = []
     for i, blocks in enumerate(zip(*trials), 1):
@@ -167,14 +182,29 @@ def average_plot(trials, exp_name, out_dir_name):
         all_block_for_one_mucle = pd.concat(all_muscles[muscle], axis=0, ignore_index=True)
         fig_path = os.path.join(out_dir_name, "{}_muscle_{}_mean".format(exp_name, muscle, i))
         title = "events for exp {} and muscle {}".format(exp_name, muscle)
-        plot_data(all_block_for_one_mucle, block_size, title, fig_path)
+        plot_data(all_block_for_one_mucle, block_size, title, fig_path, decimation=decimation)
 
 
-def plot_data(data, block_size, title, fig_path):
+def plot_data(data, block_size, title, fig_path, decimation=True):
+    """
+    draw the trials and their mean, save figure in png file.
+
+    :param data: dataframe with trials and mean as columns
+    :type data: :class:`pandas.DataFrame` object
+    :param block_size: the number of rows of each block
+    :type block_size: list of int
+    :param str title: the figure title
+    :param str fig_path: the path of the figure
+    :param bool decimation: True to draw only the min and max of each pixel column
+                            (see :func:`emg_analyzer.plot.decimate`).
+    """
+    import matplotlib.pyplot as plt
+    from emg_analyzer.plot import decimate
     plt.close('all')
     colors = ['palegreen', 'skyblue', 'mediumpurple', 'gold']
     fig, ax = plt.subplots()
     fig.set_size_inches(12, 6)
+    buckets = int(fig.get_figwidth() * fig.dpi) if decimation else 0
     for i, col in enumerate(data.columns):
         if col == 'mean':
             color = 'red'
@@ -182,7 +212,7 @@ def plot_data(data, block_size, title, fig_path):
         else:
             color = colors[i % len(colors)]
             label = 'trial_{}'.format(i)
-        ax.plot(data[col], color=color, label=label)
+        ax.plot(*decimate(data.index.to_numpy(), data[col].to_numpy(), buckets), color=color, label=label)
     ax.legend()
     ax.set_title(title)
     x = 0
@@ -32,8 +32,9 @@ def main(args=None):
                         help="The path to '.emt' file or a directory containing '.emt' files.")
     parser.add_argument('--version',
                         action=argparse_utils.VersionAction,
-                        version=get_version_message(),
+                        version=get_version_message,
                         help='Display version and exit.')
+    argparse_utils.add_cache_arguments(parser)
     parser.add_argument('-v', '--verbosity',
                         action='count',
                         default=0,
@@ -43,6 +44,7 @@ def main(args=None):
     args.verbosity = max(10, 30 - (10 * args.verbosity))
     emg_analyzer.logger_set_level(args.verbosity)
     _log = colorlog.getLogger('emg_analyzer')
+    argparse_utils.configure_cache(args)
 
     if not isinstance(args.emg_path, list):
         # args must be read from stdin
@@ -65,25 +67,30 @@ def main(args=None):
         path = os.path.realpath(path)
         if os.path.isdir(path):
             for root, dirs, files in os.walk(path):
-                emt_files = [f for f in files if os.path.splitext(f)[1] == '.emt']
+                emt_files = [os.path.join(root, f) for f in sorted(files) if os.path.splitext(f)[1] == '.emt']
                 emt_to_concat += emt_files
         elif os.path.isfile(path):
             emt_to_concat.append(path)
+    if not emt_to_concat:
+        msg = "no '.emt' file to concatenate"
+        _log.error(msg)
+        sys.exit(msg)
 
+    from emg_analyzer.emg import Emg, EMGConcat
     emg_to_concat = []
     for emt in emt_to_concat:
         with open(emt) as f:
-            emg = emg_analyzer.emg.Emg()
+            emg = Emg()
             emg.parse(f)
             emg_to_concat.append(emg)
 
-    concat = emg_analyzer.emg.EMGConcat(*emg_to_concat)
+    concat = EMGConcat(*emg_to_concat)
     concat_name = '_'.join(concat.emg_names)
     with open(concat_name + '.concat', 'w') as f:
         concat.to_tsv(file=f)
 
     df = concat.describe()
-    with open(concat_name + '.describe') as f:
+    with open(concat_name + '.describe', 'w') as f:
         df.to_csv(path_or_buf=f,
                   sep='\t',
                   float_format='%.3f',
@@ -10,6 +10,8 @@
 import argparse
 import os
 import sys
+import functools
+import concurrent.futures
 import colorlog
 import emg_analyzer
 from emg_analyzer import argparse_utils
@@ -32,10 +34,21 @@ By default write results in file (one by inputfile) with same name as input with
                         nargs='*',
                         default=sys.stdin,
                         help="The path to '.emt' file or a directory containing '.emt' files.")
+    parser.add_argument('--pooled',
+                        help="Write also the statistics of all files pooled together in this file.")
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        default=1,
+                        help="The number of processes to use to describe the files (default 1).")
+    parser.add_argument('--chunksize',
+                        type=int,
+                        help="The files are read chunk by chunk of CHUNKSIZE frames, "
+                             "so the memory used does not depend on the size of the files.")
     parser.add_argument('--version',
                         action=argparse_utils.VersionAction,
-                        version=get_version_message(),
+                        version=get_version_message,
                         help='Display version and exit.')
+    argparse_utils.add_cache_arguments(parser)
     parser.add_argument('-v', '--verbosity',
                         action='count',
                         default=0,
@@ -45,6 +58,7 @@ By default write results in file (one by inputfile) with same name as input with
     args.verbosity = max(10, 30 - (10 * args.verbosity))
     emg_analyzer.logger_set_level(args.verbosity)
     _log = colorlog.getLogger('emg_analyzer')
+    argparse_utils.configure_cache(args)
 
     if not isinstance(args.emg_path, list):
         # args must be read from stdin
@@ -67,28 +81,51 @@ By default write results in file (one by inputfile) with same name as input with
         path = os.path.realpath(path)
         if os.path.isdir(path):
             for root, dirs, files in os.walk(path):
-                emt_files = [f for f in files if os.path.splitext(f)[1] == '.emt']
+                emt_files = [os.path.join(root, f) for f in sorted(files) if os.path.splitext(f)[1] == '.emt']
                 emt_to_describe += emt_files
         elif os.path.isfile(path):
             emt_to_describe.append(path)
 
-    emg_to_describe = []
-    for emt in emt_to_describe:
-        with open(emt) as f:
-            emg = emg_analyzer.emg.Emg()
-            emg.parse(f)
-            emg_to_describe.append(emg)
-
-    for emg, path in zip(emg_to_describe, emt_to_describe):
-        desc = emg.describe()
-        dest_path = os.path.splitext(path)[0] + '.desc'
-        _log.info('Write file ' + dest_path)
-        with open(dest_path, 'w') as f:
-            desc.to_csv(path_or_buf=f,
-                        sep='\t',
-                        float_format='%.3f',
-                        na_rep='NaN')
+    from emg_analyzer import stream
+    from emg_analyzer.emg import CHUNKSIZE
+    from emg_analyzer.stats import Statistics
+    describe = functools.partial(stream.statistics, chunksize=args.chunksize or CHUNKSIZE)
+    if args.jobs > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs)
+        # map yields the statistics in the order of the files
+        all_stats = executor.map(describe, emt_to_describe)
+    else:
+        executor = None
+        all_stats = map(describe, emt_to_describe)
+
+    pooled = Statistics()
+    try:
+        for stats, path in zip(all_stats, emt_to_describe):
+            dest_path = os.path.splitext(path)[0] + '.desc'
+            write_desc(stats, dest_path)
+            _log.info('Write file ' + dest_path)
+            pooled.merge(stats)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if args.pooled:
+        write_desc(pooled, args.pooled)
+        _log.info('Write file ' + args.pooled)
+
+
+def write_desc(stats, dest_path):
+    """
+    Write the statistics in a *.desc* file.
 
+    :param stats: the statistics to write.
+    :type stats: :class:`emg_analyzer.stats.Statistics` object
+    :param str dest_path: the path of the file to write.
+    """
+    with open(dest_path, 'w') as f:
+        stats.describe().to_csv(path_or_buf=f,
+                                sep='\t',
+                                float_format='%.3f',
+                                na_rep='NaN')
 
 
 if __name__ == '__main__':
@@ -12,10 +12,7 @@ import os
 import sys
 import colorlog
 
-import pandas as pd
-
 import emg_analyzer
-from emg_analyzer import emg
 from emg_analyzer import argparse_utils
 from emg_analyzer.utils import get_version_message
 
@@ -35,8 +32,9 @@ def main(args=None):
                         help="The name of the results files without extensions")
     parser.add_argument('--version',
                         action=argparse_utils.VersionAction,
-                        version=get_version_message(),
+                        version=get_version_message,
                         help='Display version and exit.')
+    argparse_utils.add_cache_arguments(parser)
     parser.add_argument('-v', '--verbosity',
                         action='count',
                         default=0,
@@ -46,11 +44,16 @@ def main(args=None):
     args.verbosity = max(10, 30 - (10 * args.verbosity))
     emg_analyzer.logger_set_level(args.verbosity)
     _log = colorlog.getLogger('emg_analyzer')
+    argparse_utils.configure_cache(args)
 
     if not os.path.isdir(args.dc_path):
         raise RuntimeError("The argument must be a directory: {}".format(parser.print_help()))
 
+    import pandas as pd
+    from emg_analyzer import emg
+    from emg_analyzer.stats import Statistics
     dyn_cal = []
+    descriptions = []
     emt_files = [p for p in os.listdir(args.dc_path) if os.path.isfile(os.path.join(args.dc_path, p))
                  and p.startswith('CD') and p.endswith('.emt')]
     _log.debug('emt files = {}'.format(emt_files))
@@ -59,20 +62,22 @@ def main(args=None):
         _log.info("Compute file " + str(filename))
         _, muscle, patient, *_ = filename.split('_')
 
+        _log.info("Extract col '{}' from file '{}'".format(muscle, emt))
         my_emg = emg.Emg()
         with open(os.path.join(args.dc_path, emt)) as f:
-            my_emg.parse(f)
-
-        data = my_emg.data.data
-        _log.info("Extract col '{}' from file '{}'".format(muscle, emt))
-
-        try:
-            col = data[muscle]
-        except KeyError:
-            msg = "column '{}' not found in '{}".format(muscle, data.columns)
-            _log.critical(msg)
-            raise KeyError(msg) from None
+            try:
+                # parse only the column of the muscle
+                my_emg.parse(f, tracks=[muscle])
+            except KeyError as err:
+                msg = "column '{}' not found in '{}': {}".format(muscle, emt, err.args[0])
+                _log.critical(msg)
+                raise KeyError(msg) from None
+
+        col = my_emg.data[muscle]
         dyn_cal.append(col)
+        # the statistics of the column alone, the NaN added by the concatenation are not counted.
+        # one column by file, as dyn_cal, even if several files hold the same muscle
+        descriptions.append(Statistics().update_values([muscle], col.to_numpy()[:, None]).describe())
     if emt_files:
         dyn_cal = pd.concat(dyn_cal, axis=1)
     else:
@@ -91,7 +96,7 @@ def main(args=None):
                        na_rep='NaN')
 
     dest_file = args.output + '.desc'
-    desc = dyn_cal.describe()
+    desc = pd.concat(descriptions, axis=1)
     with open(dest_file, 'w') as f:
         print('#value for Dynamic Calibration', file=f)
         print('# {}'.format(' '.join(sys.argv)), file=f)
@@ -63,8 +63,9 @@ track_D.emt
                         help='directory where to write results, if directory does not exists, it will be created')
     parser.add_argument('--version',
                         action=argparse_utils.VersionAction,
-                        version=get_version_message(),
+                        version=get_version_message,
                         help='Display version and exit.')
+    argparse_utils.add_cache_arguments(parser)
     parser.add_argument('-v', '--verbosity',
                         action='count',
                         default=0,
@@ -74,6 +75,7 @@ track_D.emt
     args.verbosity = max(10, 30 - (10 * args.verbosity))
     emg_analyzer.logger_set_level(args.verbosity)
     _log = colorlog.getLogger('emg_analyzer')
+    argparse_utils.configure_cache(args)
 
     if args.out_dir:
         args.out_dir = os.path.realpath(args.out_dir)
@@ -92,13 +94,14 @@ track_D.emt
     else:
         args.out_dir = ''
 
+    from emg_analyzer.emg import Emg
     input_emg = []
 
     for path in args.emg_path:
-        emg = emg_analyzer.emg.Emg()
+        emg = Emg()
         with open(path) as f:
             _log.info("Parsing {}".format(path))
-            emg.parse(f)
+            emg.parse(f, mmap=True)
         input_emg.append(emg)
 
     new_emg = input_emg[0].group_by_track(input_emg[1:])
@@ -12,11 +12,10 @@ import os
 import sys
 import colorlog
 
-import pandas as pd
-
 import emg_analyzer
 from emg_analyzer import argparse_utils
-from emg_analyzer.utils import process_dir, process_one_emt_file, get_version_message
+from emg_analyzer.utils import process_dir, process_one_emt_file, get_version_message, ProcessingError, \
+    ManifestError
 
 
 
@@ -47,10 +46,38 @@ def main(args=None):
                              '(default use the max value of the matrix or column)')
     parser.add_argument('--dyn-cal',
                         help='The path to the file to use for the dynamic calibration.')
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        default=1,
+                        help="The number of processes to use to normalize the files of a directory "
+                             "(default 1).")
+    parser.add_argument('--dtype',
+                        choices=('float64', 'float32'),
+                        default='float64',
+                        help="The type used to hold the values in memory (default float64). "
+                             "float32 halves the memory used, the results are the same within 0.001.")
+    parser.add_argument('--chunksize',
+                        type=int,
+                        help="Normalize the files chunk by chunk of CHUNKSIZE frames in two passes, "
+                             "so the memory used does not depend on the size of the files. "
+                             "The results are the same as without this option.")
+    parser.add_argument('--incremental',
+                        action='store_true',
+                        default=False,
+                        help="Record the files of a processed directory in a manifest. "
+                             "If the processed directory already exists, process only the new or modified files "
+                             "and the files not processed by a previous interrupted run. "
+                             "The directory must have been processed with the same options.")
+    parser.add_argument('--checksum',
+                        action='store_true',
+                        default=False,
+                        help="With --incremental, compare the contents of the files whose modification time "
+                             "changed to know if they must be processed again.")
     parser.add_argument('--version',
                         action=argparse_utils.VersionAction,
-                        version=get_version_message(),
+                        version=get_version_message,
                         help='Display version and exit.')
+    argparse_utils.add_cache_arguments(parser)
     parser.add_argument('-v', '--verbosity',
                         action='count',
                         default=0,
@@ -60,6 +87,7 @@ def main(args=None):
     args.verbosity = max(10, 30 - (10 * args.verbosity))
     emg_analyzer.logger_set_level(args.verbosity)
     _log = colorlog.getLogger('emg_analyzer')
+    argparse_utils.configure_cache(args)
 
     if not isinstance(args.emg_path, list):
         # args must be read from stdin
@@ -85,29 +113,51 @@ def main(args=None):
     if args.max is not None:
         options['max'] = args.max
     if args.dyn_cal:
+        import pandas as pd
         _log.info("Loading dynamic calibration file '{}'".format(args.dyn_cal))
         dyn_cal = pd.read_table(args.dyn_cal, comment='#', index_col=0)
         dyn_cal = dyn_cal.T[['min', 'max']].T
         print(dyn_cal)
         options['dyn_cal'] = dyn_cal
 
+    failed = False
     for path in args.emg_path:
         path = path.strip()
         if os.path.isdir(path):
-            processed = process_dir(path,
-                                    norm_method,
-                                    method_args=tuple(),
-                                    method_kwargs=options,
-                                    suffix='norm'
-                                    )
+            try:
+                processed = process_dir(path,
+                                        norm_method,
+                                        method_args=tuple(),
+                                        method_kwargs=options,
+                                        suffix='norm',
+                                        jobs=args.jobs,
+                                        dtype=args.dtype,
+                                        chunksize=args.chunksize,
+                                        incremental=args.incremental,
+                                        checksum=args.checksum,
+                                        inplace=True
+                                        )
+            except ProcessingError as err:
+                _log.error(str(err))
+                processed = err.processed_path
+                failed = True
+            except ManifestError as err:
+                _log.error(str(err))
+                failed = True
+                continue
         else:
             processed = process_one_emt_file(path,
                                              norm_method,
                                              method_args=tuple(),
                                              method_kwargs=options,
-                                             suffix='norm'
+                                             suffix='norm',
+                                             dtype=args.dtype,
+                                             chunksize=args.chunksize,
+                                             inplace=True
                                              )
         print(processed)
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
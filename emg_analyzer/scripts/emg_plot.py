@@ -10,6 +10,7 @@
 import argparse
 import os
 import sys
+import concurrent.futures
 import colorlog
 import emg_analyzer
 from emg_analyzer import argparse_utils
@@ -36,7 +37,7 @@ def main(args=None):
                         help='directory where to write results, if directory does not exists, it will be created')
     parser.add_argument('--version',
                         action=argparse_utils.VersionAction,
-                        version=get_version_message(),
+                        version=get_version_message,
                         help='Display version and exit.')
     parser.add_argument('--y-scale-auto',
                         action='store_true',
@@ -44,6 +45,16 @@ def main(args=None):
                         help='do not use the y min max of the matrix to fix scale of each'
                              'columns. let system to use the best scale.'
                         )
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        default=1,
+                        help="The number of processes to use to render the figures (default 1).")
+    parser.add_argument('--no-decimation',
+                        action='store_true',
+                        default=False,
+                        help="Draw all the frames. By default only the min and max of the frames "
+                             "of each pixel column are drawn, the figures look the same but are drawn faster.")
+    argparse_utils.add_cache_arguments(parser)
     parser.add_argument('-v', '--verbosity',
                         action='count',
                         default=0,
@@ -53,6 +64,7 @@ def main(args=None):
     args.verbosity = max(10, 30 - (10 * args.verbosity))
     emg_analyzer.logger_set_level(args.verbosity)
     _log = colorlog.getLogger('emg_analyzer')
+    argparse_utils.configure_cache(args)
 
     if args.out_dir:
         args.out_dir = os.path.realpath(args.out_dir)
@@ -71,15 +83,29 @@ def main(args=None):
     else:
         args.out_dir = ''
 
+    from emg_analyzer.emg import Emg
+    from emg_analyzer import plot
     results = []
-    for path in args.emg_path:
-        emg = emg_analyzer.emg.Emg()
-        with open(path) as f:
-            _log.info("Parsing {}".format(path))
-            emg.parse(f)
-        paths = emg.to_plot(out_dir=args.out_dir, y_scale_auto=args.y_scale_auto)
-        results.extend(paths)
-        
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) if args.jobs > 1 else None
+    try:
+        previous = []
+        for path in args.emg_path:
+            emg = Emg()
+            with open(path) as f:
+                _log.info("Parsing {}".format(path))
+                emg.parse(f)
+            futures = plot.submit_tracks(emg, out_dir=args.out_dir, y_scale_auto=args.y_scale_auto,
+                                         executor=executor, decimation=not args.no_decimation)
+            del emg
+            # the next file is parsed while the figures of this one are rendered,
+            # but do not pile up the tracks of all files in the queue of the executor
+            results.extend(f.result() for f in previous)
+            previous = futures
+        results.extend(f.result() for f in previous)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
     if args.out_dir:
         print(args.out_dir)
     else:
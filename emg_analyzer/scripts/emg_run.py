@@ -0,0 +1,396 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+import argparse
+import os
+import re
+import sys
+import colorlog
+import emg_analyzer
+from emg_analyzer import argparse_utils
+from emg_analyzer.utils import prefetch, get_version_message
+
+_log = colorlog.getLogger('emg_analyzer')
+
+
+def main(args=None):
+    """
+
+    :param args:
+    :return:
+    """
+    args = sys.argv[1:] if args is None else args
+    desc = """Chain several processing stages in one process.
+Each '.emt' file is parsed once, the stages pass the emg to each other in memory
+and the outputs are the same as running the corresponding scripts one after the other.
+
+The stages are separated by '->', each stage can take options between parentheses:
+
+    norm(by_track, dyn_cal=DYN_CAL, write)
+        normalize the emg (see emg_norm), write FILE_norm.emt if 'write' is set
+        or if it is the last stage.
+    smooth(feature=FEATURE, window=WINDOW, write)
+        compute the moving 'mean', 'rms' or 'envelope' (mean of the rectified values)
+        of the tracks on a window of WINDOW frames, write FILE_FEATURE.emt if 'write' is set
+        or if it is the last stage.
+    select(rest_matrix=REST_MATRIX, coef=1.5, intervals, values=yes, write)
+        select the activities (see emg_select), write FILE.sel and FILE_sel.summary if 'write' is set
+        or if it is the last stage. 'intervals' and 'values=no' are the options --intervals and --no-values
+        of emg_select. The next stages get the selected activities as FILE_sel.
+    describe
+        write the statistics of the emg in FILE.desc (see emg_describe).
+
+The outputs are placed as the scripts place them:
+norm and smooth write their new '.emt' files in --out-dir (default the current directory);
+the files of a directory DIR go in the tree DIR_norm/SUB_DIR_norm/... next to DIR, or in --out-dir,
+as emg_norm does (DIR_FEATURE for smooth).
+select and describe write their outputs next to the file they get: the file created by the previous stage,
+or the input file. With --out-dir the outputs of the input files are written in --out-dir instead,
+in the same tree (DIR/SUB_DIR/...) for the files of a directory, so the input directories are never written.
+
+for instance:
+
+    emg run 'norm(by_track) -> select(rest_matrix=rest.desc, coef=2) -> describe' foo.emt
+    emg run 'smooth(feature=envelope, window=100) -> select(rest_matrix=rest.desc)' foo.emt
+"""
+    parser = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     description=desc)
+    parser.add_argument('--version',
+                        action=argparse_utils.VersionAction,
+                        version=get_version_message,
+                        help='Display version and exit.')
+    subparsers = parser.add_subparsers(dest='command')
+    run_parser = subparsers.add_parser('run',
+                                       formatter_class=argparse.RawDescriptionHelpFormatter,
+                                       description=desc,
+                                       help='run a pipeline of stages on .emt files')
+    run_parser.add_argument('pipeline',
+                            help="The stages to chain, for instance 'norm(by_track) -> describe'.")
+    run_parser.add_argument('emg_path',
+                            nargs='+',
+                            help="The path to '.emt' file or a directory containing '.emt' files.")
+    run_parser.add_argument('--out-dir',
+                            default='',
+                            help="The directory where to write the outputs "
+                                 "(default the current directory for the normalized and smoothed files as emg_norm, "
+                                 "next to the input files for the others as emg_select and emg_describe).")
+    argparse_utils.add_cache_arguments(run_parser)
+    run_parser.add_argument('-v', '--verbosity',
+                            action='count',
+                            default=0,
+                            help="Set the output verbosity. can be set several times -vv for instance.")
+    args = parser.parse_args(args)
+    if args.command is None:
+        parser.print_help()
+        sys.exit(1)
+
+    args.verbosity = max(10, 30 - (10 * args.verbosity))
+    emg_analyzer.logger_set_level(args.verbosity)
+    argparse_utils.configure_cache(args)
+
+    try:
+        stages = parse_pipeline(args.pipeline)
+    except ValueError as err:
+        run_parser.error(str(err))
+
+    # the emt files and the directory given on the command line they come from
+    emt_to_process = []
+    for path in args.emg_path:
+        path = path.strip()
+        if os.path.isdir(path):
+            root = path.rstrip(os.sep)
+            for dir_path, dirs, files in os.walk(root):
+                dirs.sort()
+                emt_to_process += [(os.path.join(dir_path, f), root) for f in sorted(files)
+                                   if not f.startswith('.') and os.path.splitext(f)[1] == '.emt']
+        elif os.path.isfile(path):
+            emt_to_process.append((path, None))
+    roots = dict(emt_to_process)
+
+    context = {'out_dir': args.out_dir,
+               'emg_path': args.emg_path,
+               'argv': sys.argv}
+    try:
+        for stage in stages:
+            _STAGES[stage['name']]['load'](stage, context)
+    except ValueError as err:
+        run_parser.error(str(err))
+    # parse the next file while the current one goes through the stages
+    for path, emg in prefetch(_parse, [path for path, _ in emt_to_process]):
+        _log.info('Compute emg ' + path)
+        target = {'path': path, 'root': roots[path], 'input': True}
+        for stage in stages:
+            emg, target = _STAGES[stage['name']]['run'](emg, target, stage, context)
+
+
+def _created(target, suffix, context):
+    """
+    The location of a new *.emt* file created by a stage, as emg_norm places it
+    (see :func:`emg_analyzer.utils.process_dir`).
+
+    :param dict target: The file the stage gets: its 'path', the directory given on the command line
+                        it comes from ('root', None for a file given on the command line)
+                        and 'input' True if it is an input file.
+    :param str suffix: The suffix added to the name of the file and of the directories.
+    :param dict context: The context of the pipeline.
+    :return: the target of the new file: in --out-dir for a file given on the command line,
+             in the tree DIR_suffix/SUB_DIR_suffix/... next to DIR (or in --out-dir) for a file of a directory DIR.
+    :rtype: dict
+    """
+    dir_name, basename = os.path.split(target['path'])
+    filename, ext = os.path.splitext(basename)
+    filename = "{}_{}{}".format(filename.replace(' ', '_'), suffix, ext)
+    root = target['root']
+    if root is None:
+        return {'path': os.path.join(context['out_dir'], filename), 'root': None, 'input': False}
+    parent, root_name = os.path.split(root)
+    new_root = os.path.join(context['out_dir'] or parent, "{}_{}".format(root_name.replace(' ', '_'), suffix))
+    rel_dir = os.path.relpath(dir_name, root)
+    sub_dirs = [] if rel_dir == os.curdir else rel_dir.split(os.sep)
+    new_dir = os.path.join(new_root, *["{}_{}".format(d.replace(' ', '_'), suffix) for d in sub_dirs])
+    return {'path': os.path.join(new_dir, filename), 'root': new_root, 'input': False}
+
+
+def _placed(target, context):
+    """
+    The location of the file next to which select and describe write their outputs.
+
+    :param dict target: The file the stage gets (see :func:`_created`).
+    :param dict context: The context of the pipeline.
+    :return: *target*, or with --out-dir for an input file, the same file in --out-dir
+             (in the tree DIR/SUB_DIR/... for a file of a directory DIR).
+    :rtype: dict
+    """
+    if not target['input'] or not context['out_dir']:
+        return target
+    root = target['root']
+    if root is None:
+        return {'path': os.path.join(context['out_dir'], os.path.basename(target['path'])),
+                'root': None,
+                'input': False}
+    new_root = os.path.join(context['out_dir'], os.path.basename(root))
+    return {'path': os.path.join(new_root, os.path.relpath(target['path'], root)), 'root': new_root, 'input': False}
+
+
+def _make_dir(path):
+    """
+    Create the directory of *path* if needed.
+    """
+    dir_name = os.path.dirname(path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+
+
+def _parse(path):
+    """
+    :param str path: The path of the *.emt* file to parse.
+    :return: the emg
+    :rtype: :class:`emg_analyzer.emg.Emg` object
+    """
+    from emg_analyzer.emg import Emg
+    with open(path) as f:
+        emg = Emg()
+        emg.parse(f)
+    return emg
+
+
+def parse_pipeline(pipeline):
+    """
+    :param str pipeline: The description of the stages, for instance 'norm(by_track) -> select(coef=2)'.
+    :return: the stages, each stage is a dict with the name of the stage, its options
+             and *write* True if the stage must write its outputs.
+    :rtype: list of dict
+    :raise ValueError: if the pipeline is not valid.
+    """
+    stages = []
+    for stage_desc in pipeline.split('->'):
+        match = re.fullmatch(r'\s*(\w+)\s*(?:\((.*)\))?\s*', stage_desc)
+        if match is None:
+            raise ValueError("invalid stage: '{}'".format(stage_desc.strip()))
+        name, options_desc = match.groups()
+        if name not in _STAGES:
+            raise ValueError("unknown stage '{}' (available stages: {})".format(name, ', '.join(_STAGES)))
+        options = {}
+        for option in (options_desc or '').split(','):
+            if not option.strip():
+                continue
+            key, sep, value = option.partition('=')
+            key = key.strip()
+            if key not in _STAGES[name]['options'] and key != 'write':
+                raise ValueError("unknown option '{}' for stage '{}'".format(key, name))
+            convert = _flag if key == 'write' else _STAGES[name]['options'][key]
+            try:
+                options[key] = convert(value.strip()) if sep else True
+            except ValueError:
+                raise ValueError("invalid value for option '{}' of stage '{}': '{}'".format(key, name, value)) \
+                    from None
+        missing = [key for key in _STAGES[name]['required'] if key not in options]
+        if missing:
+            raise ValueError("the stage '{}' needs the option(s): {}".format(name, ', '.join(missing)))
+        stages.append({'name': name,
+                       'write': options.pop('write', False),
+                       'options': options})
+    if not stages:
+        raise ValueError("no stage in pipeline")
+    stages[-1]['write'] = True
+    return stages
+
+
+def _load_norm(stage, context):
+    """
+    Load the dynamic calibration file of the norm stage (as emg_norm does).
+    """
+    dyn_cal = stage['options'].get('dyn_cal')
+    if dyn_cal:
+        import pandas as pd
+        _log.info("Loading dynamic calibration file '{}'".format(dyn_cal))
+        dyn_cal = pd.read_table(dyn_cal, comment='#', index_col=0)
+        stage['dyn_cal'] = dyn_cal.T[['min', 'max']].T
+
+
+def _run_norm(emg, target, stage, context):
+    """
+    Normalize the emg (see :meth:`emg_analyzer.emg.Emg.norm` and :meth:`emg_analyzer.emg.Emg.norm_by_track`).
+
+    :return: the normalized emg and the normalized file (as written by emg_norm, see :func:`_created`).
+    :rtype: tuple (:class:`emg_analyzer.emg.Emg` object, dict)
+    """
+    if stage['options'].get('by_track') or 'dyn_cal' in stage:
+        normed = emg.norm_by_track(dyn_cal=stage.get('dyn_cal'), inplace=True)
+    else:
+        normed = emg.norm(inplace=True)
+    normed.name = emg.name
+    normed_target = _created(target, 'norm', context)
+    if stage['write']:
+        _log.info('Write file ' + normed_target['path'])
+        _make_dir(normed_target['path'])
+        with open(normed_target['path'], 'w') as normed_file:
+            normed.to_emt(file=normed_file)
+    return normed, normed_target
+
+
+def _load_smooth(stage, context):
+    """
+    Check the feature and the window of the smooth stage before processing the files.
+    """
+    from emg_analyzer.window import MovingWindow
+    MovingWindow(stage['options']['feature'], stage['options']['window'])
+
+
+def _run_smooth(emg, target, stage, context):
+    """
+    Compute a feature of the tracks on a sliding window (see :meth:`emg_analyzer.emg.Emg.moving`).
+
+    :return: the smoothed emg and its file, the name of the feature is added to the name of the file
+             and of the directories (see :func:`_created`).
+    :rtype: tuple (:class:`emg_analyzer.emg.Emg` object, dict)
+    """
+    feature = stage['options']['feature']
+    smoothed = emg.moving(feature, stage['options']['window'])
+    smoothed.name = emg.name
+    smoothed_target = _created(target, feature, context)
+    if stage['write']:
+        _log.info('Write file ' + smoothed_target['path'])
+        _make_dir(smoothed_target['path'])
+        with open(smoothed_target['path'], 'w') as smoothed_file:
+            smoothed.to_emt(file=smoothed_file)
+    return smoothed, smoothed_target
+
+
+def _load_select(stage, context):
+    """
+    Load the rest matrix of the select stage.
+    """
+    import pandas as pd
+    stage['rest_matrix'] = pd.read_table(stage['options']['rest_matrix'], comment='#', index_col=0)
+    stage['comments'] = ['Activities selection',
+                         "filter {} emg with rest matrix = {}".format(' '.join(context['emg_path']),
+                                                                      stage['options']['rest_matrix']),
+                         " ".join(context['argv'])]
+
+
+def _run_select(emg, target, stage, context):
+    """
+    Select the activities of the emg (see :meth:`emg_analyzer.emg.Emg.select`).
+    The outputs are written next to the file (see :func:`_placed`).
+
+    :return: the selected activities and the file of the emg with the suffix '_sel'.
+    :rtype: tuple (:class:`emg_analyzer.emg.Emg` object, dict)
+    """
+    sel, thresholds = emg.select(stage['rest_matrix'], coef=stage['options'].get('coef', 1.5))
+    target = _placed(target, context)
+    if stage['write']:
+        from emg_analyzer.scripts.emg_select import write_selected
+        _make_dir(target['path'])
+        write_selected(sel, thresholds, target['path'], stage['comments'],
+                       intervals=stage['options'].get('intervals', False),
+                       values=stage['options'].get('values', True))
+    sel.name = emg.name
+    filename, ext = os.path.splitext(target['path'])
+    return sel, {'path': "{}_sel{}".format(filename, ext), 'root': target['root'], 'input': False}
+
+
+def _run_describe(emg, target, stage, context):
+    """
+    Write the statistics of the emg in a *.desc* file (see :mod:`emg_analyzer.stats`),
+    next to the file (see :func:`_placed`).
+
+    :return: the emg and its file unchanged.
+    :rtype: tuple (:class:`emg_analyzer.emg.Emg` object, dict)
+    """
+    from emg_analyzer.stats import Statistics
+    from emg_analyzer.scripts.emg_describe import write_desc
+    dest_path = os.path.splitext(_placed(target, context)['path'])[0] + '.desc'
+    _log.info('Write file ' + dest_path)
+    _make_dir(dest_path)
+    write_desc(Statistics.from_data(emg.data), dest_path)
+    return emg, target
+
+
+def _no_load(stage, context):
+    pass
+
+
+def _flag(value):
+    """
+    :return: the value of a boolean option given as 'option=value'.
+    :rtype: bool
+    """
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(value)
+
+
+#: the stages available in a pipeline: the function to run once before processing the files,
+#: the function to run on each emg, the options with the function to convert their values
+#: and the required options. All stages accept the option 'write'.
+_STAGES = {
+    'norm': {'load': _load_norm,
+             'run': _run_norm,
+             'options': {'by_track': _flag, 'dyn_cal': str},
+             'required': []},
+    'smooth': {'load': _load_smooth,
+               'run': _run_smooth,
+               'options': {'feature': str, 'window': int},
+               'required': ['feature', 'window']},
+    'select': {'load': _load_select,
+               'run': _run_select,
+               'options': {'rest_matrix': str, 'coef': float, 'intervals': _flag, 'values': _flag},
+               'required': ['rest_matrix']},
+    'describe': {'load': _no_load,
+                 'run': _run_describe,
+                 'options': {},
+                 'required': []},
+}
+
+
+if __name__ == '__main__':
+    main()
@@ -10,13 +10,14 @@
 import argparse
 import os
 import sys
+import collections
+import functools
+import concurrent.futures
 import colorlog
-from numpy import nan
-import pandas as pd
 import emg_analyzer
 from emg_analyzer import argparse_utils
-from emg_analyzer.utils import process_dir, process_one_emt_file, get_version_message
-
+from emg_analyzer.utils import prefetch, get_version_message
+_log = colorlog.getLogger('emg_analyzer')
 
 
 def main(args=None):
@@ -35,14 +36,70 @@ def main(args=None):
     parser.add_argument('--rest-matrix',
                        required=True,
                        help="the file describing (with statistics) the rest condition")
-    parser.add_argument('--coef',
-                        type=float,
-                        default=1.5,
-                        help='the multiplying coeficient to apply to the standard deviation')
+    coef_group = parser.add_mutually_exclusive_group()
+    coef_group.add_argument('--coef',
+                            type=float,
+                            default=1.5,
+                            help='the multiplying coeficient to apply to the standard deviation')
+    coef_group.add_argument('--sweep',
+                            type=float,
+                            nargs=3,
+                            metavar=('START', 'STOP', 'STEP'),
+                            help="Count the activities for each coefficient from START to STOP (included) "
+                                 "by STEP, in one pass over each file, and write one table of the activation "
+                                 "ratios by coefficient for each muscle of each file, instead of the .sel files.")
+    segments_group = parser.add_argument_group('segments of activity',
+                                               "Setting one of these options selects the segments of activity "
+                                               "(onset and offset of each track) instead of the values greater "
+                                               "than the threshold. The .sel files are written in intervals "
+                                               "format without values (see --intervals).")
+    segments_group.add_argument('--off-coef',
+                                type=float,
+                                help="hysteresis: a segment starts at a value greater than the threshold of --coef "
+                                     "and goes on while the values are greater than the threshold of this "
+                                     "coefficient (lower or equal to --coef, default --coef).")
+    segments_group.add_argument('--min-duration',
+                                type=int,
+                                help="the segments shorter than MIN_DURATION frames are dropped (default 1).")
+    segments_group.add_argument('--max-gap',
+                                type=int,
+                                help="the segments separated by at most MAX_GAP inactive frames "
+                                     "are merged (default 0).")
+    parser.add_argument('-o', '--output',
+                        default=sys.stdout,
+                        help="With --sweep, the file to store the table (default=stdout), "
+                             "the extension '.sweep' is added.")
+    parser.add_argument('--intervals',
+                        action='store_true',
+                        default=False,
+                        help="Write the .sel file in intervals format: the first and last frames of each "
+                             "activity of each track, the selected values are written in a '_sel.npz' file "
+                             "(see emg_analyzer.selection).")
+    parser.add_argument('--no-values',
+                        action='store_false',
+                        dest='values',
+                        default=True,
+                        help="With --intervals, do not write the selected values, "
+                             "only the intervals and the summary.")
+    parser.add_argument('--summary-only',
+                        action='store_true',
+                        default=False,
+                        help="Write only the '_sel.summary' files. The selected values are counted "
+                             "chunk by chunk without building the selection, which is much faster.")
+    parser.add_argument('--chunksize',
+                        type=int,
+                        help="With --summary-only, --sweep or the segments of activity, the files are read "
+                             "chunk by chunk of CHUNKSIZE frames.")
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        default=1,
+                        help="The number of processes to use to select the files (default 1). "
+                             "Each process holds one recording in memory.")
     parser.add_argument('--version',
                         action=argparse_utils.VersionAction,
-                        version=get_version_message(),
+                        version=get_version_message,
                         help='Display version and exit.')
+    argparse_utils.add_cache_arguments(parser)
     parser.add_argument('-v', '--verbosity',
                         action='count',
                         default=0,
@@ -52,6 +109,7 @@ def main(args=None):
     args.verbosity = max(10, 30 - (10 * args.verbosity))
     emg_analyzer.logger_set_level(args.verbosity)
     _log = colorlog.getLogger('emg_analyzer')
+    argparse_utils.configure_cache(args)
 
     if not isinstance(args.emg_path, list):
         # args must be read from stdin
@@ -79,51 +137,314 @@ def main(args=None):
         elif os.path.isfile(path):
             emt_to_filter.append(path)
 
-    emg_to_filter = []
-    for emt in emt_to_filter:
-        with open(emt) as f:
-            emg = emg_analyzer.emg.Emg()
-            emg.parse(f)
-            emg_to_filter.append(emg)
-
-    rest_matrix =pd.read_table(args.rest_matrix, comment='#', index_col=0)
-    for emg, path in zip(emg_to_filter, emt_to_filter):
-        _log.info('Compute emg ' + path)
-        sel, thresholds = emg.select(rest_matrix, coef=args.coef)
+    import numpy as np
+    import pandas as pd
+    rest_matrix = pd.read_table(args.rest_matrix, comment='#', index_col=0)
+    comments = ['Activities selection',
+                "filter {} emg with rest matrix = {}".format(' '.join(args.emg_path), args.rest_matrix),
+                " ".join(sys.argv)]
+    segments = any(opt is not None for opt in (args.off_coef, args.min_duration, args.max_gap))
+    if segments and args.sweep:
+        parser.error("the segments of activity cannot be swept")
+    if segments:
+        from emg_analyzer.emg import CHUNKSIZE
+        comments.insert(2, "segments of activity with off coef = {}, min duration = {} frames, "
+                           "max gap = {} frames".format(args.coef if args.off_coef is None else args.off_coef,
+                                                        args.min_duration or 1,
+                                                        args.max_gap or 0))
+        detect = functools.partial(segment_one_emt_file,
+                                   rest_matrix=rest_matrix,
+                                   coef=args.coef,
+                                   comments=comments,
+                                   off_coef=args.off_coef,
+                                   min_duration=1 if args.min_duration is None else args.min_duration,
+                                   max_gap=0 if args.max_gap is None else args.max_gap,
+                                   chunksize=args.chunksize or CHUNKSIZE,
+                                   summary_only=args.summary_only)
+        try:
+            if args.jobs > 1:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                    for _ in executor.map(detect, emt_to_filter):
+                        pass
+            else:
+                for path in emt_to_filter:
+                    _log.info('Compute emg ' + path)
+                    detect(path)
+        except ValueError as err:
+            parser.error(str(err))
+    elif args.sweep:
+        from emg_analyzer.emg import CHUNKSIZE
+        start, stop, step = args.sweep
+        if step <= 0 or stop < start:
+            parser.error("--sweep needs START <= STOP and a positive STEP")
+        # rounded to get rid of the floating point errors of arange (0.30000000000000004)
+        coefs = np.round(np.arange(start, stop + step / 2, step), 10).tolist()
+        sweep = functools.partial(sweep_one_emt_file,
+                                  rest_matrix=rest_matrix,
+                                  coefs=coefs,
+                                  chunksize=args.chunksize or CHUNKSIZE)
+        if args.jobs > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                sweeps = list(executor.map(sweep, emt_to_filter))
+        else:
+            sweeps = []
+            for path in emt_to_filter:
+                _log.info('Compute emg ' + path)
+                sweeps.append(sweep(path))
+        if isinstance(args.output, str):
+            with open(os.path.realpath(args.output) + '.sweep', 'w') as out:
+                write_sweep(sweeps, emt_to_filter, out, comments)
+        else:
+            write_sweep(sweeps, emt_to_filter, args.output, comments)
+    elif args.summary_only:
+        from emg_analyzer.emg import CHUNKSIZE
+        summarize = functools.partial(summarize_one_emt_file,
+                                      rest_matrix=rest_matrix,
+                                      coef=args.coef,
+                                      chunksize=args.chunksize or CHUNKSIZE)
+        if args.jobs > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                for summary_path in executor.map(summarize, emt_to_filter):
+                    _log.info('Write file ' + summary_path)
+        else:
+            for path in emt_to_filter:
+                _log.info('Compute emg ' + path)
+                summarize(path)
+    elif args.jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            # submit a new file only when a worker is free, so the memory does not grow with the number of files
+            running = collections.deque()
+            for path in emt_to_filter:
+                if len(running) == args.jobs:
+                    running.popleft().result()
+                _log.info('Compute emg ' + path)
+                running.append(executor.submit(select_one_emt_file, path, rest_matrix, args.coef, comments,
+                                               intervals=args.intervals, values=args.values))
+            for future in running:
+                future.result()
+    else:
+        # parse the next file while the current one is selected and written
+        for path, emg in prefetch(_parse, emt_to_filter):
+            _log.info('Compute emg ' + path)
+            write_selection(emg, path, rest_matrix, args.coef, comments,
+                            intervals=args.intervals, values=args.values)
+
+
+def _parse(path):
+    """
+    :param str path: The path of the *.emt* file to parse.
+    :return: the emg
+    :rtype: :class:`emg_analyzer.emg.Emg` object
+    """
+    from emg_analyzer.emg import Emg
+    with open(path) as f:
+        emg = Emg()
+        emg.parse(f)
+    return emg
+
+
+def summarize_one_emt_file(path, rest_matrix, coef, chunksize):
+    """
+    Count the activities of an *.emt* file chunk by chunk and write the *_sel.summary* file next to it.
+    The selection itself is not built (see :func:`emg_analyzer.stream.activation_summary`).
+
+    :param str path: The path of the *.emt* file.
+    :param rest_matrix: The statistics of the rest condition (see :meth:`emg_analyzer.emg.Emg.select`).
+    :type rest_matrix: :class:`pandas.DataFrame` object
+    :param float coef: the multiplying coefficient to apply to the standard deviation.
+    :param int chunksize: the number of frames read at once.
+    :return: the path of the *_sel.summary* file.
+    :rtype: str
+    """
+    from emg_analyzer import stream
+    summary = stream.activation_summary(path, rest_matrix, coef=coef, chunksize=chunksize)
+    return write_summary(summary, path)
+
+
+def sweep_one_emt_file(path, rest_matrix, coefs, chunksize):
+    """
+    Count the activities of an *.emt* file for several coefficients in one pass
+    (see :func:`emg_analyzer.stream.activation_sweep`).
+
+    :param str path: The path of the *.emt* file.
+    :param rest_matrix: The statistics of the rest condition (see :meth:`emg_analyzer.emg.Emg.select`).
+    :type rest_matrix: :class:`pandas.DataFrame` object
+    :param coefs: the multiplying coefficients to apply to the standard deviation.
+    :type coefs: list of float
+    :param int chunksize: the number of frames read at once.
+    :return: the summary of the activities for each coefficient, indexed by coefficient and muscle.
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    from emg_analyzer import stream
+    return stream.activation_sweep(path, rest_matrix, coefs, chunksize=chunksize)
+
+
+def write_sweep(sweeps, paths, out, comments):
+    """
+    Write the activation ratios of several *.emt* files, one row by muscle of each file
+    and one column by coefficient.
+
+    :param sweeps: The summaries of the activities for each coefficient (see :func:`sweep_one_emt_file`).
+    :type sweeps: list of :class:`pandas.DataFrame` object
+    :param paths: The paths of the *.emt* files, in the order of *sweeps*.
+    :type paths: list of str
+    :param out: Where to write the table.
+    :type out: file object
+    :param comments: The lines to write at the top of the table.
+    :type comments: list of string
+    """
+    import pandas as pd
+    ratios = [sweep['activation_ratio'].unstack('coef') for sweep in sweeps]
+    experiments = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    table = pd.concat(ratios, keys=experiments, names=['Experiment', 'Muscle'])
+    table.columns = ['{:g}'.format(coef) for coef in table.columns]
+    print('# Activation ratio by coefficient', file=out)
+    for comment in comments[1:]:
+        print('# ' + comment, file=out)
+    table.to_csv(path_or_buf=out,
+                 sep='\t',
+                 float_format='%.4f',
+                 na_rep='NaN')
+
+
+def segment_one_emt_file(path, rest_matrix, coef, comments, off_coef=None, min_duration=1, max_gap=0,
+                         chunksize=None, summary_only=False):
+    """
+    Detect the segments of activity of an *.emt* file chunk by chunk
+    (see :func:`emg_analyzer.stream.detect_segments`) and write the *.sel* file in intervals format,
+    without the values, and the *_sel.summary* file next to it.
+
+    :param str path: The path of the *.emt* file.
+    :param rest_matrix: The statistics of the rest condition (see :meth:`emg_analyzer.emg.Emg.select`).
+    :type rest_matrix: :class:`pandas.DataFrame` object
+    :param float coef: the multiplying coefficient of the standard deviation to start a segment.
+    :param comments: The lines to write at the top of the *.sel* file.
+    :type comments: list of string
+    :param float off_coef: the multiplying coefficient of the standard deviation to go on with a segment,
+                           None to use *coef*.
+    :param int min_duration: the minimum number of frames of a segment.
+    :param int max_gap: the maximum number of inactive frames between two segments to merge them.
+    :param int chunksize: the number of frames read at once, None for the default.
+    :param bool summary_only: True to write only the *_sel.summary* file.
+    :return: the path of the *_sel.summary* file.
+    :rtype: str
+    """
+    from emg_analyzer import stream
+    from emg_analyzer.emg import EmgData, activation_summary, CHUNKSIZE
+    segments = stream.detect_segments(path, rest_matrix, coef=coef, off_coef=off_coef,
+                                      min_duration=min_duration, max_gap=max_gap,
+                                      chunksize=chunksize or CHUNKSIZE)
+    if not summary_only:
+        sel_path = os.path.splitext(path)[0] + '.sel'
+        _log.info('Write file ' + sel_path)
+        segments.write(sel_path, comments=comments, values=False)
+    tracks = segments.tracks
+    summary = activation_summary(tracks, EmgData._thresholds(rest_matrix, tracks, coef), segments.count[tracks],
+                                 segments.frames)
+    return write_summary(summary, path)
+
+
+def write_summary(summary, path):
+    """
+    Write the *_sel.summary* file of an *.emt* file.
+
+    :param summary: The summary of the activities (see :func:`emg_analyzer.emg.activation_summary`).
+    :type summary: :class:`pandas.DataFrame` object
+    :param str path: The path of the *.emt* file the activities are selected from.
+    :return: the path of the *_sel.summary* file.
+    :rtype: str
+    """
+    summary = summary.round({'threshold': 4, 'activation_ratio': 2})
+    summary_path = os.path.splitext(path)[0] + '_sel.summary'
+    _log.info('Write file ' + summary_path)
+    with open(summary_path, 'w') as f:
+        print("# Summary of activities for condition: {}".format(os.path.basename(path)), file=f)
+        summary.to_csv(path_or_buf=f,
+                       sep='\t',
+                       na_rep='NaN')
+    return summary_path
+
+
+def select_one_emt_file(path, rest_matrix, coef, comments, intervals=False, values=True):
+    """
+    Parse an *.emt* file, select the activities and write the *.sel* and *_sel.summary* files
+    next to the *.emt* file.
+
+    :param str path: The path of the *.emt* file.
+    :param rest_matrix: The statistics of the rest condition (see :meth:`emg_analyzer.emg.Emg.select`).
+    :type rest_matrix: :class:`pandas.DataFrame` object
+    :param float coef: the multiplying coefficient to apply to the standard deviation.
+    :param comments: The lines to write at the top of the *.sel* file.
+    :type comments: list of string
+    :param bool intervals: True to write the *.sel* file in intervals format (see :func:`write_selected`).
+    :param bool values: False to not write the selected values in intervals format.
+    :return: the paths of the *.sel* and *_sel.summary* files.
+    :rtype: tuple of 2 str
+    """
+    return write_selection(_parse(path), path, rest_matrix, coef, comments, intervals=intervals, values=values)
+
+
+def write_selection(emg, path, rest_matrix, coef, comments, intervals=False, values=True):
+    """
+    Select the activities of *emg* and write the *.sel* and *_sel.summary* files.
+
+    :param emg: The emg to select.
+    :type emg: :class:`emg_analyzer.emg.Emg` object
+    :param str path: The path of the *.emt* file of *emg*.
+    :param rest_matrix: The statistics of the rest condition (see :meth:`emg_analyzer.emg.Emg.select`).
+    :type rest_matrix: :class:`pandas.DataFrame` object
+    :param float coef: the multiplying coefficient to apply to the standard deviation.
+    :param comments: The lines to write at the top of the *.sel* file.
+    :type comments: list of string
+    :param bool intervals: True to write the *.sel* file in intervals format (see :func:`write_selected`).
+    :param bool values: False to not write the selected values in intervals format.
+    :return: the paths of the *.sel* and *_sel.summary* files.
+    :rtype: tuple of 2 str
+    """
+    sel, thresholds = emg.select(rest_matrix, coef=coef)
+    return write_selected(sel, thresholds, path, comments, intervals=intervals, values=values)
+
+
+def write_selected(sel, thresholds, path, comments, intervals=False, values=True):
+    """
+    Write the *.sel* and *_sel.summary* files of activities already selected.
+
+    :param sel: The selected activities (see :meth:`emg_analyzer.emg.Emg.select`).
+    :type sel: :class:`emg_analyzer.emg.Emg` object
+    :param dict thresholds: The threshold of each track.
+    :param str path: The path of the *.emt* file the activities are selected from.
+    :param comments: The lines to write at the top of the *.sel* file.
+    :type comments: list of string
+    :param bool intervals: True to write the *.sel* file in intervals format
+                           (see :class:`emg_analyzer.selection.Selection`), False to write the table of all frames.
+    :param bool values: False to not write the selected values in intervals format.
+    :return: the paths of the *.sel* and *_sel.summary* files.
+    :rtype: tuple of 2 str
+    """
+    from emg_analyzer.emg import activation_summary
+    from emg_analyzer.selection import Selection
+    selection = Selection.from_data(sel.data)
+
+    sel_path = os.path.splitext(path)[0] + '.sel'
+    _log.info('Write file ' + sel_path)
+    if intervals:
+        selection.write(sel_path, comments=comments, values=values)
+    else:
         data = sel.data.data
         data.index.name = 'Frame'
-
-        dest_path = os.path.splitext(path)[0] + '.sel'
-        _log.info('Write file ' + dest_path)
-        with open(dest_path, 'w') as f:
-            print('# Activities selection', file=f)
-            print("# filter {} emg with rest matrix = {}".format(' '.join(args.emg_path), args.rest_matrix), file=f)
-            print("# {}".format(" ".join(sys.argv)), file=f)
+        with open(sel_path, 'w') as f:
+            for comment in comments:
+                print('# ' + comment, file=f)
             data.to_csv(path_or_buf=f,
                         sep='\t',
                         float_format='%.3f',
                         na_rep='NaN')
 
-        thresholds = pd.Series(thresholds, dtype=float)
-        thresholds = thresholds.round(decimals=4)
-        count = pd.Series(data.describe().loc['count'], dtype=int)
-        count.sort_index(inplace=True)
-        frames_num = len(sel.data.data)
-        activation_ratio = count / frames_num
-        activation_ratio = activation_ratio.round(decimals=2)
-        summary = pd.concat([thresholds, count, activation_ratio], axis=1,
-                            sort=True)
-        summary.columns = ['threshold', 'count', 'activation_ratio']
-        summary.index.name = 'muscle'
-        summary = summary[1:]
-
-        dest_path = os.path.splitext(path)[0] + '_sel.summary'
-        _log.info('Write file ' + dest_path)
-        with open(dest_path, 'w') as f:
-            print("# Summary of activities for condition: {}".format(os.path.basename(path)), file=f)
-            summary.to_csv(path_or_buf=f,
-                           sep='\t',
-                           na_rep='NaN')
+    # computed from the intervals, without the NaN of the table
+    tracks = list(thresholds)
+    summary = activation_summary(tracks, [thresholds[t] for t in tracks], selection.count[tracks],
+                                 selection.frames)
+    return sel_path, write_summary(summary, path)
 
 
 if __name__ == '__main__':
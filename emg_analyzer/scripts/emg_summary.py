@@ -12,7 +12,6 @@ import os
 import sys
 import colorlog
 import emg_analyzer
-from emg_analyzer import emg
 from emg_analyzer import argparse_utils
 from emg_analyzer.utils import get_version_message
 
@@ -33,7 +32,7 @@ def main(args=None):
                         help="The path to emg selection file '.sel' or a directory containing '.summary' files.")
     parser.add_argument('--version',
                         action=argparse_utils.VersionAction,
-                        version=get_version_message(),
+                        version=get_version_message,
                         help='Display version and exit.')
     parser.add_argument('-o', '--output',
                         default=sys.stdout,
@@ -74,6 +73,7 @@ def main(args=None):
         elif os.path.isfile(path):
             sum_file_to_aggregate.append(path)
 
+    from emg_analyzer import emg
     summary = emg.desc_summary(sum_file_to_aggregate)
     summary = summary.round({'threshold': 4})
 
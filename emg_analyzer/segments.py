@@ -0,0 +1,209 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Detection of the segments of activity of the tracks.
+
+:meth:`emg_analyzer.emg.EmgData.select` keeps each value greater than the threshold,
+so a single spike counts as activity. A :class:`SegmentDetector` finds instead the onset and offset
+of each segment of activity of each track:
+
+    hysteresis
+        a segment starts when a value is greater than the *on* threshold
+        and goes on while the values are greater than the *off* threshold (lower or equal to the *on* one).
+    gap merging
+        two segments separated by at most *max_gap* inactive frames are merged.
+    minimum duration
+        the segments (once merged) shorter than *min_duration* frames are dropped.
+
+With the same *on* and *off* thresholds, *max_gap=0* and *min_duration=1*,
+the frames of the segments are exactly the frames kept by :meth:`emg_analyzer.emg.EmgData.select`.
+
+The frames are processed chunk by chunk with numpy run-length operations on all the tracks at once.
+The detector keeps the state of each track at the end of a chunk (active or not, the start of
+the segment in progress and the last segment which may still be merged with the next one),
+so the segments of a long file do not depend on the size of the chunks.
+The frames are expected to be consecutive, as in the *.emt* files.
+"""
+
+import numpy as np
+
+from emg_analyzer.selection import Selection
+
+
+class SegmentDetector:
+    """
+    Detect the segments of activity of some tracks, chunk by chunk.
+    """
+
+    def __init__(self, tracks, on_thresholds, off_thresholds=None, min_duration=1, max_gap=0):
+        """
+        :param tracks: The names of the tracks.
+        :type tracks: list of string
+        :param on_thresholds: The threshold of each track to start a segment.
+        :type on_thresholds: :class:`numpy.ndarray` object
+        :param off_thresholds: The threshold of each track to go on with a segment,
+                               None to use *on_thresholds* (no hysteresis).
+        :type off_thresholds: :class:`numpy.ndarray` object
+        :param int min_duration: The minimum number of frames of a segment.
+        :param int max_gap: The maximum number of inactive frames between two segments to merge them.
+        :raise ValueError: if an off threshold is greater than the on threshold
+                           or if *min_duration* or *max_gap* are not valid.
+        """
+        self.tracks = list(tracks)
+        self.on_thresholds = np.asarray(on_thresholds, dtype=np.float64)
+        if off_thresholds is None:
+            self.off_thresholds = self.on_thresholds
+        else:
+            self.off_thresholds = np.asarray(off_thresholds, dtype=np.float64)
+            if (self.off_thresholds > self.on_thresholds).any():
+                raise ValueError("the off thresholds must be lower or equal to the on thresholds")
+        if min_duration < 1:
+            raise ValueError("the minimum duration must be at least 1 frame: {}".format(min_duration))
+        if max_gap < 0:
+            raise ValueError("the maximum gap must be positive: {}".format(max_gap))
+        self.min_duration = int(min_duration)
+        self.max_gap = int(max_gap)
+        self.frames = 0
+        self.first_frame = 0
+        self.start_time = 0.
+        self._last_time = 0.
+        self._last_frame = -1
+        nb_tracks = len(self.tracks)
+        # the state of each track at the last frame
+        self._active = np.zeros(nb_tracks, dtype=bool)
+        # the first frame of the segment in progress (if the track is active)
+        self._open = np.full(nb_tracks, -1, dtype=np.int64)
+        empty = np.zeros(0, dtype=np.int64)
+        # the last closed segment, which may be merged with the next one
+        self._pending = [(empty, empty) for _ in self.tracks]
+        self._starts = [[] for _ in self.tracks]
+        self._stops = [[] for _ in self.tracks]
+
+
+    def update(self, frames, times, values):
+        """
+        Detect the segments in the next frames.
+
+        :param frames: The number of each frame.
+        :type frames: :class:`numpy.ndarray` object
+        :param times: The time of each frame.
+        :type times: :class:`numpy.ndarray` object
+        :param values: The values of the frames, one column by track.
+        :type values: 2D :class:`numpy.ndarray` object
+        :return: this detector
+        :rtype: :class:`SegmentDetector` object
+        """
+        if not len(frames):
+            return self
+        if not self.frames:
+            self.first_frame = int(frames[0])
+            self.start_time = float(times[0])
+        self.frames += len(frames)
+        self._last_frame = int(frames[-1])
+        self._last_time = float(times[-1])
+
+        # the first row is the state at the end of the previous chunk
+        above_off = np.vstack([self._active, values > self.off_thresholds])
+        above_on = np.vstack([self._active, values > self.on_thresholds])
+        rows = np.arange(len(above_off))[:, None]
+        # the first row of the current run of values above the off threshold
+        run_start = np.zeros_like(above_off)
+        run_start[1:] = above_off[1:] & ~above_off[:-1]
+        run_start[0] = above_off[0]
+        run_first = np.maximum.accumulate(np.where(run_start, rows, -1), axis=0)
+        # the last row above the on threshold
+        last_on = np.maximum.accumulate(np.where(above_on, rows, -1), axis=0)
+        # active from the first value above the on threshold to the end of the run
+        active = above_off & (last_on >= run_first)
+        self._active = active[-1]
+
+        change = np.diff(active.astype(np.int8), axis=0)
+        # transposed so the changes are sorted by track then by frame
+        on_tracks, on_rows = np.nonzero(change.T == 1)
+        off_tracks, off_rows = np.nonzero(change.T == -1)
+        on_bounds = np.searchsorted(on_tracks, np.arange(len(self.tracks) + 1))
+        off_bounds = np.searchsorted(off_tracks, np.arange(len(self.tracks) + 1))
+        frames = np.asarray(frames, dtype=np.int64)
+        for i in range(len(self.tracks)):
+            starts = frames[on_rows[on_bounds[i]:on_bounds[i + 1]]]
+            # the segment stops at the frame before the first inactive frame
+            stops = frames[off_rows[off_bounds[i]:off_bounds[i + 1]]] - 1
+            if self._open[i] >= 0:
+                starts = np.concatenate([[self._open[i]], starts])
+            if len(starts) > len(stops):
+                # still active at the end of the chunk
+                self._open[i] = starts[-1]
+                starts = starts[:-1]
+            else:
+                self._open[i] = -1
+            self._close(i, starts, stops)
+        return self
+
+
+    def _close(self, track, starts, stops, last=False):
+        """
+        Merge the segments closed in a chunk with the pending one and keep the segments
+        which cannot be merged anymore.
+
+        :param int track: The position of the track.
+        :param starts: The first frame of each segment.
+        :type starts: :class:`numpy.ndarray` object
+        :param stops: The last frame of each segment.
+        :type stops: :class:`numpy.ndarray` object
+        :param bool last: True if there is no more segment, the pending segment is kept too.
+        """
+        pending_starts, pending_stops = self._pending[track]
+        starts, stops = merge_gaps(np.concatenate([pending_starts, starts]),
+                                   np.concatenate([pending_stops, stops]),
+                                   self.max_gap)
+        if not last and len(starts):
+            # the last segment may be merged with the next one
+            self._pending[track] = (starts[-1:], stops[-1:])
+            starts, stops = starts[:-1], stops[:-1]
+        kept = stops - starts + 1 >= self.min_duration
+        self._starts[track].append(starts[kept])
+        self._stops[track].append(stops[kept])
+
+
+    def finish(self):
+        """
+        Close the segments in progress at the last frame.
+
+        :return: the segments of each track.
+        :rtype: :class:`emg_analyzer.selection.Selection` object
+        """
+        intervals = {}
+        for i, track in enumerate(self.tracks):
+            if self._open[i] >= 0:
+                self._close(i, self._open[i:i + 1], np.array([self._last_frame]), last=True)
+            else:
+                self._close(i, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), last=True)
+            intervals[track] = (np.concatenate(self._starts[i]).astype(np.int64),
+                                np.concatenate(self._stops[i]).astype(np.int64))
+        period = (self._last_time - self.start_time) / (self.frames - 1) if self.frames > 1 else 0.
+        return Selection(self.tracks, self.frames,
+                         first_frame=self.first_frame,
+                         start_time=self.start_time,
+                         period=period,
+                         intervals=intervals)
+
+
+def merge_gaps(starts, stops, max_gap):
+    """
+    :param starts: The first frame of each segment, sorted.
+    :type starts: :class:`numpy.ndarray` object
+    :param stops: The last frame of each segment.
+    :type stops: :class:`numpy.ndarray` object
+    :param int max_gap: The maximum number of frames between two segments to merge them.
+    :return: the first and the last frames of the merged segments.
+    :rtype: tuple of 2 :class:`numpy.ndarray` object
+    """
+    if len(starts) < 2:
+        return starts, stops
+    # the segments are split where the gap with the previous one is too large
+    split = starts[1:] - stops[:-1] - 1 > max_gap
+    return starts[np.concatenate([[True], split])], stops[np.concatenate([split, [True]])]
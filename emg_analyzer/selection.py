@@ -0,0 +1,284 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Sparse representation of the activities selected by :meth:`emg_analyzer.emg.EmgData.select`.
+
+The selection keeps all the frames and replaces the values lower than the threshold by NaN,
+so most of the cells of a *.sel* table are NaN. A :class:`Selection` holds instead,
+for each track, the intervals of consecutive selected frames (first and last frame, both included)
+and, optionally, the selected values.
+
+The intervals format of the *.sel* files is::
+
+    # Activities selection
+    # ...
+    # intervals format: frames=10 first_frame=0 start_time=0.0 period=0.001
+    # intervals tracks: exp1  exp3    exp4
+    track   start   stop
+    exp1    5       9
+    exp3    4       9
+
+The selected values are stored in a *_sel.npz* file next to the *.sel* file, one array by track
+with the values of its intervals one after the other.
+The counts and the activation ratios are computed from the intervals only,
+the table of the selection is rebuilt on demand by :meth:`Selection.to_data`.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+#: The prefix of the comment line which holds the parameters of a *.sel* file in intervals format.
+INTERVALS_TAG = 'intervals format:'
+#: The prefix of the comment line which holds the tracks (separated by tabs) of a *.sel* file in intervals format.
+TRACKS_TAG = 'intervals tracks:'
+
+
+class Selection:
+    """
+    The intervals of activity of each track.
+    """
+
+    def __init__(self, tracks, frames, first_frame=0, start_time=0., period=None, intervals=None, values=None,
+                 time=None, index=None):
+        """
+        :param tracks: The names of the tracks.
+        :type tracks: list of string
+        :param int frames: The number of frames of the recording.
+        :param int first_frame: The number of the first frame.
+        :param float start_time: The time of the first frame.
+        :param float period: The time between 2 frames, None if the times are given by *time*.
+        :param intervals: The first and last frames of the intervals of each track.
+        :type intervals: dict {'track': tuple of 2 :class:`numpy.ndarray` object}
+        :param values: The selected values of each track, in the order of the intervals,
+                       None if the values are not known.
+        :type values: dict {'track': :class:`numpy.ndarray` object}
+        :param time: The time of each frame, if it cannot be computed from *start_time* and *period*.
+        :type time: :class:`numpy.ndarray` object
+        :param index: The number of each frame, None if the frames are consecutive.
+        :type index: :class:`numpy.ndarray` object
+        """
+        self.tracks = list(tracks)
+        self.frames = frames
+        self.first_frame = first_frame
+        self.start_time = start_time
+        self.period = period
+        empty = np.zeros(0, dtype=np.int64)
+        self.intervals = intervals if intervals is not None else {t: (empty, empty) for t in self.tracks}
+        self.values = values
+        self.time = time
+        self.index = index
+
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        :param data: The selected activities, with NaN for the values not selected.
+                     The frames are usually consecutive, otherwise the intervals are split at each gap.
+        :type data: :class:`emg_analyzer.emg.EmgData` object
+        :return: the intervals of the selected values of *data*.
+        :rtype: :class:`Selection` object
+        """
+        tracks = data.tracks
+        values = data._track_values()
+        index = data['Time'].index.to_numpy()
+        time = data['Time'].to_numpy()
+        frames = len(index)
+        first_frame = int(index[0]) if frames else 0
+        # a frame continues the interval of the previous frame if both are selected and consecutive
+        consecutive = np.diff(index) == 1
+        selected = ~np.isnan(values)
+        linked = selected[1:] & selected[:-1] & consecutive[:, None]
+        starts = selected.copy()
+        starts[1:] &= ~linked
+        stops = selected.copy()
+        stops[:-1] &= ~linked
+        # transposed so the intervals are sorted by track then by frame
+        start_tracks, start_rows = np.nonzero(starts.T)
+        stop_tracks, stop_rows = np.nonzero(stops.T)
+        bounds = np.searchsorted(start_tracks, np.arange(len(tracks) + 1))
+        intervals = {}
+        track_values = {}
+        for i, track in enumerate(tracks):
+            intervals[track] = (index[start_rows[bounds[i]:bounds[i + 1]]].astype(np.int64),
+                                index[stop_rows[bounds[i]:bounds[i + 1]]].astype(np.int64))
+            track_values[track] = values[selected[:, i], i]
+
+        new_sel = cls(tracks, frames, first_frame=first_frame, intervals=intervals, values=track_values)
+        if not consecutive.all():
+            new_sel.index = index
+        if frames:
+            new_sel.start_time = float(time[0])
+            new_sel.period = float(time[-1] - time[0]) / (frames - 1) if frames > 1 else 0.
+            # the times must be the same once written with 3 decimals
+            if not np.array_equal(np.round(new_sel._time(), 3), np.round(time, 3)):
+                new_sel.period = None
+                new_sel.time = time
+        return new_sel
+
+
+    def _time(self):
+        """
+        :return: the time of each frame, with 3 decimals as in the *.emt* files if it is computed.
+        :rtype: :class:`numpy.ndarray` object
+        """
+        if self.period is None:
+            return self.time
+        return np.round(self.start_time + np.arange(self.frames) * self.period, 3)
+
+
+    @property
+    def count(self):
+        """
+        :return: the number of selected frames of each track.
+        :rtype: :class:`pandas.Series` object
+        """
+        return pd.Series([int((stops - starts + 1).sum()) for starts, stops in self.intervals.values()],
+                         index=list(self.intervals), dtype=int)
+
+
+    @property
+    def activation_ratio(self):
+        """
+        :return: the ratio of selected frames of each track.
+        :rtype: :class:`pandas.Series` object
+        """
+        return self.count / self.frames
+
+
+    def to_data(self):
+        """
+        Expand the intervals in the table of the selection, as returned by :meth:`emg_analyzer.emg.EmgData.select`.
+
+        :return: all the frames with the selected values and NaN elsewhere.
+        :rtype: :class:`emg_analyzer.emg.EmgData` object
+        :raise RuntimeError: if the values are not known.
+        """
+        from emg_analyzer.emg import EmgData
+        if self.values is None:
+            raise RuntimeError("The selected values are not known.")
+        table = np.full((self.frames, len(self.tracks)), np.nan)
+        for i, track in enumerate(self.tracks):
+            starts, stops = self.intervals[track]
+            lengths = stops - starts + 1
+            if self.index is None:
+                rows = starts - self.first_frame
+            else:
+                rows = np.searchsorted(self.index, starts)
+            # the row of each selected frame: the row of the start of its interval plus its rank in the interval
+            offsets = np.repeat(rows - np.cumsum(lengths) + lengths, lengths)
+            table[offsets + np.arange(lengths.sum()), i] = self.values[track]
+        if self.index is None:
+            index = pd.RangeIndex(self.first_frame, self.first_frame + self.frames, name='Frame')
+        else:
+            index = pd.Index(self.index, name='Frame')
+        data = pd.DataFrame(table, index=index, columns=self.tracks, copy=False)
+        data.insert(0, 'Time', self._time())
+        new_data = EmgData()
+        new_data.data = data
+        return new_data
+
+
+    @staticmethod
+    def values_path(sel_path):
+        """
+        :param str sel_path: The path of a *.sel* file.
+        :return: the path of the file of the selected values.
+        :rtype: str
+        """
+        return os.path.splitext(sel_path)[0] + '_sel.npz'
+
+
+    def write(self, sel_path, comments=(), values=True):
+        """
+        Write the intervals in a *.sel* file and the selected values in a *_sel.npz* file.
+
+        :param str sel_path: The path of the *.sel* file.
+        :param comments: The lines to write at the top of the *.sel* file.
+        :type comments: list of string
+        :param bool values: True to write the selected values.
+        :return: the paths of the files written.
+        :rtype: list of string
+        """
+        params = 'frames={} first_frame={} start_time={!r}'.format(self.frames, self.first_frame, self.start_time)
+        if self.period is not None:
+            params += ' period={!r}'.format(self.period)
+        with open(sel_path, 'w') as f:
+            for comment in comments:
+                print('# ' + comment, file=f)
+            print('# {} {}'.format(INTERVALS_TAG, params), file=f)
+            print('# {}\t{}'.format(TRACKS_TAG, '\t'.join(self.tracks)), file=f)
+            print('track\tstart\tstop', file=f)
+            for track in self.tracks:
+                for start, stop in zip(*self.intervals[track]):
+                    print('{}\t{}\t{}'.format(track, start, stop), file=f)
+        paths = [sel_path]
+        if values and self.values is not None:
+            arrays = {'track_{}'.format(i): self.values[t] for i, t in enumerate(self.tracks)}
+            if self.period is None:
+                arrays['time'] = self.time
+            if self.index is not None:
+                arrays['frame'] = self.index
+            values_path = self.values_path(sel_path)
+            with open(values_path, 'wb') as f:
+                np.savez(f, **arrays)
+            paths.append(values_path)
+        return paths
+
+
+    @classmethod
+    def read(cls, sel_path):
+        """
+        :param str sel_path: The path of a *.sel* file, in intervals or in table format.
+                             The selected values are read in the *_sel.npz* file if it exists.
+        :return: the selection
+        :rtype: :class:`Selection` object
+        """
+        params = None
+        tracks = []
+        comments = 0
+        with open(sel_path) as f:
+            for line in f:
+                if not line.startswith('#'):
+                    break
+                comments += 1
+                comment = line[1:].strip()
+                if comment.startswith(INTERVALS_TAG):
+                    params = dict(p.split('=') for p in comment[len(INTERVALS_TAG):].split())
+                elif comment.startswith(TRACKS_TAG):
+                    tracks = line.rstrip('\n').split('\t')[1:]
+            if params is None:
+                # the table format
+                from emg_analyzer.emg import EmgData
+                f.seek(0)
+                data = EmgData()
+                data.data = pd.read_table(f, comment='#', index_col=0)
+                return cls.from_data(data)
+            f.seek(0)
+            rows = pd.read_table(f, skiprows=comments, dtype={'track': str, 'start': np.int64, 'stop': np.int64})
+        names = rows['track'].to_numpy()
+        bounds = rows[['start', 'stop']].to_numpy()
+        intervals = {}
+        for track in tracks:
+            track_bounds = bounds[names == track]
+            intervals[track] = (track_bounds[:, 0], track_bounds[:, 1])
+        period = float(params['period']) if 'period' in params else None
+        new_sel = cls(tracks, int(params['frames']),
+                      first_frame=int(params['first_frame']),
+                      start_time=float(params['start_time']),
+                      period=period,
+                      intervals=intervals)
+        values_path = cls.values_path(sel_path)
+        if os.path.exists(values_path):
+            with np.load(values_path) as arrays:
+                new_sel.values = {t: arrays['track_{}'.format(i)] for i, t in enumerate(tracks)}
+                if period is None:
+                    new_sel.time = arrays['time']
+                if 'frame' in arrays:
+                    new_sel.index = arrays['frame']
+        return new_sel
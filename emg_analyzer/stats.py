@@ -0,0 +1,352 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Mergeable statistics on the tracks of *.emt* files.
+
+A :class:`Statistics` object holds, for each track, the state needed to describe it
+(count, mean, sum of squares of differences from the mean, min and max)
+and is updated chunk by chunk with the Welford/Chan formulas.
+The values given at once are also read block by block (see :data:`CHUNKSIZE`),
+so the temporary arrays do not depend on the length of the recording and the values
+of a memory-mapped recording are not all loaded in memory.
+Two states can be merged, so the statistics of a file can be computed chunk by chunk,
+the statistics of several files can be pooled and partial states computed by
+several workers can be combined.
+
+The quantiles are optional: they need the number of occurrences of each distinct value.
+As the values of the *.emt* files have 3 decimals the number of distinct values is bounded
+by the range of the values, not by the length of the recordings, and the quantiles are exact.
+"""
+
+import numpy as np
+import pandas as pd
+
+#: The number of frames read at once by :meth:`Statistics.update_values`.
+CHUNKSIZE = 100000
+
+
+class Statistics:
+    """
+    Accumulate the statistics of some tracks.
+    The NaN are skipped as :meth:`pandas.DataFrame.describe` does.
+    """
+
+    def __init__(self, tracks=None, quantiles=True):
+        """
+        :param tracks: The names of the tracks, the tracks can also be added by :meth:`update` or :meth:`merge`.
+        :type tracks: list of string
+        :param bool quantiles: True to keep the distinct values needed to compute the quantiles.
+        """
+        self.tracks = []
+        self.quantiles = quantiles
+        self._count = np.zeros(0, dtype=np.int64)
+        self._mean = np.zeros(0)
+        self._m2 = np.zeros(0)
+        self._min = np.zeros(0)
+        self._max = np.zeros(0)
+        self._values = []
+        if tracks is not None:
+            self._add_tracks(tracks)
+
+
+    def _add_tracks(self, tracks):
+        """
+        Add the tracks which are not already known (without value).
+
+        :param tracks: The names of the tracks.
+        :type tracks: list of string
+        :return: the position of each track of *tracks* in :attr:`tracks`.
+        :rtype: :class:`numpy.ndarray` object
+        """
+        new_tracks = [t for t in tracks if t not in self.tracks]
+        if new_tracks:
+            nb = len(new_tracks)
+            self.tracks.extend(new_tracks)
+            self._count = np.concatenate([self._count, np.zeros(nb, dtype=np.int64)])
+            self._mean = np.concatenate([self._mean, np.zeros(nb)])
+            self._m2 = np.concatenate([self._m2, np.zeros(nb)])
+            self._min = np.concatenate([self._min, np.full(nb, np.nan)])
+            self._max = np.concatenate([self._max, np.full(nb, np.nan)])
+            self._values.extend((np.zeros(0), np.zeros(0, dtype=np.int64)) for _ in new_tracks)
+        return np.array([self.tracks.index(t) for t in tracks], dtype=np.intp)
+
+
+    @classmethod
+    def from_data(cls, data, quantiles=True):
+        """
+        :param data: The data to describe.
+        :type data: :class:`emg_analyzer.emg.EmgData` or :class:`pandas.DataFrame` object
+        :param bool quantiles: True to compute the quantiles.
+        :return: the statistics of *data*
+        :rtype: :class:`Statistics` object
+        """
+        new_stats = cls(quantiles=quantiles)
+        new_stats.update(data)
+        return new_stats
+
+
+    def update(self, data):
+        """
+        Add some frames to these statistics.
+
+        :param data: The frames to add, if it's an EmgData the Time column is ignored.
+                     All tracks of a DataFrame are added.
+        :type data: :class:`emg_analyzer.emg.EmgData` or :class:`pandas.DataFrame` object
+        :return: these statistics
+        :rtype: :class:`Statistics` object
+        """
+        if isinstance(data, pd.DataFrame):
+            # the rows of a DataFrame are converted block by block
+            pos = self._add_tracks(list(data.columns))
+            for start in range(0, len(data), CHUNKSIZE):
+                self._update_block(pos, data.iloc[start:start + CHUNKSIZE].to_numpy(dtype=np.float64))
+            return self
+        return self.update_values(data.tracks, data._track_values())
+
+
+    def update_values(self, tracks, values, chunksize=CHUNKSIZE):
+        """
+        Add some frames to these statistics.
+
+        :param tracks: The names of the tracks.
+        :type tracks: list of string
+        :param values: The values, one column by track, of any float type (a memory-mapped array for instance).
+        :type values: 2D :class:`numpy.ndarray` object
+        :param int chunksize: the number of frames converted in float64 and added at once.
+        :return: these statistics
+        :rtype: :class:`Statistics` object
+        """
+        pos = self._add_tracks(tracks)
+        for start in range(0, len(values), chunksize):
+            self._update_block(pos, np.asarray(values[start:start + chunksize], dtype=np.float64))
+        return self
+
+
+    def _update_block(self, pos, values):
+        """
+        Add a block of frames to these statistics.
+
+        :param pos: The position of the tracks of *values* in :attr:`tracks`.
+        :type pos: :class:`numpy.ndarray` object
+        :param values: The values, one column by track.
+        :type values: 2D :class:`numpy.ndarray` object of float64
+        """
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        present = count > 0
+        # the statistics of the chunk, NaN for the tracks without values
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(present, np.where(valid, values, 0.0).sum(axis=0) / count, np.nan)
+            m2 = np.where(valid, (values - mean) ** 2, 0.0).sum(axis=0)
+        v_min = np.full(len(pos), np.nan)
+        v_max = np.full(len(pos), np.nan)
+        if present.any():
+            v_min[present] = np.nanmin(values[:, present], axis=0)
+            v_max[present] = np.nanmax(values[:, present], axis=0)
+        self._merge_state(pos, count, mean, m2, v_min, v_max)
+        if self.quantiles:
+            for i, p in enumerate(pos):
+                distinct, occurrences = np.unique(values[valid[:, i], i], return_counts=True)
+                self._values[p] = self._merge_values(self._values[p], (distinct, occurrences))
+
+
+    def merge(self, other):
+        """
+        Add the frames described by *other* to these statistics.
+
+        :param other: The statistics to merge, it is not modified.
+                      If *other* has no quantile, the quantiles of these statistics are dropped.
+        :type other: :class:`Statistics` object
+        :return: these statistics
+        :rtype: :class:`Statistics` object
+        """
+        pos = self._add_tracks(other.tracks)
+        self._merge_state(pos, other._count, other._mean, other._m2, other._min, other._max)
+        if self.quantiles and other.quantiles:
+            for i, p in enumerate(pos):
+                self._values[p] = self._merge_values(self._values[p], other._values[i])
+        elif self.quantiles:
+            self.quantiles = False
+            self._values = [(np.zeros(0), np.zeros(0, dtype=np.int64)) for _ in self.tracks]
+        return self
+
+
+    def _merge_state(self, pos, count, mean, m2, v_min, v_max):
+        """
+        Merge the state of some tracks with the formulas of Chan et al.
+
+        :param pos: The position of the tracks in :attr:`tracks`.
+        :type pos: :class:`numpy.ndarray` object
+        :param count: The number of values of each track.
+        :param mean: The mean of each track.
+        :param m2: The sum of squares of differences from the mean of each track.
+        :param v_min: The min of each track.
+        :param v_max: The max of each track.
+        """
+        count_a = self._count[pos]
+        total = count_a + count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mean - self._mean[pos]
+            new_mean = self._mean[pos] + delta * count / total
+            new_m2 = self._m2[pos] + m2 + delta ** 2 * count_a * count / total
+        # keep the state of the tracks which get no value
+        empty = count == 0
+        self._mean[pos] = np.where(empty, self._mean[pos], np.where(count_a == 0, mean, new_mean))
+        self._m2[pos] = np.where(empty, self._m2[pos], np.where(count_a == 0, m2, new_m2))
+        self._count[pos] = total
+        # fmin/fmax skip the NaN of the tracks without value
+        self._min[pos] = np.fmin(self._min[pos], v_min)
+        self._max[pos] = np.fmax(self._max[pos], v_max)
+
+
+    @staticmethod
+    def _merge_values(values_a, values_b):
+        """
+        :param values_a: The distinct values and their number of occurrences.
+        :type values_a: tuple of 2 :class:`numpy.ndarray` object
+        :param values_b: The distinct values and their number of occurrences.
+        :type values_b: tuple of 2 :class:`numpy.ndarray` object
+        :return: the distinct values of both and their number of occurrences.
+        :rtype: tuple of 2 :class:`numpy.ndarray` object
+        """
+        if not len(values_a[0]):
+            return values_b
+        if not len(values_b[0]):
+            return values_a
+        distinct, inverse = np.unique(np.concatenate([values_a[0], values_b[0]]), return_inverse=True)
+        occurrences = np.bincount(inverse, weights=np.concatenate([values_a[1], values_b[1]]))
+        return distinct, occurrences.astype(np.int64)
+
+
+    @property
+    def count(self):
+        """
+        :return: the number of values (NaN excluded) of each track.
+        :rtype: :class:`pandas.Series` object
+        """
+        return pd.Series(self._count, index=self.tracks, dtype=np.float64)
+
+
+    @property
+    def mean(self):
+        """
+        :return: the mean of each track.
+        :rtype: :class:`pandas.Series` object
+        """
+        return pd.Series(np.where(self._count > 0, self._mean, np.nan), index=self.tracks)
+
+
+    @property
+    def std(self):
+        """
+        :return: the standard deviation (normalized by N-1) of each track.
+        :rtype: :class:`pandas.Series` object
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = np.where(self._count > 1, self._m2 / (self._count - 1), np.nan)
+        return pd.Series(np.sqrt(var), index=self.tracks)
+
+
+    @property
+    def min(self):
+        """
+        :return: the min of each track.
+        :rtype: :class:`pandas.Series` object
+        """
+        return pd.Series(self._min, index=self.tracks)
+
+
+    @property
+    def max(self):
+        """
+        :return: the max of each track.
+        :rtype: :class:`pandas.Series` object
+        """
+        return pd.Series(self._max, index=self.tracks)
+
+
+    def quantile(self, q):
+        """
+        :param float q: The quantile to compute, between 0 and 1.
+                        The values are interpolated linearly as :meth:`pandas.DataFrame.quantile` does.
+        :return: the quantile *q* of each track.
+        :rtype: :class:`pandas.Series` object
+        :raise RuntimeError: if these statistics do not keep the quantiles.
+        """
+        if not self.quantiles:
+            raise RuntimeError("The quantiles are not computed.")
+        result = []
+        for distinct, occurrences in self._values:
+            if not len(distinct):
+                result.append(np.nan)
+                continue
+            # the rank of the last occurrence of each distinct value
+            last_rank = np.cumsum(occurrences) - 1
+            rank = (last_rank[-1]) * q
+            below = int(np.floor(rank))
+            above = min(below + 1, last_rank[-1])
+            low = distinct[np.searchsorted(last_rank, below)]
+            high = distinct[np.searchsorted(last_rank, above)]
+            frac = rank - below
+            # the same interpolation as numpy
+            result.append(high - (high - low) * (1 - frac) if frac >= 0.5 else low + (high - low) * frac)
+        return pd.Series(result, index=self.tracks, dtype=np.float64)
+
+
+    def describe(self, percentiles=(.25, .5, .75)):
+        """
+        :param percentiles: The quantiles to include in the result, ignored if the quantiles are not computed.
+        :type percentiles: list of float
+        :return: the same statistics as :meth:`pandas.DataFrame.describe`, one column by track.
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        rows = [('count', self.count), ('mean', self.mean), ('std', self.std), ('min', self.min)]
+        if self.quantiles:
+            rows += [('{:g}%'.format(q * 100), self.quantile(q)) for q in percentiles]
+        rows.append(('max', self.max))
+        return pd.DataFrame([row for _, row in rows],
+                            index=[name for name, _ in rows],
+                            columns=self.tracks)
+
+
+    def to_dict(self):
+        """
+        :return: the state of these statistics, it can be saved in json.
+        :rtype: dict
+        """
+        state = {'tracks': list(self.tracks),
+                 'quantiles': self.quantiles,
+                 'count': self._count.tolist(),
+                 'mean': self._mean.tolist(),
+                 'm2': self._m2.tolist(),
+                 'min': self._min.tolist(),
+                 'max': self._max.tolist()}
+        if self.quantiles:
+            state['values'] = [[distinct.tolist(), occurrences.tolist()] for distinct, occurrences in self._values]
+        return state
+
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        :param dict state: The state of the statistics as returned by :meth:`to_dict`.
+        :return: new statistics
+        :rtype: :class:`Statistics` object
+        """
+        new_stats = cls(quantiles=state['quantiles'])
+        new_stats.tracks = list(state['tracks'])
+        new_stats._count = np.array(state['count'], dtype=np.int64)
+        new_stats._mean = np.array(state['mean'], dtype=np.float64)
+        new_stats._m2 = np.array(state['m2'], dtype=np.float64)
+        new_stats._min = np.array(state['min'], dtype=np.float64)
+        new_stats._max = np.array(state['max'], dtype=np.float64)
+        if new_stats.quantiles:
+            new_stats._values = [(np.array(distinct, dtype=np.float64), np.array(occurrences, dtype=np.int64))
+                                 for distinct, occurrences in state['values']]
+        else:
+            new_stats._values = [(np.zeros(0), np.zeros(0, dtype=np.int64)) for _ in new_stats.tracks]
+        return new_stats
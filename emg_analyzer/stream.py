@@ -0,0 +1,273 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Out-of-core processing of *.emt* files.
+
+The functions of this module read the *.emt* file chunk by chunk (see :meth:`emg_analyzer.emg.Emg.iter_chunks`)
+and write the result chunk by chunk, so the memory used does not depend on the length of the recording.
+The normalizations are done in two passes: the first one computes the min and max,
+the second one rescales, rounds and writes each chunk with the same operations as
+:meth:`emg_analyzer.emg.EmgData.norm` and :meth:`emg_analyzer.emg.EmgData.norm_by_track`,
+so the results are exactly the same as the in memory normalizations.
+The statistics (see :mod:`emg_analyzer.stats`), the activation summaries, the features on
+a sliding window (see :mod:`emg_analyzer.window`) and the segments of activity
+(see :mod:`emg_analyzer.segments`) are computed in one pass.
+"""
+
+import numpy as np
+import pandas as pd
+import colorlog
+
+_log = colorlog.getLogger('emg_analyzer.stream')
+
+from emg_analyzer.emg import Emg, EmgData, CHUNKSIZE
+from emg_analyzer.emg import activation_summary as _summary_frame, activation_sweep as _sweep_frame
+from emg_analyzer.stats import Statistics
+from emg_analyzer.window import MovingWindow
+
+
+def _iter_chunks(emt_path, chunksize, cache, dtype, tracks=None):
+    """
+    :param str emt_path: the path of the *.emt* file to read.
+    :param int chunksize: the number of frames by chunk.
+    :param cache: The cache to use, None to use the default cache, False to not use any cache.
+    :type cache: :class:`emg_analyzer.cache.EmtCache` object
+    :param dtype: The type of the tracks values.
+    :type dtype: :class:`numpy.dtype` object or string
+    :param tracks: The names of the tracks to read, None to read all tracks.
+    :type tracks: list of string
+    :return: the emg (with the header only) and the chunks of its data.
+    :rtype: tuple (:class:`emg_analyzer.emg.Emg` object, iterator on :class:`emg_analyzer.emg.EmgData` objects)
+    """
+    emg = Emg()
+    with open(emt_path) as emt_file:
+        chunks = emg.iter_chunks(emt_file, chunksize=chunksize, cache=cache, tracks=tracks, dtype=dtype)
+        # the file must stay open while the chunks are read
+        yield emg
+        yield from chunks
+
+
+def _open_chunks(emt_path, chunksize, cache, dtype, tracks=None):
+    """
+    :return: the emg (with the header only) and the chunks of its data (see :func:`_iter_chunks`).
+    """
+    chunks = _iter_chunks(emt_path, chunksize, cache, dtype, tracks=tracks)
+    return next(chunks), chunks
+
+
+def norm(emt_path, file, v_min=None, v_max=None, chunksize=CHUNKSIZE, cache=None, dtype=None):
+    """
+    Normalize all tracks together (see :meth:`emg_analyzer.emg.EmgData.norm`)
+    and write the result in *.emt* format.
+
+    :param str emt_path: the path of the *.emt* file to normalize.
+    :param file: the buffer to write the normalized emg to.
+    :type file: file-like object
+    :param float v_min: The min value to use to normalize, if None use the min of the matrix.
+    :param float v_max: The max value to use to normalize, if None use the max of the matrix.
+    :param int chunksize: the number of frames by chunk.
+    :param cache: The cache to use, None to use the default cache, False to not use any cache.
+    :type cache: :class:`emg_analyzer.cache.EmtCache` object
+    :param dtype: The type of the tracks values, None for float64.
+    :type dtype: :class:`numpy.dtype` object or string
+    """
+    if v_min is None or v_max is None:
+        # first pass
+        data_min = data_max = None
+        _, chunks = _open_chunks(emt_path, chunksize, cache, dtype)
+        for chunk in chunks:
+            if data_min is None:
+                data_min, data_max = chunk.min, chunk.max
+            else:
+                # fmin/fmax skip the NaN as pandas does
+                data_min = np.fmin(data_min, chunk.min)
+                data_max = np.fmax(data_max, chunk.max)
+        if v_min is None:
+            v_min = data_min
+        if v_max is None:
+            # the subtraction is monotonic so it's the max of data - v_min as in EmgData.norm
+            v_max = data_max - v_min
+        _log.debug("v_min = {} v_max = {}".format(v_min, v_max))
+    emg, chunks = _open_chunks(emt_path, chunksize, cache, dtype)
+    emg.header.to_tsv(file=file)
+    for chunk in chunks:
+        chunk.norm(v_min=v_min, v_max=v_max).to_tsv(file=file)
+
+
+def norm_by_track(emt_path, file, dyn_cal=None, chunksize=CHUNKSIZE, cache=None, dtype=None):
+    """
+    Normalize each track independently (see :meth:`emg_analyzer.emg.EmgData.norm_by_track`)
+    and write the result in *.emt* format.
+
+    :param str emt_path: the path of the *.emt* file to normalize.
+    :param file: the buffer to write the normalized emg to.
+    :type file: file-like object
+    :param dyn_cal: The min and max for each muscle to normalize, if None use the min and max of each track.
+    :type dyn_cal: :class:`pandas.DataFrame` object
+    :param int chunksize: the number of frames by chunk.
+    :param cache: The cache to use, None to use the default cache, False to not use any cache.
+    :type cache: :class:`emg_analyzer.cache.EmtCache` object
+    :param dtype: The type of the tracks values, None for float64.
+    :type dtype: :class:`numpy.dtype` object or string
+    """
+    if dyn_cal is None:
+        # first pass
+        tracks_min = tracks_max = None
+        _, chunks = _open_chunks(emt_path, chunksize, cache, dtype)
+        for chunk in chunks:
+            _, data = chunk._split_data()
+            if tracks_min is None:
+                tracks_min, tracks_max = data.min(), data.max()
+            else:
+                tracks_min = np.fmin(tracks_min, data.min())
+                tracks_max = np.fmax(tracks_max, data.max())
+        if tracks_min is not None:
+            # keep the type of the values, the arithmetic must be the same as in memory
+            dyn_cal = pd.DataFrame({col: pd.Series([tracks_min[col], tracks_max[col]],
+                                                   index=['min', 'max'],
+                                                   dtype=tracks_min.dtype)
+                                    for col in tracks_min.index})
+    emg, chunks = _open_chunks(emt_path, chunksize, cache, dtype)
+    emg.header.to_tsv(file=file)
+    for chunk in chunks:
+        chunk.norm_by_track(emg.header.tracks_names, dyn_cal=dyn_cal).to_tsv(file=file)
+
+
+def moving(emt_path, file, feature, window, chunksize=CHUNKSIZE, cache=None, dtype=None):
+    """
+    Compute a feature of the tracks on a sliding window (see :meth:`emg_analyzer.emg.EmgData.moving`)
+    in one pass and write the result in *.emt* format.
+
+    :param str emt_path: the path of the *.emt* file.
+    :param file: the buffer to write the result to.
+    :type file: file-like object
+    :param str feature: The feature to compute: 'mean', 'rms' or 'envelope' (see :mod:`emg_analyzer.window`).
+    :param int window: The number of frames of the window.
+    :param int chunksize: the number of frames by chunk.
+    :param cache: The cache to use, None to use the default cache, False to not use any cache.
+    :type cache: :class:`emg_analyzer.cache.EmtCache` object
+    :param dtype: The type of the tracks values, None for float64.
+    :type dtype: :class:`numpy.dtype` object or string
+    """
+    # checks the arguments before writing anything
+    moving_window = MovingWindow(feature, window)
+    emg, chunks = _open_chunks(emt_path, chunksize, cache, dtype)
+    emg.header.to_tsv(file=file)
+    for chunk in chunks:
+        # the window keeps the last frames of each chunk
+        chunk._moved(moving_window, chunksize=chunksize).to_tsv(file=file)
+
+
+def activation_summary(emt_path, rest_matrix, coef=1.5, chunksize=CHUNKSIZE, cache=None, dtype=None):
+    """
+    Count the values of an *.emt* file which would be selected by :meth:`emg_analyzer.emg.EmgData.select`
+    in one pass, without building the selected data (see :meth:`emg_analyzer.emg.EmgData.activation_summary`).
+
+    :param str emt_path: the path of the *.emt* file.
+    :param rest_matrix: The statistics of the tracks in rest condition.
+    :type rest_matrix: :class:`pandas.DataFrame` object
+    :param float coef: the multiplying coefficient to apply to the standard deviation.
+    :param int chunksize: the number of frames by chunk.
+    :param cache: The cache to use, None to use the default cache, False to not use any cache.
+    :type cache: :class:`emg_analyzer.cache.EmtCache` object
+    :param dtype: The type of the tracks values, None for float64.
+    :type dtype: :class:`numpy.dtype` object or string
+    :return: the threshold, the count of selected frames and the activation ratio of each track.
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    emg, chunks = _open_chunks(emt_path, chunksize, cache, dtype)
+    tracks = emg.header.tracks_names
+    thresholds = EmgData._thresholds(rest_matrix, tracks, coef)
+    count = np.zeros(len(tracks), dtype=np.int64)
+    frames = 0
+    for chunk in chunks:
+        count += chunk._activation_count(thresholds, chunksize=chunksize)
+        frames += chunk.frames
+    return _summary_frame(tracks, thresholds, count, frames)
+
+
+def activation_sweep(emt_path, rest_matrix, coefs, chunksize=CHUNKSIZE, cache=None, dtype=None):
+    """
+    Count the values of an *.emt* file which would be selected by :meth:`emg_analyzer.emg.EmgData.select`
+    for several coefficients in one pass (see :meth:`emg_analyzer.emg.EmgData.activation_sweep`).
+
+    :param str emt_path: the path of the *.emt* file.
+    :param rest_matrix: The statistics of the tracks in rest condition.
+    :type rest_matrix: :class:`pandas.DataFrame` object
+    :param coefs: the multiplying coefficients to apply to the standard deviation.
+    :type coefs: list of float
+    :param int chunksize: the number of frames by chunk.
+    :param cache: The cache to use, None to use the default cache, False to not use any cache.
+    :type cache: :class:`emg_analyzer.cache.EmtCache` object
+    :param dtype: The type of the tracks values, None for float64.
+    :type dtype: :class:`numpy.dtype` object or string
+    :return: the summary of the activities for each coefficient, indexed by coefficient and muscle.
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    emg, chunks = _open_chunks(emt_path, chunksize, cache, dtype)
+    tracks = emg.header.tracks_names
+    thresholds = np.array([EmgData._thresholds(rest_matrix, tracks, coef) for coef in coefs]).reshape(-1, len(tracks))
+    counts = np.zeros(thresholds.shape, dtype=np.int64)
+    frames = 0
+    for chunk in chunks:
+        counts += chunk._activation_counts(thresholds, chunksize=chunksize)
+        frames += chunk.frames
+    return _sweep_frame(tracks, coefs, thresholds, counts, frames)
+
+
+def detect_segments(emt_path, rest_matrix, coef=1.5, off_coef=None, min_duration=1, max_gap=0,
+                    chunksize=CHUNKSIZE, cache=None, dtype=None):
+    """
+    Detect the segments of activity of the tracks of an *.emt* file in one pass
+    (see :meth:`emg_analyzer.emg.EmgData.detect_segments`).
+
+    :param str emt_path: the path of the *.emt* file.
+    :param rest_matrix: The statistics of the tracks in rest condition.
+    :type rest_matrix: :class:`pandas.DataFrame` object
+    :param float coef: the multiplying coefficient of the standard deviation to start a segment.
+    :param float off_coef: the multiplying coefficient of the standard deviation to go on with a segment,
+                           None to use *coef*.
+    :param int min_duration: the minimum number of frames of a segment.
+    :param int max_gap: the maximum number of inactive frames between two segments to merge them.
+    :param int chunksize: the number of frames by chunk.
+    :param cache: The cache to use, None to use the default cache, False to not use any cache.
+    :type cache: :class:`emg_analyzer.cache.EmtCache` object
+    :param dtype: The type of the tracks values, None for float64.
+    :type dtype: :class:`numpy.dtype` object or string
+    :return: the segments of each track.
+    :rtype: :class:`emg_analyzer.selection.Selection` object
+    """
+    emg, chunks = _open_chunks(emt_path, chunksize, cache, dtype)
+    detector = EmgData._segment_detector(rest_matrix, emg.header.tracks_names, coef=coef, off_coef=off_coef,
+                                         min_duration=min_duration, max_gap=max_gap)
+    for chunk in chunks:
+        # the detector keeps the segments in progress at the end of each chunk
+        chunk._detect(detector, chunksize=chunksize)
+    return detector.finish()
+
+
+def statistics(emt_path, tracks=None, quantiles=True, chunksize=CHUNKSIZE, cache=None, dtype=None):
+    """
+    Compute the statistics of the tracks of an *.emt* file in one pass.
+
+    :param str emt_path: the path of the *.emt* file to describe.
+    :param tracks: The names of the tracks to describe, None to describe all tracks.
+    :type tracks: list of string
+    :param bool quantiles: True to compute the quantiles.
+    :param int chunksize: the number of frames by chunk.
+    :param cache: The cache to use, None to use the default cache, False to not use any cache.
+    :type cache: :class:`emg_analyzer.cache.EmtCache` object
+    :param dtype: The type of the tracks values, None for float64.
+    :type dtype: :class:`numpy.dtype` object or string
+    :return: the statistics of the tracks, they can be merged with the statistics of other files.
+    :rtype: :class:`emg_analyzer.stats.Statistics` object
+    """
+    emg, chunks = _open_chunks(emt_path, chunksize, cache, dtype, tracks=tracks)
+    stats = Statistics(tracks=emg.header.tracks_names, quantiles=quantiles)
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
@@ -6,12 +6,15 @@
 
 import os
 import sys
+import json
+import hashlib
+import queue
+import threading
+import concurrent.futures
 
 import colorlog
 _log = colorlog.getLogger(__name__)
 
-from emg_analyzer import emg
-
 
 def get_version_message():
     import emg_analyzer
@@ -29,7 +32,63 @@ Using:
     return version_text
 
 
-def process_one_emt_file(emt_path, method_name, method_args, method_kwargs, dest='', suffix=''):
+def prefetch(func, items, size=1):
+    """
+    Apply *func* on each item in a background thread, at most *size* results ahead of the consumer.
+    So the next items are read while the current one is processed,
+    and at most *size* + 1 results are held in memory at once.
+
+    :param func: the function to apply on each item (to parse a file for instance).
+    :type func: callable
+    :param items: the items to process.
+    :type items: iterable
+    :param int size: the maximum number of results computed in advance.
+    :return: the items and their result, in the order of *items*.
+             If *func* raises an exception, the exception is raised when its result should be yielded.
+    :rtype: iterator on tuple (item, result)
+    """
+    results = queue.Queue()
+    # a slot is taken for each result computed and released when the consumer is done with it
+    slots = threading.Semaphore(size + 1)
+    stop = threading.Event()
+
+    def produce():
+        for item in items:
+            # do not block forever if the consumer gave up
+            while not slots.acquire(timeout=0.1):
+                if stop.is_set():
+                    return
+            if stop.is_set():
+                return
+            try:
+                results.put((item, func(item), None))
+            except Exception as err:
+                results.put((item, None, err))
+                return
+        results.put(None)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            result = results.get()
+            if result is None:
+                break
+            item, value, err = result
+            if err is not None:
+                raise err
+            del result
+            yield item, value
+            # the consumer is done with this result
+            del value
+            slots.release()
+    finally:
+        stop.set()
+        producer.join()
+
+
+def process_one_emt_file(emt_path, method_name, method_args, method_kwargs, dest='', suffix='', dtype=None,
+                         chunksize=None, inplace=False):
     """
 
     :param emt_path: the path of the emt file to process.
@@ -39,15 +98,16 @@ def process_one_emt_file(emt_path, method_name, method_args, method_kwargs, dest
     :param dtr dest: the directory to put the normalized file,
                      default is current working directory.
     :param suffix: the suffix to postpend to the file.
+    :param dtype: the type of the tracks values, None for float64 (see :meth:`emg.Emg.parse`).
+    :type dtype: :class:`numpy.dtype` object or string
+    :param int chunksize: if not None, the file is processed chunk by chunk with the function *method_name*
+                          of :mod:`emg_analyzer.stream`, so the file is never loaded entirely in memory.
+    :param bool inplace: if True, the method is called with ``inplace=True``: the parsed emg is not used
+                         afterwards, there is no need to copy its data. The method must accept this argument.
+                         Ignored if *chunksize* is not None.
     :return: the path to the processed file.
     :rtype: str
     """
-    my_emg = emg.Emg()
-    with open(emt_path) as emg_file:
-        my_emg.parse(emg_file)
-
-    processed_emg = getattr(my_emg, method_name)(*method_args, **method_kwargs)
-
     root_dir, basename = os.path.split(emt_path)
     processed_filename, ext = os.path.splitext(basename)
     processed_filename = processed_filename.replace(' ', '_')
@@ -56,13 +116,264 @@ def process_one_emt_file(emt_path, method_name, method_args, method_kwargs, dest
                                                      ext=ext)
     processed_path = os.path.join(dest, processed_filename)
 
+    if chunksize is not None:
+        from emg_analyzer import stream
+        # the chunks are written as they are processed, the output is complete only if all went well
+        tmp_path = processed_path + '.part'
+        try:
+            with open(tmp_path, 'w') as processed_file:
+                _log.debug('write ' + processed_path)
+                getattr(stream, method_name)(emt_path, processed_file, *method_args,
+                                             chunksize=chunksize, dtype=dtype, **method_kwargs)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        os.replace(tmp_path, processed_path)
+        return processed_path
+
+    from emg_analyzer import emg
+    my_emg = emg.Emg()
+    with open(emt_path) as emg_file:
+        my_emg.parse(emg_file, dtype=dtype)
+
+    if inplace:
+        method_kwargs = dict(method_kwargs, inplace=True)
+    processed_emg = getattr(my_emg, method_name)(*method_args, **method_kwargs)
+
     with open(processed_path, 'w') as processed_file:
         _log.debug('write ' + processed_path)
         processed_emg.to_emt(file=processed_file)
     return processed_path
 
 
-def process_dir(path, method_name, method_args, method_kwargs, dest='', suffix=''):
+class ProcessingError(RuntimeError):
+    """
+    Raised when some files of a directory cannot be processed.
+    The other files have been processed.
+    """
+
+    def __init__(self, processed_path, errors):
+        """
+        :param str processed_path: the path to the processed directory.
+        :param dict errors: the errors {'emt path': exception}
+        """
+        self.processed_path = processed_path
+        self.errors = errors
+        super().__init__("{} file(s) cannot be processed: {}".format(len(errors), ', '.join(sorted(errors))))
+
+
+class ManifestError(RuntimeError):
+    """
+    Raised when an existing processed directory cannot be completed incrementally:
+    it has no manifest or it has been processed with other parameters.
+    """
+    pass
+
+
+def file_signature(path, checksum=False):
+    """
+    :param str path: the path of the file.
+    :param bool checksum: True to compute the sha256 of the content of the file.
+    :return: the size and the modification time of the file and, if *checksum* is True, its sha256.
+    :rtype: dict
+    """
+    stat = os.stat(path)
+    signature = {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+    if checksum:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        signature['sha256'] = sha.hexdigest()
+    return signature
+
+
+class Manifest:
+    """
+    The record of the files of a processed directory, so the directory can be completed incrementally.
+
+    The manifest is a json lines file at the root of the processed directory.
+    The first line holds the parameters of the processing, each following line records
+    one processed file: the signature of the input (see :func:`file_signature`)
+    and the path of the output, both relative to their directory.
+    A line is appended as soon as a file is processed, so an interrupted run can be resumed,
+    and the file is rewritten without the superseded lines at the end of the run.
+    """
+
+    name = '.manifest.jsonl'
+
+    def __init__(self, processed_path, parameters):
+        """
+        :param str processed_path: the path of the processed directory.
+        :param dict parameters: the parameters of the processing, which determine the content of the outputs.
+        """
+        self.processed_path = processed_path
+        self.path = os.path.join(processed_path, self.name)
+        self.parameters = parameters
+        self.files = {}
+        self._journal = None
+
+
+    def _header(self):
+        """
+        :return: the description of the parameters written in the first line of the manifest.
+                 The values which cannot be written in json (a DataFrame for instance) are only taken in account
+                 in the fingerprint of the parameters.
+        :rtype: dict
+        """
+        def canonical(obj):
+            return obj.to_csv() if hasattr(obj, 'to_csv') else repr(obj)
+        text = json.dumps(self.parameters, sort_keys=True, default=canonical)
+        return {'method': self.parameters.get('method'),
+                'suffix': self.parameters.get('suffix'),
+                'dtype': self.parameters.get('dtype'),
+                'fingerprint': hashlib.sha256(text.encode()).hexdigest()}
+
+
+    def load(self):
+        """
+        Read the manifest of the processed directory.
+
+        :return: this manifest
+        :rtype: :class:`Manifest` object
+        :raise ManifestError: if there is no manifest or if the directory has been processed with other parameters.
+        """
+        if not os.path.exists(self.path):
+            raise ManifestError("directory '{}' exists without manifest, "
+                                "it cannot be completed incrementally, remove it.".format(self.processed_path))
+        with open(self.path) as f:
+            lines = f.readlines()
+        header = self._header()
+        recorded = json.loads(lines[0]) if lines else {}
+        if recorded != header:
+            diff = ', '.join("{}: {} instead of {}".format(k, recorded.get(k), v)
+                             for k, v in header.items() if k != 'fingerprint' and recorded.get(k) != v)
+            diff = diff or 'other method arguments'
+            raise ManifestError("directory '{}' has been processed with other parameters ({}), "
+                                "remove it or use the same parameters.".format(self.processed_path, diff))
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # the last line of an interrupted run can be truncated
+                _log.warning("skip truncated line in manifest '{}'".format(self.path))
+                continue
+            if entry['output'] is None:
+                self.files.pop(entry['input'], None)
+            else:
+                self.files[entry['input']] = entry
+        return self
+
+
+    def is_up_to_date(self, emt_rel_path, signature):
+        """
+        :param str emt_rel_path: the path of an input relative to the processed directory.
+        :param dict signature: the current signature of the input (see :func:`file_signature`).
+        :return: True if the output exists and the input has the same size and modification time
+                 or the same sha256 as when the output has been written.
+        :rtype: bool
+        """
+        entry = self.files.get(emt_rel_path)
+        if entry is None or not os.path.exists(os.path.join(self.processed_path, entry['output'])):
+            return False
+        recorded = entry['signature']
+        if recorded['size'] != signature['size']:
+            return False
+        if recorded['mtime'] == signature['mtime']:
+            return True
+        return 'sha256' in recorded and recorded['sha256'] == signature.get('sha256')
+
+
+    def start(self):
+        """
+        Open the manifest to record the files of a run. A new manifest is created with its header
+        before any file is processed, so a run interrupted during its first file can be resumed.
+        """
+        if self._journal is None:
+            new = not os.path.exists(self.path)
+            self._journal = open(self.path, 'a')
+            if new:
+                self._journal.write(json.dumps(self._header()) + '\n')
+                self._journal.flush()
+
+
+    def _append(self, entry):
+        self.start()
+        self._journal.write(json.dumps(entry) + '\n')
+        # the entry must survive a crash of the process
+        self._journal.flush()
+
+
+    def record(self, emt_rel_path, signature, output_path):
+        """
+        Record that an input has been processed.
+
+        :param str emt_rel_path: the path of the input relative to the directory processed.
+        :param dict signature: the signature of the input when it has been processed.
+        :param str output_path: the path of the output.
+        """
+        entry = {'input': emt_rel_path,
+                 'signature': signature,
+                 'output': os.path.relpath(output_path, self.processed_path)}
+        self.files[emt_rel_path] = entry
+        self._append(entry)
+
+
+    def forget(self, emt_rel_path):
+        """
+        Remove an input which does not exist anymore and its output.
+
+        :param str emt_rel_path: the path of the input relative to the directory processed.
+        """
+        entry = self.files.pop(emt_rel_path)
+        output_path = os.path.join(self.processed_path, entry['output'])
+        if os.path.exists(output_path):
+            _log.warning("remove '{}': '{}' does not exist anymore".format(output_path, emt_rel_path))
+            os.unlink(output_path)
+        self._append({'input': emt_rel_path, 'output': None})
+
+
+    def close(self):
+        """
+        Rewrite the manifest with one line by processed file.
+        """
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps(self._header()) + '\n')
+            for emt_rel_path in sorted(self.files):
+                f.write(json.dumps(self.files[emt_rel_path]) + '\n')
+        os.replace(tmp_path, self.path)
+
+
+def _plan_dir(path, processed_path, suffix, exist_ok=False):
+    """
+    walk recursively through path and create the tree of the processed directories.
+
+    :param str path: the path of the dir to process.
+    :param str processed_path: the path of the processed directory corresponding to *path*.
+    :param str suffix: the suffix to postpend to the path last element.
+    :param bool exist_ok: if False raise an error if a processed directory already exists.
+    :return: the emt files to process and the directory where to write the results.
+    :rtype: list of tuple (str, str)
+    """
+    os.makedirs(processed_path, exist_ok=exist_ok)
+    tasks = []
+    with os.scandir(path) as dir_it:
+        entries = sorted(dir_it, key=lambda e: e.name)
+    for entry in entries:
+        if not entry.name.startswith('.') and entry.is_file() and entry.name.endswith('.emt'):
+            tasks.append((entry.path, processed_path))
+        elif entry.is_dir():
+            sub_dir = "{}_{}".format(entry.name.replace(' ', '_'), suffix)
+            tasks.extend(_plan_dir(entry.path, os.path.join(processed_path, sub_dir), suffix, exist_ok=exist_ok))
+    return tasks
+
+
+def process_dir(path, method_name, method_args, method_kwargs, dest='', suffix='', jobs=1, dtype=None,
+                chunksize=None, incremental=False, checksum=False, inplace=False):
     """
     walk recursively through path and process each .emt file
     the results are write in a new tree file postpend with suffix.
@@ -73,8 +384,23 @@ def process_dir(path, method_name, method_args, method_kwargs, dest='', suffix='
     :param dict method_kwargs: the keywords args to pass to the method
     :param str dest: the directory to write down the normalized file.
     :param str suffix: the suffix to postpend to the path last element.
+    :param int jobs: the number of processes to use to process the files.
+                     The largest files are processed first.
+    :param dtype: the type of the tracks values, None for float64 (see :meth:`emg.Emg.parse`).
+    :type dtype: :class:`numpy.dtype` object or string
+    :param int chunksize: if not None, process the files chunk by chunk (see :func:`process_one_emt_file`).
+    :param bool incremental: if True, record the processed files in a :class:`Manifest`.
+                             If the processed directory already exists, only the files which are new,
+                             have changed or have not been processed (by an interrupted run for instance)
+                             are processed and the outputs of the files which do not exist anymore are removed.
+    :param bool checksum: if True, the files whose modification time changed are compared on their sha256
+                          to know if they must be processed again, otherwise on their size and modification time.
+    :param bool inplace: if True, call the method with ``inplace=True`` (see :func:`process_one_emt_file`).
     :return: the path to the processed directory
     :rtype: str
+    :raise ProcessingError: if some files cannot be processed, after processing all the others.
+    :raise IOError: if the processed directory already exists and *incremental* is False.
+    :raise ManifestError: if the processed directory cannot be completed incrementally.
     """
     path = path.rstrip(os.sep)
     root_dir, basename = os.path.split(path)
@@ -83,16 +409,99 @@ def process_dir(path, method_name, method_args, method_kwargs, dest='', suffix='
         processed_path = os.path.join(dest, norm_dir)
     else:
         processed_path = os.path.join(root_dir, norm_dir)
-    if os.path.exists(processed_path):
+    manifest = None
+    if incremental:
+        manifest = Manifest(processed_path,
+                            {'method': method_name,
+                             'args': list(method_args),
+                             'kwargs': method_kwargs,
+                             'suffix': suffix,
+                             'dtype': None if dtype is None else str(dtype)})
+        if os.path.exists(processed_path):
+            manifest.load()
+    elif os.path.exists(processed_path):
         _log.error("directory '{}' already exists, remove it.".format(processed_path))
         raise IOError("directory exists: {}".format(processed_path))
 
-    os.mkdir(processed_path)
-    with os.scandir(path) as dir_it:
-        for entry in dir_it:
-            if not entry.name.startswith('.') and entry.is_file() and entry.name.endswith('.emt'):
-                _log.info("Processing " + entry.path)
-                process_one_emt_file(entry.path, method_name, method_args, method_kwargs, dest=processed_path, suffix=suffix)
-            elif entry.is_dir():
-                process_dir(entry.path, method_name, method_args, method_kwargs, dest=processed_path, suffix=suffix)
+    tasks = _plan_dir(path, processed_path, suffix, exist_ok=incremental)
+    signatures = {}
+    if manifest is not None:
+        manifest.start()
+        for emt_rel_path in set(manifest.files) - {os.path.relpath(emt_path, path) for emt_path, _ in tasks}:
+            manifest.forget(emt_rel_path)
+        outdated = []
+        for emt_path, task_dest in tasks:
+            emt_rel_path = os.path.relpath(emt_path, path)
+            signature = file_signature(emt_path)
+            recorded = manifest.files.get(emt_rel_path, {}).get('signature', {})
+            if checksum and not (manifest.is_up_to_date(emt_rel_path, signature) and 'sha256' in recorded):
+                # the modification time is not enough to tell, compare the contents
+                signature = file_signature(emt_path, checksum=True)
+            if manifest.is_up_to_date(emt_rel_path, signature):
+                _log.debug("skip up to date " + emt_path)
+                if any(recorded.get(k) != v for k, v in signature.items()):
+                    # same content but touched, do not compute the checksum again next time
+                    manifest.record(emt_rel_path, signature,
+                                    os.path.join(processed_path, manifest.files[emt_rel_path]['output']))
+            else:
+                signatures[emt_path] = signature
+                outdated.append((emt_path, task_dest))
+        _log.info("{} file(s) up to date, {} to process".format(len(tasks) - len(outdated), len(outdated)))
+        tasks = outdated
+    # largest first to keep the total duration low
+    tasks.sort(key=lambda task: os.path.getsize(task[0]), reverse=True)
+    errors = {}
+
+    def done(emt_path, processed_file):
+        if manifest is not None:
+            manifest.record(os.path.relpath(emt_path, path), signatures[emt_path], processed_file)
+
+    try:
+        _run_tasks(tasks, method_name, method_args, method_kwargs, suffix, jobs, dtype, chunksize, inplace,
+                   errors, done)
+    finally:
+        if manifest is not None:
+            manifest.close()
+    if errors:
+        raise ProcessingError(processed_path, errors)
     return processed_path
+
+
+def _run_tasks(tasks, method_name, method_args, method_kwargs, suffix, jobs, dtype, chunksize, inplace, errors, done):
+    """
+    Process the files of a directory (see :func:`process_dir`).
+
+    :param tasks: the emt files to process and the directory where to write the results.
+    :type tasks: list of tuple (str, str)
+    :param dict errors: the errors of the files which cannot be processed are added in this dict.
+    :param done: called with the path of each file processed and the path of its result.
+    :type done: callable
+    """
+    if jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(process_one_emt_file, emt_path, method_name, method_args, method_kwargs,
+                                       dest=task_dest, suffix=suffix, dtype=dtype, chunksize=chunksize,
+                                       inplace=inplace): emt_path
+                       for emt_path, task_dest in tasks}
+            for future in concurrent.futures.as_completed(futures):
+                emt_path = futures[future]
+                try:
+                    processed_file = future.result()
+                except Exception as err:
+                    _log.error("cannot process '{}': {}".format(emt_path, err))
+                    errors[emt_path] = err
+                else:
+                    _log.info("Processed " + emt_path)
+                    done(emt_path, processed_file)
+    else:
+        for emt_path, task_dest in tasks:
+            _log.info("Processing " + emt_path)
+            try:
+                processed_file = process_one_emt_file(emt_path, method_name, method_args, method_kwargs,
+                                                      dest=task_dest, suffix=suffix, dtype=dtype,
+                                                      chunksize=chunksize, inplace=inplace)
+            except Exception as err:
+                _log.error("cannot process '{}': {}".format(emt_path, err))
+                errors[emt_path] = err
+            else:
+                done(emt_path, processed_file)
@@ -0,0 +1,97 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+"""
+Features computed on a sliding window of frames, on all the tracks at once.
+
+The value of a feature at a frame is computed on the window of the *window* last frames (the frame included),
+so the first frames of a recording get a shorter window and the NaN are skipped,
+as :meth:`pandas.DataFrame.rolling` does with *min_periods=1*.
+
+    mean
+        the moving average of the values.
+    rms
+        the moving root mean square of the values.
+    envelope
+        the linear envelope: the moving average of the rectified (absolute) values.
+
+The sums over the windows are differences of cumulative sums, so the cost does not depend
+on the length of the window. A :class:`MovingWindow` keeps the last frames of a chunk
+to compute the windows of the first frames of the next chunk,
+so the result of a file processed chunk by chunk is the same as in one piece.
+The cumulative sums are computed again for each chunk, the rounding errors do not accumulate along the file.
+"""
+
+import numpy as np
+
+#: the features available, with the transformation applied to the values before averaging them.
+FEATURES = {'mean': None,
+            'rms': np.square,
+            'envelope': np.abs}
+
+
+class MovingWindow:
+    """
+    Compute a feature on a sliding window, chunk by chunk.
+    """
+
+    def __init__(self, feature, window):
+        """
+        :param str feature: The feature to compute, one of :data:`FEATURES`.
+        :param int window: The number of frames of the window.
+        :raise ValueError: if the feature is unknown or the window is not a positive number of frames.
+        """
+        if feature not in FEATURES:
+            raise ValueError("unknown feature '{}' (available features: {})".format(feature, ', '.join(FEATURES)))
+        if int(window) != window or window < 1:
+            raise ValueError("the window must be a positive number of frames: {}".format(window))
+        self.feature = feature
+        self.window = int(window)
+        # the (transformed) values and the valid values of the last frames, the start of the next windows
+        self._tail = None
+        self._tail_valid = None
+
+
+    def update(self, values):
+        """
+        Compute the feature on the next frames.
+
+        :param values: The values of the next frames, one column by track.
+        :type values: 2D :class:`numpy.ndarray` object
+        :return: the feature for each value of *values*, NaN if there is no value in the window.
+        :rtype: 2D :class:`numpy.ndarray` object
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        transform = FEATURES[self.feature]
+        values = np.where(valid, values if transform is None else transform(values), 0.0)
+        if self._tail is None:
+            self._tail = np.zeros((0, values.shape[1]))
+            self._tail_valid = np.zeros((0, values.shape[1]), dtype=bool)
+        values = np.concatenate([self._tail, values])
+        valid = np.concatenate([self._tail_valid, valid])
+        before = len(self._tail)
+
+        # the sum over frames [start, end) is sums[end] - sums[start]
+        sums = np.zeros((len(values) + 1, values.shape[1]))
+        np.cumsum(values, axis=0, out=sums[1:])
+        counts = np.zeros((len(values) + 1, values.shape[1]), dtype=np.int64)
+        np.cumsum(valid, axis=0, out=counts[1:])
+        end = np.arange(before + 1, len(values) + 1)
+        start = np.maximum(end - self.window, 0)
+        total = sums[end] - sums[start]
+        count = counts[end] - counts[start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = np.where(count > 0, total / count, np.nan)
+        if self.feature == 'rms':
+            # the differences of the sums can be slightly negative
+            result = np.sqrt(np.maximum(result, 0.0), out=result)
+
+        keep = min(self.window - 1, len(values))
+        # copied to not keep the whole chunk
+        self._tail = values[len(values) - keep:].copy()
+        self._tail_valid = valid[len(valid) - keep:].copy()
+        return result
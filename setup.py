@@ -52,6 +52,7 @@ setup(
            'emg_dyn_cal=emg_analyzer.scripts.emg_dyn_cal:main',
            'emg_activation=emg_analyzer.scripts.emg_activation:main',
            'emg_block=emg_analyzer.scripts.emg_block:main',
+           'emg=emg_analyzer.scripts.emg_run:main',
         ]
     }
 
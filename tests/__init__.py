@@ -8,9 +8,18 @@
 import os
 import unittest
 import sys
+import atexit
+import shutil
+import tempfile
 from io import StringIO
 from contextlib import contextmanager
 
+# the default cache of the tests (and of the processes they start) is a temporary directory
+# removed at the end of the run, the tests must not fill the cache of the user
+_cache_dir = tempfile.mkdtemp(prefix='emg_analyzer_test_cache_')
+os.environ['EMG_ANALYZER_CACHE_DIR'] = _cache_dir
+atexit.register(shutil.rmtree, _cache_dir, ignore_errors=True)
+
 class EmgTest(unittest.TestCase):
 
     _data_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "data"))
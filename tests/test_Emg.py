@@ -66,6 +66,46 @@ class TestEmg(EmgTest):
         self.assertEqual(expected_emg, norm_emg)
 
 
+    def test_norm_inplace(self):
+        import tempfile
+        import numpy as np
+        from emg_analyzer.cache import EmtCache
+        emt_path = self.get_data('two_tracks.emt')
+        for method, expected_name in (('norm', 'two_tracks_norm.emt'),
+                                      ('norm_by_track', 'two_tracks_norm_by_track.emt')):
+            with self.subTest(method=method):
+                expected_emg = Emg()
+                with open(self.get_data(expected_name)) as expected_emt_file:
+                    expected_emg.parse(expected_emt_file)
+                emg = Emg()
+                with open(emt_path) as emt_file:
+                    emg.parse(emt_file, cache=False)
+                original = emg.data.data.copy()
+                # the emg is not modified without inplace
+                norm_emg = getattr(emg, method)()
+                self.assertTrue(emg.data.data.equals(original))
+                self.assertEqual(expected_emg, norm_emg)
+
+                values = emg.data[emg.data.tracks[0]].to_numpy()
+                norm_emg = getattr(emg, method)(inplace=True)
+                self.assertIs(norm_emg, emg)
+                self.assertEqual(expected_emg, emg)
+                # the values are normalized in the same arrays
+                self.assertTrue(np.may_share_memory(values, emg.data[emg.data.tracks[0]].to_numpy()))
+                self.assertTrue(emg.data.data.equals(norm_emg.data.data.round(decimals=3)))
+                self.assertListEqual(list(emg.data.data['Time']), list(original['Time']))
+
+                # the mapped arrays are not modified
+                with tempfile.TemporaryDirectory() as tmp_dir_name:
+                    emt_cache = EmtCache(cache_dir=tmp_dir_name)
+                    for _ in range(2):
+                        emg = Emg()
+                        with open(emt_path) as emt_file:
+                            emg.parse(emt_file, cache=emt_cache, mmap=True)
+                        self.assertTrue(emg.data.data.equals(original))
+                        self.assertEqual(expected_emg, getattr(emg, method)(inplace=True))
+
+
     def test_to_emt(self):
         emg = Emg()
         emt_path = self.get_data('two_tracks_norm_by_track.emt')
@@ -117,4 +157,167 @@ class TestEmg(EmgTest):
             more_frames.parse(f)
 
         #with self.assertRaises(RuntimeError) as ctx:
-        #    new_d = e1.group_by_track([more_frames])
\ No newline at end of file
+        #    new_d = e1.group_by_track([more_frames])
+
+    def test_parse_mmap(self):
+        import tempfile
+        import numpy as np
+        import pandas as pd
+        from emg_analyzer.cache import EmtCache
+
+        emt_path = self.get_data('two_tracks.emt')
+        expected_emg = Emg()
+        with open(emt_path) as emt_file:
+            expected_emg.parse(emt_file, cache=False)
+
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            emt_cache = EmtCache(cache_dir=tmp_dir_name)
+            for _ in range(2):
+                # the first time the file is parsed then mapped, the second time it is mapped from cache
+                emg = Emg()
+                with open(emt_path) as emt_file:
+                    emg.parse(emt_file, cache=emt_cache, mmap=True)
+                self.assertIsInstance(emg.data._values, np.memmap)
+                self.assertTrue(emg.data._mapped)
+                self.assertEqual(emg.header, expected_emg.header)
+                self.assertListEqual(emg.data.tracks, expected_emg.data.tracks)
+                self.assertEqual(emg.data.frames, expected_emg.data.frames)
+                self.assertEqual(emg.data.min, expected_emg.data.min)
+                self.assertEqual(emg.data.max, expected_emg.data.max)
+                pd.testing.assert_series_equal(emg.data['RBI'], expected_emg.data['RBI'])
+                pd.testing.assert_frame_equal(emg.data.get_frames(2, 5), expected_emg.data.get_frames(2, 5))
+                pd.testing.assert_frame_equal(emg.data.describe(), expected_emg.data.describe())
+                # the DataFrame is built on demand
+                self.assertEqual(emg.data, expected_emg.data)
+                self.assertFalse(emg.data._mapped)
+                norm_emg = Emg()
+                with open(emt_path) as emt_file:
+                    norm_emg.parse(emt_file, cache=False)
+                self.assertEqual(emg.norm_by_track(), norm_emg.norm_by_track())
+
+    def test_parse_mmap_no_cache(self):
+        import logging
+        import numpy as np
+
+        emt_path = self.get_data('two_tracks.emt')
+        expected_emg = Emg()
+        with open(emt_path) as emt_file:
+            expected_emg.parse(emt_file, cache=False)
+        emg = Emg()
+        # the scripts ask for mmap whatever the cache settings, the fallback must not warn
+        with self.assertLogs('emg_analyzer', level=logging.DEBUG) as logs:
+            with open(emt_path) as emt_file:
+                emg.parse(emt_file, cache=False, mmap=True)
+        self.assertFalse([r for r in logs.records if r.levelno >= logging.WARNING])
+        self.assertNotIsInstance(emg.data._values, np.memmap)
+        self.assertEqual(emg.data, expected_emg.data)
+
+
+    def test_open(self):
+        emt_path = self.get_data('two_tracks.emt')
+        expected_emg = Emg()
+        with open(emt_path) as emt_file:
+            expected_emg.parse(emt_file, cache=False)
+
+        emg = Emg.open(emt_path, cache=False)
+        self.assertEqual(emg.name, 'two_tracks')
+        self.assertEqual(emg.header, expected_emg.header)
+        self.assertIsNone(emg._data)
+        self.assertEqual(emg.data, expected_emg.data)
+        self.assertIsNotNone(emg._data)
+
+        emg = Emg.open(emt_path, lazy=False, cache=False)
+        self.assertIsNotNone(emg._data)
+        self.assertEqual(emg, expected_emg)
+
+
+    def test_iter_chunks(self):
+        import tempfile
+        import pandas as pd
+        from emg_analyzer.cache import EmtCache
+
+        emt_path = self.get_data('two_tracks.emt')
+        expected_emg = Emg()
+        with open(emt_path) as emt_file:
+            expected_emg.parse(emt_file, cache=False)
+
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            emt_cache = EmtCache(cache_dir=tmp_dir_name)
+            with open(emt_path) as emt_file:
+                Emg().parse(emt_file, cache=emt_cache)
+            # the text is read without cache, the binary version with the cache
+            for cache in (False, emt_cache):
+                emg = Emg()
+                with open(emt_path) as emt_file:
+                    chunks = [c.data for c in emg.iter_chunks(emt_file, chunksize=4, cache=cache)]
+                self.assertEqual(emg.header, expected_emg.header)
+                self.assertEqual(emg.name, 'two_tracks')
+                self.assertListEqual([len(c) for c in chunks], [4, 4, 2])
+                pd.testing.assert_frame_equal(pd.concat(chunks), expected_emg.data.data)
+
+
+    def test_parse_tracks(self):
+        import tempfile
+        import pandas as pd
+        from emg_analyzer.cache import EmtCache
+
+        emt_path = self.get_data('two_tracks.emt')
+        expected_emg = Emg()
+        with open(emt_path) as emt_file:
+            expected_emg.parse(emt_file, cache=False)
+
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            emt_cache = EmtCache(cache_dir=tmp_dir_name)
+            # parsed from text then loaded from the cache
+            for cache in (False, emt_cache, emt_cache):
+                emg = Emg()
+                with open(emt_path) as emt_file:
+                    emg.parse(emt_file, cache=cache, tracks=['RBI'])
+                self.assertListEqual(emg.header.tracks_names, ['RBI'])
+                self.assertEqual(emg.header.tracks_nb, 1)
+                self.assertListEqual(emg.data.tracks, ['RBI'])
+                pd.testing.assert_frame_equal(emg.data.data, expected_emg.data.data[['Time', 'RBI']])
+                if cache is emt_cache and emt_cache.lookup(emt_path) is None:
+                    with open(emt_path) as emt_file:
+                        Emg().parse(emt_file, cache=emt_cache)
+
+        with open(emt_path) as emt_file:
+            with self.assertRaises(KeyError):
+                Emg().parse(emt_file, cache=False, tracks=['RBI', 'FOO'])
+
+        emg = Emg.open(emt_path, cache=False, tracks=['RTRI'])
+        self.assertListEqual(emg.header.tracks_names, ['RTRI'])
+        self.assertListEqual(emg.data.tracks, ['RTRI'])
+
+    def test_parse_dtype(self):
+        import tempfile
+        import numpy as np
+        from emg_analyzer.cache import EmtCache
+
+        emt_path = self.get_data('two_tracks.emt')
+        expected_emg = Emg()
+        with open(emt_path) as emt_file:
+            expected_emg.parse(emt_file, cache=False)
+
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            emt_cache = EmtCache(cache_dir=tmp_dir_name)
+            # parsed from text then loaded from the cache
+            for mmap in (False, False, True):
+                emg = Emg()
+                with open(emt_path) as emt_file:
+                    emg.parse(emt_file, cache=emt_cache, mmap=mmap, dtype='float32')
+                self.assertListEqual(list(emg.data.data.dtypes),
+                                     [np.dtype('float64'), np.dtype('float32'), np.dtype('float32')])
+                self.assertEqual(emg.to_emt(), expected_emg.to_emt())
+            self.assertIsNotNone(emt_cache.lookup(emt_path, kind='data-float32'))
+            self.assertIsNone(emt_cache.lookup(emt_path))
+
+        emg = Emg.open(emt_path, cache=False, dtype='float32')
+        norm = emg.norm()
+        self.assertEqual(norm.data.data['RBI'].dtype, np.float32)
+        expected_norm = expected_emg.norm()
+        self.assertTrue(np.allclose(norm.data.data, expected_norm.data.data, atol=0.001))
+        norm = emg.norm_by_track()
+        expected_emg = Emg.open(emt_path, cache=False)
+        expected_norm = expected_emg.norm_by_track()
+        self.assertTrue(np.allclose(norm.data.data, expected_norm.data.data, atol=0.001))
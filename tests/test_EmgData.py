@@ -191,6 +191,23 @@ class TestEmgData(EmgTest):
         pd.util.testing.assert_frame_equal(data_expected, data_received.data)
 
 
+    def test_norm_by_track_unknown_track(self):
+        tracks = ['A', 'B']
+        data = EmgData()
+        with open(self.get_data('data_two_tracks.emt')) as data_file:
+            data.parse(data_file, tracks)
+        original = data.data.copy()
+        dyn_cal = pd.DataFrame({'A': [0.0, 2.0]}, index=['min', 'max'])
+        for kwargs in ({'tracks_names': ['A', 'C']},
+                       {'tracks_names': tracks, 'dyn_cal': dyn_cal}):
+            for inplace in (False, True):
+                with self.subTest(inplace=inplace, **kwargs):
+                    with self.assertRaises(KeyError):
+                        data.norm_by_track(inplace=inplace, **kwargs)
+                    # no track is normalized
+                    pd.testing.assert_frame_equal(data.data, original)
+
+
     def test_to_tsv(self):
         columns = ['Frame', 'Time', 'A', 'B']
         tracks = columns[2:]
@@ -210,6 +227,24 @@ class TestEmgData(EmgTest):
             for line_expected, line_recieved in zip(data_expected_file, data_received):
                 self.assertEqual(line_expected, line_recieved + '\n')
 
+    def test_to_tsv_fast(self):
+        import numpy as np
+        frames = np.arange(25)
+        data = pd.DataFrame({'Time': frames / 1000,
+                             'A': np.linspace(-3.0005, 12.5, 25),
+                             'B': np.linspace(0, 1, 25).astype(np.float32)},
+                            index=pd.Index(frames, name='Frame'))
+        data.iloc[3, 1] = np.nan
+        data.iloc[7, 2] = np.nan
+        emg_data = EmgData._new_data(data)
+        expected = emg_data.to_tsv(engine='pandas')
+        self.assertEqual(emg_data.to_tsv(engine='fast'), expected)
+        emg_data._write_rows = 10
+        self.assertEqual(emg_data.to_tsv(engine='fast'), expected)
+        self.assertEqual(emg_data.to_tsv(engine='fast', jobs=2), expected)
+        with self.assertRaises(ValueError):
+            emg_data.to_tsv(engine='foo')
+
     def test_group_track(self):
         data_1 = EmgData()
         data_1.data = pd.DataFrame([[0, 0, 1, 10],
@@ -234,3 +269,99 @@ class TestEmgData(EmgTest):
         new_data = EmgData.group_track('A', {'exp_1': data_1, 'exp_2': data_2})
         pd.util.testing.assert_frame_equal(new_data.data, expected_data)
 
+
+    def test_iter_chunks(self):
+        tracks = ['A', 'B']
+        data_path = self.get_data('data_two_tracks.emt')
+        data_expected = EmgData()
+        with open(data_path) as data_file:
+            data_expected.parse(data_file, tracks)
+
+        with open(data_path) as data_file:
+            chunks = list(EmgData.iter_chunks(data_file, tracks, chunksize=3, frames=10))
+        self.assertListEqual([c.frames for c in chunks], [3, 3, 3, 1])
+        data_received = pd.concat([c.data for c in chunks])
+        pd.util.testing.assert_frame_equal(data_expected.data, data_received)
+
+        with open(data_path) as data_file:
+            with self.assertRaises(RuntimeError) as ctx:
+                for _ in EmgData.iter_chunks(data_file, tracks, chunksize=3, frames=5):
+                    pass
+        self.assertEqual(str(ctx.exception),
+                         "The number of Frames in header '5' does not match data frames (at least '6').")
+
+        with open(data_path) as data_file:
+            with self.assertRaises(RuntimeError) as ctx:
+                for _ in EmgData.iter_chunks(data_file, tracks, chunksize=3, frames=12):
+                    pass
+        self.assertEqual(str(ctx.exception),
+                         "The number of Frames in header '12' does not match data frames '10'.")
+
+    def test_iter_frames(self):
+        tracks = ['A', 'B']
+        data_path = self.get_data('data_two_tracks.emt')
+        data = EmgData()
+        with open(data_path) as data_file:
+            data.parse(data_file, tracks)
+        chunks = list(data.iter_frames(chunksize=4))
+        self.assertListEqual([c.frames for c in chunks], [4, 4, 2])
+        pd.util.testing.assert_frame_equal(data.data, pd.concat([c.data for c in chunks]))
+
+    def test_select(self):
+        tracks = ['A', 'B']
+        data_path = self.get_data('data_two_tracks.emt')
+        data = EmgData()
+        with open(data_path) as data_file:
+            data.parse(data_file, tracks)
+        rest_matrix = pd.DataFrame({'A': [50.0, 10.0], 'B': [30.0, 20.0]}, index=['mean', 'std'])
+        selected, thresholds = data.select(rest_matrix, coef=1.5)
+        self.assertDictEqual(thresholds, {'A': 65.0, 'B': 60.0})
+        expected = data.data.copy()
+        expected['A'] = expected['A'].where(expected['A'] > 65.0)
+        expected['B'] = expected['B'].where(expected['B'] > 60.0)
+        pd.util.testing.assert_frame_equal(selected.data, expected)
+
+
+    def test_activation_summary(self):
+        tracks = ['A', 'B']
+        data_path = self.get_data('data_two_tracks.emt')
+        data = EmgData()
+        with open(data_path) as data_file:
+            data.parse(data_file, tracks)
+        rest_matrix = pd.DataFrame({'A': [50.0, 10.0], 'B': [30.0, 20.0]}, index=['mean', 'std'])
+        selected, thresholds = data.select(rest_matrix, coef=1.5)
+        count = selected.data[tracks].count()
+        for chunksize in (1, 3, 1000):
+            summary = data.activation_summary(rest_matrix, coef=1.5, chunksize=chunksize)
+            self.assertListEqual(list(summary.index), tracks)
+            self.assertListEqual(list(summary.columns), ['threshold', 'count', 'activation_ratio'])
+            self.assertListEqual(summary['threshold'].tolist(), [65.0, 60.0])
+            self.assertListEqual(summary['count'].tolist(), count.tolist())
+            self.assertListEqual(summary['activation_ratio'].tolist(), (count / data.frames).tolist())
+
+
+    def test_moving(self):
+        tracks = ['A', 'B']
+        data = EmgData()
+        with open(self.get_data('data_two_tracks.emt')) as data_file:
+            data.parse(data_file, tracks)
+        expected = data.data[tracks].abs().rolling(3, min_periods=1).mean().round(3)
+        for chunksize in (1, 2, 1000):
+            envelope = data.moving('envelope', 3, chunksize=chunksize)
+            self.assertTrue(envelope.data['Time'].equals(data.data['Time']))
+            self.assertTrue(envelope.data[tracks].equals(expected))
+
+
+    def test_activation_sweep(self):
+        tracks = ['A', 'B']
+        data_path = self.get_data('data_two_tracks.emt')
+        data = EmgData()
+        with open(data_path) as data_file:
+            data.parse(data_file, tracks)
+        rest_matrix = pd.DataFrame({'A': [50.0, 10.0], 'B': [30.0, 20.0]}, index=['mean', 'std'])
+        coefs = [0, 0.5, 1.5, 10]
+        for chunksize in (1, 3, 1000):
+            sweep = data.activation_sweep(rest_matrix, coefs, chunksize=chunksize)
+            self.assertListEqual(list(sweep.index.names), ['coef', 'muscle'])
+            for coef in coefs:
+                self.assertTrue(sweep.loc[coef].equals(data.activation_summary(rest_matrix, coef=coef)))
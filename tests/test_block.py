@@ -38,6 +38,15 @@ class TestBlock(EmgTest):
         exp_data.index.name = 'Frame'
         pd.util.testing.assert_frame_equal(exp_data, data)
 
+    def test_get_data_tracks(self):
+        ref = self.get_data('exp1.emt')
+        blk = block.Block(ref, 1, 1, 4)
+        data = blk.get_data(tracks=['B'])
+        exp_data = pd.DataFrame({'B': [20.1, 30.1, 40.1, 50.1]},
+                                index=[1, 2, 3, 4])
+        exp_data.index.name = 'Frame'
+        pd.util.testing.assert_frame_equal(exp_data, data)
+
 
 class TestBlockHandler(EmgTest):
 
@@ -69,6 +78,55 @@ class TestBlockHandler(EmgTest):
         for b, c in zip(bh, ctrl):
             self.assertEqual(b, c)
 
+    def test_get_data(self):
+        ref = self.get_data('exp1.emt')
+        bh = block.BlockHandler(ref)
+        blk1 = block.Block(ref, 1, 1, 4)
+        blk2 = block.Block(ref, 2, 5, 6)
+        bh.add_block(blk1)
+        bh.add_block(blk2)
+        with bh:
+            data = blk1.get_data()
+            emg = bh._emg
+            self.assertIsNotNone(emg)
+            exp_data = pd.DataFrame({'A': [2.1, 3.1, 4.1, 5.1],
+                                     'B': [20.1, 30.1, 40.1, 50.1]},
+                                    index=[1, 2, 3, 4])
+            exp_data.index.name = 'Frame'
+            pd.util.testing.assert_frame_equal(exp_data, data)
+
+            data = blk2.get_data(tracks=['B'])
+            # the reference is loaded once
+            self.assertIs(bh._emg, emg)
+            exp_data = pd.DataFrame({'B': [60.1, 70.1]},
+                                    index=[5, 6])
+            exp_data.index.name = 'Frame'
+            pd.util.testing.assert_frame_equal(exp_data, data)
+        self.assertIsNone(bh._emg)
+
+    def test_get_data_unknown_track(self):
+        ref = self.get_data('exp1.emt')
+        blk = block.Block(ref, 1, 1, 4)
+        # the same error with or without handler
+        with self.assertRaises(KeyError):
+            blk.get_data(tracks=['B', 'Z'])
+        bh = block.BlockHandler(ref)
+        bh.add_block(blk)
+        with bh:
+            with self.assertRaises(KeyError):
+                blk.get_data(tracks=['B', 'Z'])
+
+    def test_ref_cache(self):
+        ref = self.get_data('exp1.emt')
+        ref_cache = block.RefCache()
+        bh1 = block.BlockHandler(ref, ref_cache=ref_cache)
+        bh2 = block.BlockHandler(ref, ref_cache=ref_cache)
+        self.assertIs(bh1.load(), bh2.load())
+        bh1.release()
+        self.assertIn(ref, ref_cache)
+        bh2.release()
+        self.assertNotIn(ref, ref_cache)
+
 
 class TestParser(EmgTest):
 
@@ -91,4 +149,4 @@ class TestParser(EmgTest):
         self.assertEqual(len(trials), 2)
         for trial, bh in zip(trials, [bh1, bh2]):
             for b, ctrl in zip(trial, bh):
-                self.assertEqual(b, ctrl)
\ No newline at end of file
+                self.assertEqual(b, ctrl)
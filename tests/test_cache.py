@@ -0,0 +1,122 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+import os
+import shutil
+import tempfile
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+from emg_analyzer.cache import EmtCache
+from emg_analyzer.emg import Emg
+
+
+class TestDefaultCache(EmgTest):
+
+    def test_not_in_home(self):
+        from emg_analyzer import cache
+        home = os.path.realpath(os.path.expanduser('~'))
+        cache_dir = os.path.realpath(cache.get_cache().cache_dir)
+        self.assertNotEqual(os.path.commonpath([home, cache_dir]), home)
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            emt_path = shutil.copy(self.get_data('two_tracks.emt'), tmp_dir_name)
+            Emg.open(emt_path, lazy=False)
+        # the parsing has been cached in the temporary directory of the tests
+        if cache.get_cache().enabled:
+            self.assertTrue(os.listdir(cache_dir))
+
+
+class TestEmtCache(EmgTest):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.emt_path = shutil.copy(self.get_data('two_tracks.emt'), self.tmp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def parse(self, emt_cache):
+        emg = Emg()
+        with open(self.emt_path) as emt_file:
+            emg.parse(emt_file, cache=emt_cache)
+        return emg
+
+    def test_parse_from_cache(self):
+        emt_cache = EmtCache(cache_dir=self.cache_dir)
+        self.assertIsNone(emt_cache.lookup(self.emt_path))
+        emg_parsed = self.parse(emt_cache)
+        self.assertIsNotNone(emt_cache.lookup(self.emt_path))
+
+        emg_cached = self.parse(emt_cache)
+        self.assertEqual(emg_cached.name, 'two_tracks')
+        self.assertEqual(emg_cached.header, emg_parsed.header)
+        self.assertEqual(emg_cached.data, emg_parsed.data)
+        self.assertEqual(emg_cached.to_emt(), emg_parsed.to_emt())
+
+    def test_invalidation(self):
+        emt_cache = EmtCache(cache_dir=self.cache_dir)
+        self.parse(emt_cache)
+        with open(self.emt_path, 'a') as emt_file:
+            emt_file.write('\n')
+        self.assertIsNone(emt_cache.lookup(self.emt_path))
+        self.assertEqual(emt_cache.size, 0)
+
+    def test_modified_while_parsed(self):
+        from unittest import mock
+        from emg_analyzer.emg import EmgData
+        emt_cache = EmtCache(cache_dir=self.cache_dir)
+        real_parse = EmgData.parse
+
+        def parse_and_rewrite(data, *args, **kwargs):
+            real_parse(data, *args, **kwargs)
+            shutil.copy(self.get_data('two_tracks_norm.emt'), self.emt_path)
+
+        with mock.patch.object(EmgData, 'parse', autospec=True, side_effect=parse_and_rewrite):
+            self.parse(emt_cache)
+        # the values of the old file are not stored for the new one
+        self.assertIsNone(emt_cache.lookup(self.emt_path))
+        self.assertEqual(emt_cache.size, 0)
+        expected = Emg()
+        with open(self.get_data('two_tracks_norm.emt')) as emt_file:
+            expected.parse(emt_file, cache=False)
+        self.assertEqual(self.parse(emt_cache), expected)
+
+    def test_disabled(self):
+        emt_cache = EmtCache(cache_dir=self.cache_dir, enabled=False)
+        self.parse(emt_cache)
+        self.assertFalse(os.path.exists(self.cache_dir))
+        self.parse(False)
+
+    def test_evict(self):
+        emt_cache = EmtCache(cache_dir=self.cache_dir)
+        self.parse(emt_cache)
+        entry_size = emt_cache.size
+        other_path = os.path.join(self.tmp_dir, 'other.emt')
+        shutil.copy(self.emt_path, other_path)
+        emg = Emg()
+        with open(other_path) as emt_file:
+            emg.parse(emt_file, cache=emt_cache)
+        self.assertGreater(emt_cache.size, entry_size)
+
+        # the first entry is the least recently used
+        meta_path = emt_cache._key(self.emt_path, 'data') + '.json'
+        os.utime(meta_path, ns=(0, 0))
+        emt_cache.max_size = entry_size + 10
+        emt_cache.evict()
+        self.assertIsNone(emt_cache.lookup(self.emt_path))
+        self.assertIsNotNone(emt_cache.lookup(other_path))
+
+    def test_clear(self):
+        emt_cache = EmtCache(cache_dir=self.cache_dir)
+        self.parse(emt_cache)
+        emt_cache.clear()
+        self.assertEqual(emt_cache.size, 0)
@@ -0,0 +1,80 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+import tempfile
+import shutil
+import os
+
+import pandas as pd
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+from emg_analyzer.emg import Emg, EMGConcat
+from emg_analyzer.scripts import emg_concat
+
+
+class Test_emg_concat(EmgTest):
+
+    def parse(self, name):
+        emg = Emg()
+        with open(self.get_data(name)) as emt_file:
+            emg.parse(emt_file)
+        return emg
+
+
+    def test_concat(self):
+        exp1, exp3 = self.parse('exp1.emt'), self.parse('exp3.emt')
+        concat = EMGConcat(exp1, exp3)
+        self.assertListEqual(concat.emg_names, ['exp1', 'exp3'])
+        # the tracks are matched by name, C has no value in exp1 and B in exp3
+        data = concat.data
+        self.assertListEqual(list(data.columns), ['Time', 'A', 'B', 'C'])
+        self.assertListEqual(list(data.index.names), ['Experiment', 'Frame'])
+        self.assertEqual(len(data), exp1.data.frames + exp3.data.frames)
+        self.assertListEqual(list(data.loc['exp3', 'A']), list(exp3.data['A']))
+        self.assertTrue(data.loc['exp1', 'C'].isnull().all())
+
+        expected = pd.concat([exp1.data.data, exp3.data.data], sort=False).drop(columns='Time').describe()
+        pd.testing.assert_frame_equal(concat.describe(), expected)
+
+
+    def test_main_one_dir(self):
+        cwd = os.getcwd()
+        with self.catch_output(out=True, err=True):
+            with tempfile.TemporaryDirectory() as tmp_dir_name:
+                os.chdir(tmp_dir_name)
+                try:
+                    # the files of the sub directories are concatenated too
+                    os.makedirs(os.path.join('trials', 'sub'))
+                    shutil.copy(self.get_data('exp1.emt'), 'trials')
+                    shutil.copy(self.get_data('exp3.emt'), os.path.join('trials', 'sub'))
+
+                    emg_concat.main(args=['trials'])
+
+                    concat = EMGConcat(self.parse('exp1.emt'), self.parse('exp3.emt'))
+                    with open('exp1_exp3.concat') as concat_file:
+                        self.assertEqual(concat_file.read(), concat.to_tsv())
+                    describe = pd.read_csv('exp1_exp3.describe', sep='\t', index_col=0)
+                    pd.testing.assert_frame_equal(describe, concat.describe().round(3))
+                finally:
+                    os.chdir(cwd)
+
+
+    def test_main_no_file(self):
+        cwd = os.getcwd()
+        with self.catch_output(out=True, err=True):
+            with tempfile.TemporaryDirectory() as tmp_dir_name:
+                os.chdir(tmp_dir_name)
+                try:
+                    with self.assertRaises(SystemExit):
+                        emg_concat.main(args=[tmp_dir_name])
+                finally:
+                    os.chdir(cwd)
@@ -0,0 +1,45 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+import tempfile
+import shutil
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+from emg_analyzer.scripts import emg_dyn_cal
+
+
+class Test_emg_dyn_cal(EmgTest):
+
+    def test_main(self):
+        with self.catch_output(out=True, err=True):
+            with tempfile.TemporaryDirectory() as tmp_dir_name:
+                # 2 files for the same muscle
+                shutil.copy(self.get_data('two_tracks.emt'), os.path.join(tmp_dir_name, 'CD_RBI_pat1_1.emt'))
+                shutil.copy(self.get_data('two_tracks_norm.emt'), os.path.join(tmp_dir_name, 'CD_RBI_pat1_2.emt'))
+                shutil.copy(self.get_data('two_tracks.emt'), os.path.join(tmp_dir_name, 'CD_RTRI_pat1_1.emt'))
+
+                emg_dyn_cal.main(args=[tmp_dir_name, '--no-cache'])
+
+                dyn_cal = pd.read_csv(os.path.join(tmp_dir_name, 'pat1_dyn_cal.emt'),
+                                      sep='\t', skiprows=2, index_col=0)
+                desc = pd.read_csv(os.path.join(tmp_dir_name, 'pat1_dyn_cal.desc'),
+                                   sep='\t', skiprows=2, index_col=0)
+        # one column by file, as the columns of dyn_cal
+        self.assertEqual(len(desc.columns), 3)
+        self.assertListEqual(list(desc.columns), list(dyn_cal.columns))
+        expected = dyn_cal.describe().round(3)
+        self.assertListEqual(list(desc.index), list(expected.index))
+        self.assertTrue(np.allclose(desc.to_numpy(), expected.to_numpy(), atol=0.0011, equal_nan=True))
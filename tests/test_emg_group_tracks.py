@@ -34,7 +34,7 @@ class Test_emg_group_track(EmgTest):
                 emg_group_tracks.main(args=['--version'])
             except TypeError:
                 out, err = flow
-                import emg_analyzer
+                import emg_analyzer.emg
                 expected_msg = """emg_group_tracks: {emg_vers}
 
 Using: 
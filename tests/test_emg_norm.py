@@ -35,7 +35,7 @@ class Test_emg_norm(EmgTest):
                 emg_norm.main(args=['--version'])
             except TypeError:
                 out, err = flow
-                import emg_analyzer
+                import emg_analyzer.emg
                 expected_msg = """emg_group_tracks: {emg_vers}
 
 Using: 
@@ -0,0 +1,127 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+import tempfile
+import shutil
+import os
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+from emg_analyzer.scripts import emg_run, emg_norm, emg_select, emg_describe
+
+
+class Test_emg_run(EmgTest):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def read(self, path):
+        with open(path) as f:
+            return [l for l in f if not l.startswith('#')]
+
+    def test_parse_pipeline(self):
+        stages = emg_run.parse_pipeline("norm(by_track) -> select(rest_matrix=rest.desc, coef=2, write) -> describe")
+        self.assertListEqual(stages,
+                             [{'name': 'norm', 'write': False, 'options': {'by_track': True}},
+                              {'name': 'select', 'write': True, 'options': {'rest_matrix': 'rest.desc', 'coef': 2.0}},
+                              {'name': 'describe', 'write': True, 'options': {}}])
+        for pipeline in ('foo', 'norm(nice)', 'select(coef=2)', 'select(rest_matrix=a, coef=a)', 'norm -> '):
+            with self.subTest(pipeline=pipeline):
+                with self.assertRaises(ValueError):
+                    emg_run.parse_pipeline(pipeline)
+
+    def test_norm_describe(self):
+        emt_path = os.path.join(self.tmp_dir, 'A.emt')
+        shutil.copy(self.get_data('A.emt'), emt_path)
+        emg_run.main(['run', 'norm(by_track, write) -> describe', emt_path])
+        result_norm = self.read('A_norm.emt')
+        result_desc = self.read('A_norm.desc')
+
+        os.makedirs('scripts')
+        os.chdir('scripts')
+        emg_norm.main([emt_path, '--by-track'])
+        emg_describe.main(['A_norm.emt'])
+        self.assertListEqual(result_norm, self.read('A_norm.emt'))
+        self.assertListEqual(result_desc, self.read('A_norm.desc'))
+
+    def test_norm_select(self):
+        emt_path = os.path.join(self.tmp_dir, 'A.emt')
+        shutil.copy(self.get_data('A.emt'), emt_path)
+        rest_matrix = self.get_data('A.desc')
+        emg_run.main(['run', 'norm -> select(rest_matrix={}, coef=0)'.format(rest_matrix), emt_path])
+        # only the last stage is written
+        self.assertFalse(os.path.exists('A_norm.emt'))
+        result_sel = self.read('A_norm.sel')
+        result_summary = self.read('A_norm_sel.summary')
+        os.unlink('A_norm.sel')
+        os.unlink('A_norm_sel.summary')
+
+        emg_norm.main([emt_path])
+        emg_select.main(['A_norm.emt', '--rest-matrix', rest_matrix, '--coef', '0'])
+        self.assertListEqual(result_sel, self.read('A_norm.sel'))
+        self.assertListEqual(result_summary, self.read('A_norm_sel.summary'))
+
+    def test_smooth_select(self):
+        emt_path = os.path.join(self.tmp_dir, 'A.emt')
+        shutil.copy(self.get_data('A.emt'), emt_path)
+        rest_matrix = self.get_data('A.desc')
+        emg_run.main(['run', 'smooth(feature=rms, window=3, write) -> select(rest_matrix={})'.format(rest_matrix),
+                      emt_path])
+        result_sel = self.read('A_rms.sel')
+        os.unlink('A_rms.sel')
+        emg_select.main(['A_rms.emt', '--rest-matrix', rest_matrix])
+        self.assertListEqual(result_sel, self.read('A_rms.sel'))
+
+        from emg_analyzer.emg import Emg
+        with open('A_rms.emt') as rms_file:
+            rms = Emg()
+            rms.parse(rms_file)
+        self.assertEqual(rms.data, Emg.open(emt_path, cache=False).moving('rms', 3).data)
+
+    def test_nested_dirs(self):
+        # 2 files with the same name in a directory and in its sub directory
+        os.makedirs(os.path.join('d', 'sub'))
+        shutil.copy(self.get_data('A.emt'), os.path.join('d', 'rec2.emt'))
+        shutil.copy(self.get_data('B.emt'), os.path.join('d', 'sub', 'rec2.emt'))
+        emg_run.main(['run', 'norm', 'd'])
+        results = [self.read(os.path.join('d_norm', 'rec2_norm.emt')),
+                   self.read(os.path.join('d_norm', 'sub_norm', 'rec2_norm.emt'))]
+        self.assertNotEqual(results[0], results[1])
+
+        # emg_norm writes the tree next to the directory
+        shutil.copytree('d', os.path.join('scripts', 'd'))
+        os.chdir('scripts')
+        emg_norm.main(['d'])
+        self.assertListEqual(results, [self.read(os.path.join('d_norm', 'rec2_norm.emt')),
+                                       self.read(os.path.join('d_norm', 'sub_norm', 'rec2_norm.emt'))])
+
+    def test_out_dir(self):
+        os.makedirs(os.path.join('d', 'sub'))
+        shutil.copy(self.get_data('A.emt'), os.path.join('d', 'rec2.emt'))
+        shutil.copy(self.get_data('A.emt'), os.path.join('d', 'sub', 'rec2.emt'))
+        rest_matrix = self.get_data('A.desc')
+        emg_run.main(['run', 'select(rest_matrix={}, write) -> describe'.format(rest_matrix), 'd',
+                      '--out-dir', 'out'])
+        # the input directory is not written
+        self.assertListEqual(sorted(os.listdir('d')), ['rec2.emt', 'sub'])
+        self.assertListEqual(sorted(os.listdir(os.path.join('d', 'sub'))), ['rec2.emt'])
+        for sub_dir in ('', 'sub'):
+            with self.subTest(sub_dir=sub_dir):
+                out_dir = os.path.join('out', 'd', sub_dir)
+                self.assertListEqual(sorted(os.listdir(out_dir)),
+                                     sorted(['rec2.sel', 'rec2_sel.summary', 'rec2_sel.desc'] +
+                                            (['sub'] if not sub_dir else [])))
@@ -0,0 +1,97 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+import tempfile
+import shutil
+import os
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+from emg_analyzer.scripts import emg_select
+
+
+class Test_emg_select(EmgTest):
+
+    def select(self, tmp_dir_name, *options):
+        for name in ('A.emt', 'D.emt'):
+            shutil.copy(self.get_data('A.emt'), os.path.join(tmp_dir_name, name))
+        emg_select.main(args=[tmp_dir_name, '--rest-matrix', self.get_data('A.desc'), '--coef', '0'] + list(options))
+        results = {}
+        for name in ('A.sel', 'A_sel.summary', 'D.sel', 'D_sel.summary'):
+            with open(os.path.join(tmp_dir_name, name)) as result_file:
+                results[name] = result_file.read()
+        return results
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            results = self.select(tmp_dir_name)
+        sel = results['A.sel'].splitlines()
+        self.assertEqual(sel[0], '# Activities selection')
+        self.assertEqual(sel[3], 'Frame\tTime\texp1\texp3\texp4')
+        # the mean is the threshold: only the frames greater than the mean are kept
+        self.assertEqual(sel[4], '0\t0.000\tNaN\tNaN\tNaN')
+        self.assertEqual(sel[9], '5\t0.005\t6.100\t6.300\t6.400')
+        summary = results['A_sel.summary'].splitlines()
+        self.assertEqual(summary[0], '# Summary of activities for condition: A.emt')
+        self.assertEqual(summary[2], 'exp1\t5.6\t5\t0.5')
+
+    def test_summary_only(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            expected = self.select(tmp_dir_name)
+            for name in ('A.sel', 'D.sel'):
+                os.unlink(os.path.join(tmp_dir_name, name))
+            for options in ([], ['--chunksize', '3'], ['--jobs', '2']):
+                for name in ('A_sel.summary', 'D_sel.summary'):
+                    os.unlink(os.path.join(tmp_dir_name, name))
+                emg_select.main(args=[tmp_dir_name, '--rest-matrix', self.get_data('A.desc'), '--coef', '0',
+                                      '--summary-only'] + options)
+                self.assertFalse(os.path.exists(os.path.join(tmp_dir_name, 'A.sel')))
+                for name in ('A_sel.summary', 'D_sel.summary'):
+                    with open(os.path.join(tmp_dir_name, name)) as summary_file:
+                        self.assertEqual(summary_file.read(), expected[name])
+
+    def test_sweep(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            shutil.copy(self.get_data('A.emt'), tmp_dir_name)
+            out = os.path.join(tmp_dir_name, 'ratios')
+            emg_select.main(args=[tmp_dir_name, '--rest-matrix', self.get_data('A.desc'),
+                                  '--sweep', '0', '1', '0.5', '-o', out])
+            self.assertFalse(os.path.exists(os.path.join(tmp_dir_name, 'A.sel')))
+            with open(out + '.sweep') as sweep_file:
+                sweep = sweep_file.read().splitlines()
+        self.assertEqual(sweep[0], '# Activation ratio by coefficient')
+        self.assertEqual(sweep[3], 'Experiment\tMuscle\t0\t0.5\t1')
+        self.assertEqual(sweep[4], 'A\texp1\t0.5000\t0.3000\t0.2000')
+        self.assertEqual(len(sweep), 7)
+
+    def test_segments(self):
+        from emg_analyzer.selection import Selection
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            expected = self.select(tmp_dir_name)
+            # without hysteresis, merge and minimum duration the segments are the values selected
+            results = self.select(tmp_dir_name, '--min-duration', '1', '--chunksize', '3')
+            self.assertEqual(results['A_sel.summary'], expected['A_sel.summary'])
+            sel = Selection.read(os.path.join(tmp_dir_name, 'A.sel'))
+            self.assertIsNone(sel.values)
+            self.assertListEqual(sel.intervals['exp1'][0].tolist(), [5])
+            self.assertListEqual(sel.intervals['exp1'][1].tolist(), [9])
+
+            emg_select.main(args=[tmp_dir_name, '--rest-matrix', self.get_data('A.desc'), '--coef', '0.5',
+                                  '--off-coef', '0', '--min-duration', '2', '--summary-only', '--jobs', '2'])
+            with open(os.path.join(tmp_dir_name, 'A_sel.summary')) as summary_file:
+                summary = summary_file.read().splitlines()
+        self.assertEqual(summary[2], 'exp1\t7.114\t3\t0.3')
+
+    def test_main_jobs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            expected = self.select(tmp_dir_name)
+            results = self.select(tmp_dir_name, '--jobs', '2')
+        self.assertDictEqual(results, expected)
@@ -0,0 +1,105 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import pandas as pd
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+from emg_analyzer.cache import EmtCache
+from emg_analyzer.emg import Emg
+from emg_analyzer.frame_index import FrameIndex
+
+
+class TestFrameIndex(EmgTest):
+
+    def setUp(self):
+        # the indexes kept in memory by the other tests
+        FrameIndex._memo.clear()
+
+    def test_build(self):
+        emt_path = self.get_data('two_tracks.emt')
+        index = FrameIndex.build(emt_path, step=3)
+        self.assertListEqual(list(index.frames), [0, 3, 6, 9])
+        with open(emt_path, 'rb') as emt_file:
+            content = emt_file.read()
+        self.assertEqual(index.end, len(content))
+        for frame, offset in zip(index.frames, index.offsets):
+            line = content[offset:].split(b'\n', 1)[0]
+            self.assertEqual(int(line.split(b'\t')[0]), frame)
+        self.assertEqual(index.data_offset, index.offsets[0])
+
+    def test_read(self):
+        emt_path = self.get_data('two_tracks.emt')
+        index = FrameIndex.build(emt_path, step=3)
+        self.assertEqual(index.byte_range(4, 5), (index.offsets[1], index.offsets[2]))
+        self.assertEqual(index.byte_range(7, 12), (index.offsets[2], index.end))
+        lines = index.read(emt_path, 4, 5).splitlines()
+        self.assertListEqual([int(l.split('\t')[0]) for l in lines], [3, 4, 5])
+
+    def test_load(self):
+        emt_path = self.get_data('two_tracks.emt')
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            emt_cache = EmtCache(cache_dir=tmp_dir_name)
+            built = FrameIndex.load(emt_path, cache=emt_cache, step=2)
+            self.assertIsNotNone(emt_cache.lookup(emt_path, kind='frame_index'))
+            loaded = FrameIndex.load(emt_path, cache=emt_cache)
+            self.assertEqual(loaded.step, 2)
+            self.assertListEqual(list(loaded.frames), list(built.frames))
+            self.assertListEqual(list(loaded.offsets), list(built.offsets))
+
+    def test_load_without_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            emt_path = shutil.copy(self.get_data('two_tracks.emt'), tmp_dir_name)
+            with mock.patch.object(FrameIndex, 'build', wraps=FrameIndex.build) as build:
+                # several blocks of the same file, the file is scanned once
+                for start, stop in ((0, 2), (3, 5), (6, 9)):
+                    Emg.open_frames(emt_path, start, stop, cache=False)
+                self.assertEqual(build.call_count, 1)
+                index = FrameIndex.load(emt_path, cache=False)
+                self.assertEqual(build.call_count, 1)
+
+                # the index of a modified file is rebuilt
+                with open(emt_path, 'a') as emt_file:
+                    emt_file.write('\n')
+                st = os.stat(emt_path)
+                os.utime(emt_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+                new_index = FrameIndex.load(emt_path, cache=False)
+                self.assertEqual(build.call_count, 2)
+                self.assertEqual(new_index.end, index.end + 1)
+
+    def test_open_frames(self):
+        emt_path = self.get_data('two_tracks.emt')
+        emg = Emg()
+        with open(emt_path) as emt_file:
+            emg.parse(emt_file, cache=False)
+        expected = emg.data.get_frames(2, 6)
+
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            emt_cache = EmtCache(cache_dir=tmp_dir_name)
+            # read with the frame index, then from the binary version of the file
+            for cache in (False, emt_cache, 'data'):
+                if cache == 'data':
+                    with open(emt_path) as emt_file:
+                        Emg().parse(emt_file, cache=emt_cache)
+                    cache = emt_cache
+                block = Emg.open_frames(emt_path, 2, 6, cache=cache)
+                pd.testing.assert_frame_equal(block.data.data, expected)
+                self.assertEqual(block.header.frames, 5)
+                self.assertEqual(block.header.start_time, 0.002)
+
+                block = Emg.open_frames(emt_path, 2, 6, cache=cache, tracks=['RBI'])
+                pd.testing.assert_frame_equal(block.data.data, expected[['Time', 'RBI']])
+                self.assertListEqual(block.header.tracks_names, ['RBI'])
@@ -0,0 +1,52 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+import os
+import tempfile
+
+import numpy as np
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+from emg_analyzer.emg import Emg
+from emg_analyzer import plot
+
+
+class TestPlot(EmgTest):
+
+    def test_fig_name(self):
+        self.assertEqual(plot.fig_name('exp 1', 'A/B:C'), 'exp_1_A_B_C.png')
+
+    def test_to_plot(self):
+        emg = Emg.open(self.get_data('two_tracks.emt'), cache=False)
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            figs = emg.to_plot(out_dir=tmp_dir_name)
+            self.assertListEqual(figs, [os.path.join(tmp_dir_name, 'two_tracks_RTRI.png'),
+                                        os.path.join(tmp_dir_name, 'two_tracks_RBI.png')])
+            expected = {}
+            for fig in figs:
+                with open(fig, 'rb') as fig_file:
+                    expected[fig] = fig_file.read()
+                os.unlink(fig)
+            self.assertListEqual(emg.to_plot(out_dir=tmp_dir_name, jobs=2), figs)
+            for fig in figs:
+                with open(fig, 'rb') as fig_file:
+                    self.assertEqual(fig_file.read(), expected[fig])
+
+    def test_decimate(self):
+        x = np.arange(10, dtype=float)
+        y = np.array([1., 5., 2., 2., np.nan, 0., np.nan, np.nan, np.nan, 4.])
+        dec_x, dec_y = plot.decimate(x, y, 3)
+        self.assertListEqual(dec_x.tolist(), [0., 1., 3., 5., 6., 6., 9.])
+        np.testing.assert_array_equal(dec_y, [1., 5., 2., 0., np.nan, np.nan, 4.])
+        dec_x, dec_y = plot.decimate(x, y, 5)
+        self.assertIs(dec_x, x)
+        self.assertIs(dec_y, y)
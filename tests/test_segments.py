@@ -0,0 +1,103 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+import numpy as np
+import pandas as pd
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+from emg_analyzer.emg import Emg
+from emg_analyzer.segments import SegmentDetector, merge_gaps
+from emg_analyzer import stream
+
+
+class TestSegmentDetector(EmgTest):
+
+    def setUp(self):
+        rng = np.random.RandomState(12)
+        self.values = np.round(rng.normal(0, 2, (1001, 3)), 3)
+        self.values[::7, 1] = np.nan
+        self.frames = np.arange(10, 1011)
+        self.times = self.frames / 1000
+        self.on = np.array([1.0, 2.0, 0.5])
+        self.off = np.array([0.0, 1.0, 0.5])
+
+    def expected(self, track, on, off, min_duration, max_gap):
+        """the segments computed frame by frame"""
+        segments = []
+        active = False
+        for frame, value in zip(self.frames, self.values[:, track]):
+            if active and not value > off:
+                active = False
+            elif not active and value > on:
+                active = True
+                segments.append([frame, frame])
+            if active:
+                segments[-1][1] = frame
+        merged = []
+        for start, stop in segments:
+            if merged and start - merged[-1][1] - 1 <= max_gap:
+                merged[-1][1] = stop
+            else:
+                merged.append([start, stop])
+        return [(start, stop) for start, stop in merged if stop - start + 1 >= min_duration]
+
+    def test_update(self):
+        for off in (None, self.off):
+            for min_duration, max_gap in ((1, 0), (3, 0), (1, 2), (4, 3)):
+                for chunksize in (1, 7, 5000):
+                    with self.subTest(off=off, min_duration=min_duration, max_gap=max_gap, chunksize=chunksize):
+                        detector = SegmentDetector(['A', 'B', 'C'], self.on, off_thresholds=off,
+                                                   min_duration=min_duration, max_gap=max_gap)
+                        for first in range(0, len(self.frames), chunksize):
+                            rows = slice(first, first + chunksize)
+                            detector.update(self.frames[rows], self.times[rows], self.values[rows])
+                        segments = detector.finish()
+                        self.assertEqual(segments.frames, len(self.frames))
+                        self.assertEqual(segments.first_frame, 10)
+                        for i, track in enumerate(['A', 'B', 'C']):
+                            expected = self.expected(i, self.on[i], (self.on if off is None else off)[i],
+                                                     min_duration, max_gap)
+                            starts, stops = segments.intervals[track]
+                            self.assertListEqual(list(zip(starts.tolist(), stops.tolist())), expected)
+
+    def test_no_segment_option(self):
+        # without hysteresis, merge and minimum duration, the segments are the values selected
+        detector = SegmentDetector(['A', 'B', 'C'], self.on)
+        segments = detector.update(self.frames, self.times, self.values).finish()
+        count = np.count_nonzero(self.values > self.on, axis=0)
+        self.assertListEqual(segments.count.tolist(), count.tolist())
+
+    def test_bad_args(self):
+        with self.assertRaises(ValueError):
+            SegmentDetector(['A', 'B', 'C'], self.off, off_thresholds=self.on)
+        with self.assertRaises(ValueError):
+            SegmentDetector(['A', 'B', 'C'], self.on, min_duration=0)
+        with self.assertRaises(ValueError):
+            SegmentDetector(['A', 'B', 'C'], self.on, max_gap=-1)
+
+    def test_merge_gaps(self):
+        starts, stops = merge_gaps(np.array([0, 5, 8, 20]), np.array([2, 6, 10, 25]), 2)
+        self.assertListEqual(starts.tolist(), [0, 20])
+        self.assertListEqual(stops.tolist(), [10, 25])
+
+    def test_detect_segments(self):
+        emt_path = self.get_data('A.emt')
+        rest_matrix = pd.read_table(self.get_data('A.desc'), comment='#', index_col=0)
+        emg = Emg.open(emt_path, cache=False)
+        expected = emg.detect_segments(rest_matrix, coef=0.5, off_coef=0, min_duration=2)
+        self.assertListEqual(expected.count.tolist(), [3, 3, 3])
+        for chunksize in (3, 100):
+            segments = stream.detect_segments(emt_path, rest_matrix, coef=0.5, off_coef=0, min_duration=2,
+                                              chunksize=chunksize, cache=False)
+            for track in expected.tracks:
+                for bounds, expected_bounds in zip(segments.intervals[track], expected.intervals[track]):
+                    self.assertListEqual(bounds.tolist(), expected_bounds.tolist())
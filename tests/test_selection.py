@@ -0,0 +1,110 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+from emg_analyzer.emg import EmgData
+from emg_analyzer.selection import Selection
+from emg_analyzer.scripts import emg_select
+
+
+class TestSelection(EmgTest):
+
+    def setUp(self):
+        rng = np.random.RandomState(3)
+        values = np.round(rng.normal(0, 1, (1000, 3)), 3)
+        values[values < 0.5] = np.nan
+        values[:, 2] = np.nan
+        df = pd.DataFrame(values, index=pd.RangeIndex(10, 1010, name='Frame'), columns=['A', 'B', 'C'])
+        df.insert(0, 'Time', np.round(np.arange(1000) * 0.001 + 0.2, 3))
+        self.data = EmgData()
+        self.data.data = df
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_from_data(self):
+        df = pd.DataFrame({'Time': [0., 0.001, 0.002, 0.003, 0.004],
+                           'A': [1., 2., np.nan, 3., 4.],
+                           'B': [np.nan] * 5})
+        data = EmgData()
+        data.data = df
+        sel = Selection.from_data(data)
+        self.assertListEqual(sel.intervals['A'][0].tolist(), [0, 3])
+        self.assertListEqual(sel.intervals['A'][1].tolist(), [1, 4])
+        self.assertListEqual(sel.intervals['B'][0].tolist(), [])
+        self.assertDictEqual(sel.count.to_dict(), {'A': 4, 'B': 0})
+        self.assertDictEqual(sel.activation_ratio.to_dict(), {'A': 0.8, 'B': 0.})
+        self.assertTrue(sel.to_data().data.equals(df))
+
+    def test_count(self):
+        sel = Selection.from_data(self.data)
+        self.assertTrue(sel.count.equals(self.data.data.iloc[:, 1:].count()))
+        self.assertTrue(np.allclose(sel.activation_ratio, self.data.data.iloc[:, 1:].count() / 1000))
+
+    def test_write_read(self):
+        sel_path = os.path.join(self.tmp_dir, 'A.sel')
+        paths = Selection.from_data(self.data).write(sel_path, comments=['Activities selection'])
+        self.assertListEqual(paths, [sel_path, os.path.join(self.tmp_dir, 'A_sel.npz')])
+        with open(sel_path) as sel_file:
+            self.assertEqual(sel_file.readline(), '# Activities selection\n')
+        sel = Selection.read(sel_path)
+        self.assertListEqual(sel.tracks, ['A', 'B', 'C'])
+        self.assertTrue(sel.to_data().data.equals(self.data.data))
+
+        # the counts without the values
+        os.unlink(paths[1])
+        sel = Selection.read(sel_path)
+        self.assertTrue(sel.count.equals(self.data.data.iloc[:, 1:].count()))
+        with self.assertRaises(RuntimeError):
+            sel.to_data()
+
+    def test_not_consecutive(self):
+        df = self.data.data.iloc[np.r_[0:100, 150:300, 301:1000]].copy()
+        df.iloc[99:102, 1] = 1.
+        data = EmgData()
+        data.data = df
+        sel = Selection.from_data(data)
+        self.assertIsNotNone(sel.index)
+        # the intervals do not span over the missing frames
+        starts, stops = sel.intervals['A']
+        self.assertIn(109, stops)
+        self.assertIn(160, starts)
+        self.assertTrue(sel.count.equals(df.iloc[:, 1:].count()))
+        sel_path = os.path.join(self.tmp_dir, 'A.sel')
+        sel.write(sel_path)
+        self.assertTrue(Selection.read(sel_path).to_data().data.equals(df))
+
+    def test_emg_select_intervals(self):
+        for name in ('table', 'intervals'):
+            os.mkdir(os.path.join(self.tmp_dir, name))
+            shutil.copy(self.get_data('A.emt'), os.path.join(self.tmp_dir, name))
+        args = ['--rest-matrix', self.get_data('A.desc'), '--coef', '0']
+        emg_select.main(args=[os.path.join(self.tmp_dir, 'table')] + args)
+        emg_select.main(args=[os.path.join(self.tmp_dir, 'intervals'), '--intervals'] + args)
+        for name in ('table', 'intervals'):
+            with open(os.path.join(self.tmp_dir, name, 'A_sel.summary')) as summary_file:
+                self.assertEqual(summary_file.read().splitlines()[2], 'exp1\t5.6\t5\t0.5')
+        table = pd.read_table(os.path.join(self.tmp_dir, 'table', 'A.sel'), comment='#', index_col=0)
+        sel = Selection.read(os.path.join(self.tmp_dir, 'intervals', 'A.sel'))
+        # the table format can be read too
+        self.assertTrue(sel.count.equals(Selection.read(os.path.join(self.tmp_dir, 'table', 'A.sel')).count))
+        intervals = sel.to_data().data
+        self.assertTrue(np.allclose(intervals, table, equal_nan=True))
+        self.assertListEqual(list(intervals.columns), list(table.columns))
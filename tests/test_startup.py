@@ -0,0 +1,62 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+import os
+import re
+import sys
+import subprocess
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+
+class TestStartup(EmgTest):
+    """
+    The console scripts must not load the heavy dependencies before they need them,
+    so `emg_xxx --help` and the short runs start fast.
+    """
+
+    heavy_modules = ('pandas', 'numpy', 'matplotlib', 'scipy')
+
+    _help_code = """
+import io
+import sys
+import contextlib
+from {module} import main
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+        main(['--help'])
+    except SystemExit:
+        pass
+print(' '.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+    @classmethod
+    def setUpClass(cls):
+        root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with open(os.path.join(root_dir, 'setup.py')) as setup_file:
+            cls.entry_points = re.findall(r"'(\w+)=([\w.]+):main'", setup_file.read())
+        cls.env = dict(os.environ, PYTHONPATH=root_dir)
+
+    def run_python(self, code):
+        """
+        :return: the output of *code* run in a new interpreter.
+        :rtype: str
+        """
+        return subprocess.run([sys.executable, '-c', code], env=self.env,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              universal_newlines=True, check=True).stdout
+
+    def test_help(self):
+        self.assertTrue(self.entry_points)
+        for name, module in self.entry_points:
+            with self.subTest(script=name):
+                out = self.run_python(self._help_code.format(module=module, heavy=self.heavy_modules))
+                self.assertEqual(out.strip(), '', "{} --help imports {}".format(name, out.strip()))
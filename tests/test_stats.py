@@ -0,0 +1,112 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+from emg_analyzer.emg import Emg
+from emg_analyzer.stats import Statistics
+from emg_analyzer import stream
+
+
+class TestStatistics(EmgTest):
+
+    def setUp(self):
+        rng = np.random.RandomState(12)
+        self.data = pd.DataFrame(np.round(rng.normal(5, 2, (1001, 3)), 3), columns=['A', 'B', 'C'])
+        self.data.iloc[::7, 1] = np.nan
+        self.data['C'] = np.nan
+
+    def assert_describe_equal(self, received, expected):
+        self.assertListEqual(list(received.index), list(expected.index))
+        self.assertListEqual(list(received.columns), list(expected.columns))
+        self.assertTrue(np.allclose(received.to_numpy(), expected.to_numpy(), equal_nan=True))
+
+    def test_describe(self):
+        stats = Statistics.from_data(self.data)
+        self.assert_describe_equal(stats.describe(), self.data.describe())
+
+    def test_update_by_chunk(self):
+        stats = Statistics()
+        for first in range(0, len(self.data), 100):
+            stats.update(self.data.iloc[first:first + 100])
+        self.assert_describe_equal(stats.describe(), self.data.describe())
+
+    def test_update_values_by_block(self):
+        for dtype in (np.float64, np.float32):
+            with self.subTest(dtype=dtype):
+                values = self.data.to_numpy().astype(dtype)
+                stats = Statistics().update_values(list(self.data.columns), values, chunksize=64)
+                expected = pd.DataFrame(values, columns=self.data.columns).astype(np.float64).describe()
+                self.assert_describe_equal(stats.describe(), expected)
+
+    def test_update_values_memory(self):
+        import os
+        import tempfile
+        import tracemalloc
+        rng = np.random.RandomState(3)
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            path = os.path.join(tmp_dir_name, 'values.npy')
+            np.save(path, np.round(rng.normal(5, 2, (400000, 4)), 3).astype(np.float32))
+            values = np.load(path, mmap_mode='r')
+            tracemalloc.start()
+            try:
+                stats = Statistics().update_values(['A', 'B', 'C', 'D'], values, chunksize=10000)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            # the values are read block by block, the memory used does not depend on their length
+            self.assertLess(peak, values.nbytes / 2)
+            expected = pd.DataFrame(values.astype(np.float64), columns=stats.tracks).describe()
+            self.assert_describe_equal(stats.describe(), expected)
+            del values
+
+    def test_merge(self):
+        stats = Statistics.from_data(self.data.iloc[:300])
+        stats.merge(Statistics.from_data(self.data.iloc[300:]))
+        self.assert_describe_equal(stats.describe(), self.data.describe())
+        stats = Statistics.from_data(self.data[['A']])
+        stats.merge(Statistics.from_data(self.data[['B']]))
+        self.assertListEqual(stats.tracks, ['A', 'B'])
+        self.assert_describe_equal(stats.describe(), self.data[['A', 'B']].describe())
+
+    def test_merge_without_quantiles(self):
+        stats = Statistics.from_data(self.data.iloc[:300])
+        stats.merge(Statistics.from_data(self.data.iloc[300:], quantiles=False))
+        self.assertFalse(stats.quantiles)
+        expected = self.data.describe().loc[['count', 'mean', 'std', 'min', 'max']]
+        self.assert_describe_equal(stats.describe(), expected)
+        with self.assertRaises(RuntimeError):
+            stats.quantile(0.5)
+
+    def test_to_dict(self):
+        stats = Statistics.from_data(self.data.iloc[:300])
+        stats = Statistics.from_dict(json.loads(json.dumps(stats.to_dict())))
+        stats.merge(Statistics.from_data(self.data.iloc[300:]))
+        self.assert_describe_equal(stats.describe(), self.data.describe())
+
+    def test_emg_describe(self):
+        emt_path = self.get_data('two_tracks.emt')
+        emg = Emg.open(emt_path, cache=False)
+        self.assert_describe_equal(emg.describe(), emg.data.data.iloc[:, 1:].describe())
+
+    def test_stream_statistics(self):
+        emt_path = self.get_data('two_tracks.emt')
+        expected = Emg.open(emt_path, cache=False).describe()
+        for chunksize in (3, 100):
+            stats = stream.statistics(emt_path, chunksize=chunksize, cache=False)
+            self.assert_describe_equal(stats.describe(), expected)
+        stats = stream.statistics(emt_path, tracks=['RBI'], cache=False)
+        self.assert_describe_equal(stats.describe(), expected[['RBI']])
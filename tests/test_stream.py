@@ -0,0 +1,77 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+from io import StringIO
+
+import pandas as pd
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+from emg_analyzer.emg import Emg
+from emg_analyzer import stream
+
+
+class TestStream(EmgTest):
+
+    def test_norm(self):
+        emt_path = self.get_data('two_tracks.emt')
+        for dtype in (None, 'float32'):
+            expected = Emg.open(emt_path, cache=False, dtype=dtype).norm().to_emt()
+            for chunksize in (3, 100):
+                buffer = StringIO()
+                stream.norm(emt_path, buffer, chunksize=chunksize, cache=False, dtype=dtype)
+                self.assertEqual(buffer.getvalue(), expected)
+
+    def test_activation_summary(self):
+        emt_path = self.get_data('A.emt')
+        rest_matrix = pd.read_table(self.get_data('A.desc'), comment='#', index_col=0)
+        emg = Emg.open(emt_path, cache=False)
+        expected = emg.activation_summary(rest_matrix, coef=0.5)
+        selected, _ = emg.select(rest_matrix, coef=0.5)
+        self.assertListEqual(expected['count'].tolist(), selected.data.data[['exp1', 'exp3', 'exp4']].count().tolist())
+        for chunksize in (3, 100):
+            summary = stream.activation_summary(emt_path, rest_matrix, coef=0.5, chunksize=chunksize, cache=False)
+            self.assertTrue(summary.equals(expected))
+
+    def test_moving(self):
+        emt_path = self.get_data('two_tracks.emt')
+        for feature in ('mean', 'rms', 'envelope'):
+            expected = Emg.open(emt_path, cache=False).moving(feature, 4).to_emt()
+            for chunksize in (3, 100):
+                buffer = StringIO()
+                stream.moving(emt_path, buffer, feature, 4, chunksize=chunksize, cache=False)
+                self.assertEqual(buffer.getvalue(), expected)
+
+    def test_activation_sweep(self):
+        emt_path = self.get_data('A.emt')
+        rest_matrix = pd.read_table(self.get_data('A.desc'), comment='#', index_col=0)
+        coefs = [0, 0.5, 1, 2]
+        expected = Emg.open(emt_path, cache=False).activation_sweep(rest_matrix, coefs)
+        for chunksize in (3, 100):
+            sweep = stream.activation_sweep(emt_path, rest_matrix, coefs, chunksize=chunksize, cache=False)
+            self.assertTrue(sweep.equals(expected))
+
+    def test_norm_by_track(self):
+        emt_path = self.get_data('two_tracks.emt')
+        for dtype in (None, 'float32'):
+            expected = Emg.open(emt_path, cache=False, dtype=dtype).norm_by_track().to_emt()
+            for chunksize in (3, 100):
+                buffer = StringIO()
+                stream.norm_by_track(emt_path, buffer, chunksize=chunksize, cache=False, dtype=dtype)
+                self.assertEqual(buffer.getvalue(), expected)
+
+    def test_norm_by_track_dyn_cal(self):
+        emt_path = self.get_data('two_tracks.emt')
+        dyn_cal = pd.DataFrame({'RTRI': [0.0, 2.0], 'RBI': [0.1, 1.1]}, index=['min', 'max'])
+        expected = Emg.open(emt_path, cache=False).norm_by_track(dyn_cal=dyn_cal).to_emt()
+        buffer = StringIO()
+        stream.norm_by_track(emt_path, buffer, dyn_cal=dyn_cal, chunksize=4, cache=False)
+        self.assertEqual(buffer.getvalue(), expected)
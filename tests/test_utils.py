@@ -8,6 +8,7 @@ import tempfile
 import shutil
 import os
 import sys
+from unittest import mock
 
 try:
     from tests import EmgTest
@@ -29,7 +30,7 @@ emg_logger.addHandler(logging.NullHandler())
 class TestUtils(EmgTest):
 
     def test_get_version_message(self):
-        import emg_analyzer
+        import emg_analyzer.emg
         expected_msg = """emg_group_tracks: {emg_vers}
 
 Using: 
@@ -56,6 +57,39 @@ Using:
                                                    suffix='norm')
             self.assertTrue(self.compare_2_files(norm_path, emt_path_exp))
 
+            norm_path = utils.process_one_emt_file(emt_path,
+                                                   'norm_by_track',
+                                                   method_args=tuple(),
+                                                   method_kwargs={},
+                                                   dest=tmp_dir_name,
+                                                   suffix='norm_chunk',
+                                                   chunksize=3)
+            self.assertTrue(self.compare_2_files(norm_path, emt_path_exp))
+
+            # inplace is passed only when asked
+            from unittest import mock
+            from emg_analyzer.emg import Emg
+            for inplace in (False, True):
+                with mock.patch.object(Emg, 'norm_by_track', autospec=True,
+                                       side_effect=Emg.norm_by_track) as norm_by_track:
+                    norm_path = utils.process_one_emt_file(emt_path,
+                                                           'norm_by_track',
+                                                           method_args=tuple(),
+                                                           method_kwargs={},
+                                                           dest=tmp_dir_name,
+                                                           suffix='norm_inplace',
+                                                           inplace=inplace)
+                self.assertEqual(norm_by_track.call_args[1], {'inplace': True} if inplace else {})
+                self.assertTrue(self.compare_2_files(norm_path, emt_path_exp))
+
+            # a file which cannot be processed leaves no output
+            emt_path = shutil.copy(self.get_data('header_two_tracks.emt'), tmp_dir_name)
+            with self.assertRaises(RuntimeError):
+                utils.process_one_emt_file(emt_path, 'norm_by_track', method_args=tuple(), method_kwargs={},
+                                           dest=tmp_dir_name, suffix='norm', chunksize=3)
+            self.assertListEqual(sorted(f for f in os.listdir(tmp_dir_name) if f.startswith('header')),
+                                 ['header_two_tracks.emt'])
+
 
     def test_process_dir(self):
         emt_path_ori = self.get_data('two_tracks.emt')
@@ -93,3 +127,161 @@ Using:
                                   )
                 self.assertEqual(str(ctx.exception),
                                 'directory exists: {}'.format(os.path.join(tmp_dir_name, 'level0_norm')))
+
+
+    def test_process_dir_jobs(self):
+        emt_path_ori = self.get_data('two_tracks.emt')
+        emt_path_exp = self.get_data('two_tracks_norm_by_track.emt')
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            level = tmp_dir_name
+            for i in (0, 1, 2):
+                level = os.path.join(level, 'level{}'.format(i))
+                os.mkdir(level)
+                shutil.copy(emt_path_ori, level)
+                shutil.copy(emt_path_ori, os.path.join(level, 'other.emt'))
+
+            norm_path = utils.process_dir(os.path.join(tmp_dir_name, 'level0'),
+                                          'norm_by_track',
+                                          method_args=tuple(),
+                                          method_kwargs={},
+                                          suffix='norm',
+                                          jobs=2
+                                          )
+            self.assertEqual(norm_path, os.path.join(tmp_dir_name, 'level0_norm'))
+            level = norm_path
+            for i in (0, 1, 2):
+                if i:
+                    level = os.path.join(level, 'level{}_norm'.format(i))
+                self.assertListEqual(sorted(os.listdir(level))[-2:], ['other_norm.emt', 'two_tracks_norm.emt'])
+                for name in ('other_norm.emt', 'two_tracks_norm.emt'):
+                    self.assertTrue(self.compare_2_files(os.path.join(level, name), emt_path_exp))
+
+
+    def test_process_dir_errors(self):
+        emt_path_ori = self.get_data('two_tracks.emt')
+        emt_path_exp = self.get_data('two_tracks_norm_by_track.emt')
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            in_dir = os.path.join(tmp_dir_name, 'in')
+            os.mkdir(in_dir)
+            shutil.copy(emt_path_ori, in_dir)
+            bad_path = os.path.join(in_dir, 'bad.emt')
+            with open(bad_path, 'w') as bad_file:
+                bad_file.write('not an emt file\n')
+            for jobs in (1, 2):
+                with self.assertRaises(utils.ProcessingError) as ctx:
+                    utils.process_dir(in_dir,
+                                      'norm_by_track',
+                                      method_args=tuple(),
+                                      method_kwargs={},
+                                      suffix='norm{}'.format(jobs),
+                                      jobs=jobs)
+                self.assertListEqual(list(ctx.exception.errors), [bad_path])
+                # the other files are processed
+                self.assertTrue(self.compare_2_files(os.path.join(ctx.exception.processed_path,
+                                                                  'two_tracks_norm{}.emt'.format(jobs)),
+                                                     emt_path_exp))
+
+
+    def test_process_dir_incremental(self):
+        emt_path_ori = self.get_data('two_tracks.emt')
+        emt_path_exp = self.get_data('two_tracks_norm_by_track.emt')
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            in_dir = os.path.join(tmp_dir_name, 'in')
+            os.makedirs(os.path.join(in_dir, 'sub'))
+            for name in ('a.emt', 'b.emt', os.path.join('sub', 'c.emt')):
+                shutil.copy(emt_path_ori, os.path.join(in_dir, name))
+
+            def process(**kwargs):
+                options = dict(method_args=tuple(), method_kwargs={}, suffix='norm', incremental=True)
+                options.update(kwargs)
+                with mock.patch.object(utils, 'process_one_emt_file', wraps=utils.process_one_emt_file) as process_one:
+                    norm_path = utils.process_dir(in_dir, options.pop('method_name', 'norm_by_track'), **options)
+                processed = sorted(os.path.relpath(c[0][0], in_dir) for c in process_one.call_args_list)
+                return norm_path, processed
+
+            norm_path, processed = process()
+            self.assertListEqual(processed, ['a.emt', 'b.emt', os.path.join('sub', 'c.emt')])
+            for name in ('a_norm.emt', 'b_norm.emt', os.path.join('sub_norm', 'c_norm.emt')):
+                self.assertTrue(self.compare_2_files(os.path.join(norm_path, name), emt_path_exp))
+            manifest_path = os.path.join(norm_path, utils.Manifest.name)
+            with open(manifest_path) as manifest_file:
+                self.assertEqual(len(manifest_file.readlines()), 4)
+
+            # nothing to do
+            self.assertListEqual(process()[1], [])
+
+            # resume an interrupted run: b is not recorded, the last line is truncated
+            with open(manifest_path) as manifest_file:
+                lines = [l for l in manifest_file if '"b.emt"' not in l]
+            with open(manifest_path, 'w') as manifest_file:
+                manifest_file.writelines(lines)
+                manifest_file.write('{"input": "su')
+            self.assertListEqual(process()[1], ['b.emt'])
+
+            # the modified files are processed again, the outputs of the removed files are removed
+            shutil.copy(self.get_data('one_track.emt'), os.path.join(in_dir, 'sub', 'c.emt'))
+            os.unlink(os.path.join(in_dir, 'a.emt'))
+            self.assertListEqual(process()[1], [os.path.join('sub', 'c.emt')])
+            self.assertFalse(os.path.exists(os.path.join(norm_path, 'a_norm.emt')))
+            self.assertFalse(self.compare_2_files(os.path.join(norm_path, 'sub_norm', 'c_norm.emt'), emt_path_exp))
+
+            # with checksum a file touched but not modified is not processed again
+            b_path = os.path.join(in_dir, 'b.emt')
+            process(checksum=True)
+            os.utime(b_path, ns=(0, 0))
+            self.assertListEqual(process(checksum=True)[1], [])
+            os.utime(b_path, ns=(10 ** 9, 10 ** 9))
+            self.assertListEqual(process()[1], ['b.emt'])
+
+            # other parameters
+            with self.assertRaises(utils.ManifestError):
+                process(method_name='norm')
+            with self.assertRaises(utils.ManifestError):
+                process(dtype='float32')
+            # a directory processed without manifest
+            utils.process_dir(in_dir, 'norm_by_track', method_args=tuple(), method_kwargs={}, suffix='other')
+            with self.assertRaises(utils.ManifestError):
+                process(suffix='other')
+
+
+    def test_process_dir_incremental_crash(self):
+        emt_path_ori = self.get_data('two_tracks.emt')
+        with tempfile.TemporaryDirectory() as tmp_dir_name:
+            in_dir = os.path.join(tmp_dir_name, 'in')
+            os.makedirs(in_dir)
+            for name in ('a.emt', 'b.emt'):
+                shutil.copy(emt_path_ori, os.path.join(in_dir, name))
+            norm_path = os.path.join(tmp_dir_name, 'in_norm')
+
+            def crash(emt_path, *args, **kwargs):
+                # the process is killed while writing the first output
+                open(os.path.join(norm_path, 'a_norm.emt'), 'w').close()
+                raise KeyboardInterrupt()
+
+            with mock.patch.object(utils, 'process_one_emt_file', side_effect=crash), \
+                    mock.patch.object(utils.Manifest, 'close'):
+                with self.assertRaises(KeyboardInterrupt):
+                    utils.process_dir(in_dir, 'norm_by_track', tuple(), {}, suffix='norm', incremental=True)
+            self.assertTrue(os.path.exists(os.path.join(norm_path, utils.Manifest.name)))
+
+            with mock.patch.object(utils, 'process_one_emt_file', wraps=utils.process_one_emt_file) as process_one:
+                utils.process_dir(in_dir, 'norm_by_track', tuple(), {}, suffix='norm', incremental=True)
+            processed = sorted(os.path.basename(c[0][0]) for c in process_one.call_args_list)
+            self.assertListEqual(processed, ['a.emt', 'b.emt'])
+            self.assertTrue(self.compare_2_files(os.path.join(norm_path, 'a_norm.emt'),
+                                                 self.get_data('two_tracks_norm_by_track.emt')))
+
+
+    def test_prefetch(self):
+        received = list(utils.prefetch(lambda i: i * 10, range(5)))
+        self.assertListEqual(received, [(i, i * 10) for i in range(5)])
+
+        def fail(i):
+            if i == 2:
+                raise ValueError(i)
+            return i
+        received = []
+        with self.assertRaises(ValueError):
+            for item, result in utils.prefetch(fail, range(5), size=2):
+                received.append(result)
+        self.assertListEqual(received, [0, 1])
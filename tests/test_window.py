@@ -0,0 +1,51 @@
+##########################################################################
+# Copyright (c) 2017-2018 Bertrand Néron. All rights reserved.           #
+# Use of this source code is governed by a BSD-style license that can be #
+# found in the LICENSE file.                                             #
+##########################################################################
+
+
+import numpy as np
+import pandas as pd
+
+try:
+    from tests import EmgTest
+except ImportError as err:
+    msg = "Cannot import emg_analyzer: {0!s}".format(err)
+    raise ImportError(msg)
+
+from emg_analyzer.window import MovingWindow
+
+
+class TestMovingWindow(EmgTest):
+
+    def setUp(self):
+        rng = np.random.RandomState(12)
+        self.values = np.round(rng.normal(0, 2, (1001, 3)), 3)
+        self.values[::7, 1] = np.nan
+        self.values[:, 2] = np.nan
+
+    def expected(self, feature, window):
+        data = pd.DataFrame(self.values)
+        if feature == 'mean':
+            return data.rolling(window, min_periods=1).mean().to_numpy()
+        elif feature == 'rms':
+            return np.sqrt((data ** 2).rolling(window, min_periods=1).mean().to_numpy())
+        else:
+            return data.abs().rolling(window, min_periods=1).mean().to_numpy()
+
+    def test_update(self):
+        for feature in ('mean', 'rms', 'envelope'):
+            for window in (1, 2, 50, 2000):
+                expected = self.expected(feature, window)
+                for chunksize in (1, 33, 5000):
+                    with self.subTest(feature=feature, window=window, chunksize=chunksize):
+                        moving = MovingWindow(feature, window)
+                        received = np.concatenate([moving.update(self.values[first:first + chunksize])
+                                                   for first in range(0, len(self.values), chunksize)])
+                        self.assertTrue(np.allclose(received, expected, equal_nan=True))
+
+    def test_bad_args(self):
+        for feature, window in (('median', 3), ('mean', 0), ('mean', 2.5)):
+            with self.assertRaises(ValueError):
+                MovingWindow(feature, window)